@@ -0,0 +1,135 @@
+"""
+Бенчмарк пам'яті та доступу до фігур після завантаження проекту
+
+Завантажує проект (ProjectIO.load_project) і вимірює пам'ять, що лишається
+зайнятою фігурами (tracemalloc), та час проходу по атрибутах фігур,
+координатах ліній і get_shape_bbox (читання координат у гарячих шляхах). Без аргументу project генерує детерміновану сцену з
+фігурами всіх типів. Щоб порівняти з попередньою версією, запустіть
+скрипт на обох ревізіях з тим самим файлом проекту.
+
+Приклади:
+    python bench_shapes.py --count 100000 --save scene.json
+    python bench_shapes.py scene.json
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+from export.project_io import ProjectIO
+from shape import Shape
+from utils.geometry import get_shape_bbox
+
+
+def make_shapes(count, seed=7):
+    """Детермінована сцена: криві - 20%, решта типів порівну"""
+    rng = random.Random(seed)
+    kinds = ['curve', 'curve', 'line', 'arrow', 'rectangle', 'circle', 'ellipse',
+             'polygon', 'text', 'point']
+    colors = [(0, 255, 0), (0, 0, 255), (255, 255, 255), (0, 200, 255)]
+    shapes = []
+    for _ in range(count):
+        kind = rng.choice(kinds)
+        x, y = rng.randint(0, 1900), rng.randint(0, 1000)
+        w, h = rng.randint(2, 120), rng.randint(2, 120)
+        if kind in ('line', 'arrow', 'rectangle'):
+            coords = {'x1': x, 'y1': y, 'x2': x + w, 'y2': y + h}
+        elif kind == 'curve':
+            coords = {'x1': x, 'y1': y, 'x2': x + w, 'y2': y, 'cx': x + w // 2, 'cy': y - h}
+        elif kind == 'circle':
+            coords = {'cx': x, 'cy': y, 'r': w // 2 + 1}
+        elif kind == 'ellipse':
+            coords = {'cx': x, 'cy': y, 'rx': w // 2 + 1, 'ry': h // 2 + 1, 'angle': 0}
+        elif kind == 'polygon':
+            coords = {'points': [(x, y), (x + w, y), (x + w // 2, y + h)]}
+        else:
+            coords = {'x': x, 'y': y}
+        shapes.append(Shape(kind, color_bgr=rng.choice(colors), thickness=rng.choice([1, 2, 3]),
+                            line_style=rng.choice(['solid', 'dashed', 'dotted']),
+                            text='HUD %d' % rng.randint(0, 999) if kind == 'text' else '',
+                            **coords))
+    return shapes
+
+
+def best_ms(func, repeat):
+    """Найкращий час одного виклику в мілісекундах"""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1e3
+
+
+def run(project_file, repeat):
+    start = time.perf_counter()
+    shapes, _, _ = ProjectIO.load_project(project_file)
+    print(f"load                   {time.perf_counter() - start:.2f} s, {len(shapes)} shapes")
+
+    # Повторне завантаження під tracemalloc - лише пам'ять, що лишається у фігурах
+    del shapes
+    gc.collect()
+    tracemalloc.start()
+    shapes, _, _ = ProjectIO.load_project(project_file)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"retained memory        {retained / 1e6:.1f} MB ({retained / len(shapes):.0f} B/shape)")
+
+    def shape_attrs():
+        for shape in shapes:
+            shape.kind, shape.thickness, shape.color_bgr, shape.line_style, shape.filled
+
+    lines = [shape for shape in shapes if shape.kind == 'line']
+
+    def coords_items():
+        for shape in lines:
+            c = shape.coords
+            c['x1'], c['y1'], c['x2'], c['y2']
+
+    def coords_attrs():
+        for shape in lines:
+            c = shape.coords
+            c.x1, c.y1, c.x2, c.y2
+
+    def shape_bboxes():
+        for shape in shapes:
+            get_shape_bbox(shape)
+
+    print(f"5 Shape attributes     {best_ms(shape_attrs, repeat):.1f} ms per pass")
+    print(f"get_shape_bbox         {best_ms(shape_bboxes, repeat):.1f} ms per pass")
+    print(f"coords['x1'] (lines)   {best_ms(coords_items, repeat):.1f} ms per pass")
+    try:
+        print(f"coords.x1 (lines)      {best_ms(coords_attrs, repeat):.1f} ms per pass")
+    except AttributeError:
+        print("coords.x1 (lines)      n/a (coords - звичайний dict)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк пам\'яті та доступу до фігур')
+    parser.add_argument('project', nargs='?', help='файл проекту (.json або .hudp)')
+    parser.add_argument('--count', type=int, default=100000,
+                        help='кількість фігур згенерованої сцени (без project)')
+    parser.add_argument('--save', help='зберегти згенеровану сцену у файл і виміряти його')
+    parser.add_argument('--repeat', type=int, default=7, help='повторів кожного виміру')
+    args = parser.parse_args()
+
+    if args.project:
+        run(args.project, args.repeat)
+        return 0
+
+    path = args.save
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+    try:
+        ProjectIO.save_project(make_shapes(args.count), path)
+        run(path, args.repeat)
+    finally:
+        if args.save is None:
+            os.remove(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,9 +8,10 @@ from PyQt5 import QtWidgets, QtGui, QtCore
 from core.shape_manager import ShapeManager
 from core.selection_manager import SelectionManager
 from core.group_manager import GroupManager
+from core.history import History
 from tools.zoom_pan_manager import ZoomPanManager
 from tools.mouse_handler import MouseHandler
-from rendering.shape_renderer import ShapeRenderer
+from rendering.shape_renderer import ShapeRenderer, CULL_MARGIN_SCREEN, ARROW_HEAD_PAD
 from rendering.grid_renderer import GridRenderer
 from export.code_generator import CodeGenerator
 from export.project_io import ProjectIO
@@ -24,16 +25,18 @@ class CanvasWidget(QtWidgets.QWidget):
     mouse_moved = QtCore.pyqtSignal(int, int)
     shape_info_changed = QtCore.pyqtSignal(str)
     zoom_changed = QtCore.pyqtSignal(float)
+    render_stats_changed = QtCore.pyqtSignal(int, int)  # (намальовано, відсічено)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, columnar=False):
         super().__init__(parent)
         self.setMouseTracking(True)
         self.setFocusPolicy(QtCore.Qt.NoFocus)
         
         # Ініціалізуємо менеджери
-        self.shape_manager = ShapeManager()
+        self.shape_manager = ShapeManager(columnar)
         self.selection_manager = SelectionManager()
         self.group_manager = GroupManager()
+        self.history = History(self.shape_manager, self.group_manager, self.selection_manager)
         self.zoom_pan_manager = ZoomPanManager()
         self.mouse_handler = MouseHandler(self)
         self.shape_renderer = ShapeRenderer()
@@ -58,6 +61,21 @@ class CanvasWidget(QtWidgets.QWidget):
         self.grid_step = 5  # Дуже маленька сітка для точного малювання
         self.mouse_pos = None
         
+        # Статистика останнього кадру
+        self.last_drawn_count = 0
+        self.last_culled_count = 0
+        
+        # Кешований шар з фоном та нерухомими фігурами
+        self._static_layer = None
+        self._static_layer_key = None
+        
+        # Екранна рамка тимчасових елементів останнього кадру (прев'ю, рамка
+        # виділення, фігури, що рухаються) - при русі миші перемальовується
+        # лише вона разом з новою
+        self._overlay_rect = QtCore.QRect()
+        # Запаси рамки для фігур, що рухаються: (ID, товщина, world запас, тексти)
+        self._overlay_extent = None
+        
         # Налаштування розміру полотна (None = необмежене)
         self.canvas_limit_enabled = False
         self.canvas_limit_width = 1920
@@ -137,6 +155,9 @@ class CanvasWidget(QtWidgets.QWidget):
 
     def _clear_temp_state(self):
         """Очистити тимчасовий стан"""
+        moving_shapes = self._get_moving_shapes()
+        if moving_shapes:
+            self.shape_manager.mark_shapes_changed(moving_shapes)
         self.mouse_handler.temp_point = None
         self.mouse_handler.polygon_points = []
         self.selection_manager.stop_dragging()
@@ -183,7 +204,11 @@ class CanvasWidget(QtWidgets.QWidget):
             self.shape_info_changed.emit(info)
         
         if result.get('redraw'):
-            self.update()
+            if world_x is None:
+                # Панування зсуває весь кадр
+                self.update()
+            else:
+                self._update_overlay()
     
     def mouseReleaseEvent(self, event: QtGui.QMouseEvent):
         """Обробка відпускання миші"""
@@ -213,46 +238,36 @@ class CanvasWidget(QtWidgets.QWidget):
     # --- Малювання (paintEvent) ---
 
     def paintEvent(self, event):
-        """Малювання всього canvas"""
+        """Малювання всього canvas
+        
+        Фон (сітка, осі, межі) та нерухомі фігури беруться з кешованого шару,
+        поверх якого щокадру малюються лише фігури, що перетягуються, прев'ю
+        та рамка виділення. Робота обмежується областю event.rect().
+        """
         painter = QtGui.QPainter(self)
-        painter.fillRect(self.rect(), QtGui.QColor(0, 0, 0))
+        dirty = event.rect()
+        painter.setClipRect(dirty)
+        
+        moving_shapes = self._get_moving_shapes()
+        layer = self._get_static_layer(moving_shapes)
+        dpr = layer.devicePixelRatioF()
+        painter.drawPixmap(QtCore.QRectF(dirty), layer,
+                           QtCore.QRectF(dirty.x() * dpr, dirty.y() * dpr,
+                                         dirty.width() * dpr, dirty.height() * dpr))
+        self._overlay_rect = self._get_overlay_rect(moving_shapes)
 
         # Застосовуємо трансформацію (zoom + pan)
-        transform = QtGui.QTransform()
-        transform.translate(self.zoom_pan_manager.pan_x, self.zoom_pan_manager.pan_y)
-        transform.scale(self.zoom_pan_manager.zoom_factor, self.zoom_pan_manager.zoom_factor)
-        painter.setTransform(transform)
-
-
-        # Передаємо налаштування полотна для вирівнювання сітки
-        canvas_limits = None
-        if self.canvas_limit_enabled:
-            canvas_limits = {
-                'enabled': True,
-                'width': self.canvas_limit_width,
-                'height': self.canvas_limit_height
-            }
-        
-        # Малюємо сітку та осі
-        self.grid_renderer.draw_grid(painter, self.rect(), self.zoom_pan_manager, canvas_limits)
-        self.grid_renderer.draw_center_axes(painter, self.rect(), self.zoom_pan_manager, canvas_limits)
+        painter.setTransform(self._get_world_transform())
         
-        # Малюємо межі полотна, якщо увімкнено
-        if self.canvas_limit_enabled:
-            self.grid_renderer.draw_canvas_limits(
-                painter, 
-                self.canvas_limit_width, 
-                self.canvas_limit_height
+        # Фігури, що зараз рухаються
+        for shape_id in self.shape_manager.sort_ids(moving_shapes):
+            self.shape_renderer.draw_shape(
+                painter,
+                self.shape_manager.get_shape(shape_id),
+                shape_id in self.selection_manager.selected_shapes,
+                self.zoom_pan_manager.zoom_factor,
+                self.selection_manager.show_control_points
             )
-
-        # Малюємо фігури
-        self.shape_renderer.draw_shapes(
-            painter, 
-            self.shape_manager.shapes, 
-            self.selection_manager.selected_shapes,
-            self.zoom_pan_manager.zoom_factor,
-            self.selection_manager.show_control_points
-        )
         
         # Малюємо рамку виділення
         if self.current_mode == 'select':
@@ -286,6 +301,191 @@ class CanvasWidget(QtWidgets.QWidget):
                 self.zoom_pan_manager.zoom_factor
             )
     
+    def _update_overlay(self):
+        """Перемалювати лише стару та нову області тимчасових елементів
+        
+        Статичний шар при цьому не змінюється (фігури, що рухаються, в нього не входять).
+        """
+        dirty = self._overlay_rect.united(self._get_overlay_rect(self._get_moving_shapes()))
+        if not dirty.isEmpty():
+            self.update(dirty)
+    
+    def _get_overlay_rect(self, moving_shapes):
+        """Екранна рамка фігур, що рухаються, прев'ю та рамки виділення
+        
+        Returns:
+            QRect: порожній, якщо тимчасових елементів немає
+        """
+        points = []
+        thickness = 0
+        world_pad = 0
+        if moving_shapes:
+            bbox = self.shape_manager.get_selection_bbox(moving_shapes)
+            if bbox is not None:
+                points += [(bbox[0], bbox[1]), (bbox[2], bbox[3])]
+            thickness, world_pad, texts = self._get_overlay_extent(moving_shapes)
+            for shape_id, offset in texts:
+                coords = self.shape_manager.get_shape(shape_id).coords
+                x, y = coords['x'], coords['y']
+                points += [(x + offset.left(), y + offset.top()), (x + offset.right(), y + offset.bottom())]
+        
+        temp_point = self.mouse_handler.temp_point
+        mouse_pos = self.mouse_pos
+        if mouse_pos is not None:
+            preview = []
+            if self.current_mode == 'polygon' and self.mouse_handler.polygon_points:
+                preview += self.mouse_handler.polygon_points
+                preview.append(mouse_pos)
+            elif temp_point is not None and self.current_mode in ['select', 'line', 'rectangle', 'arrow']:
+                preview += [temp_point, mouse_pos]
+            elif temp_point is not None and self.current_mode in ['circle', 'ellipse']:
+                # Прев'ю кола та еліпса - з центром у temp_point
+                x0, y0 = temp_point
+                rx, ry = abs(mouse_pos[0] - x0), abs(mouse_pos[1] - y0)
+                if self.current_mode == 'circle':
+                    rx = ry = math.hypot(rx, ry)
+                preview += [(x0 - rx, y0 - ry), (x0 + rx, y0 + ry)]
+            if preview:
+                points += preview
+                thickness = max(thickness, self.current_thickness)
+                if self.current_mode == 'arrow':
+                    world_pad = max(world_pad, ARROW_HEAD_PAD)
+        
+        if not points:
+            return QtCore.QRect()
+        
+        zoom = self.zoom_pan_manager.zoom_factor
+        x1, y1 = self.zoom_pan_manager.world_to_screen(min(p[0] for p in points), min(p[1] for p in points))
+        x2, y2 = self.zoom_pan_manager.world_to_screen(max(p[0] for p in points), max(p[1] for p in points))
+        # Запас на маркери виділення, перо (не тонше 2 world одиниць у виділених)
+        # та наконечники стрілок і радіус точок
+        margin = CULL_MARGIN_SCREEN + max(thickness + 2, 2 * zoom) + world_pad * zoom
+        return QtCore.QRect(
+            QtCore.QPoint(math.floor(x1 - margin), math.floor(y1 - margin)),
+            QtCore.QPoint(math.ceil(x2 + margin), math.ceil(y2 + margin))
+        )
+    
+    def _get_overlay_extent(self, moving_shapes):
+        """Найбільша товщина, world запас та рамки текстів фігур, що рухаються
+        
+        Стиль фігур під час перетягування не змінюється, тому результат
+        кешується на весь набір moving_shapes.
+        
+        Returns:
+            tuple: (товщина, world запас, [(ID тексту, QRectF відносно базової точки)])
+        """
+        cached = self._overlay_extent
+        if cached is not None and cached[0] == moving_shapes:
+            return cached[1:]
+        
+        thickness = 0
+        world_pad = 0
+        texts = []
+        for shape_id in moving_shapes:
+            shape = self.shape_manager.get_shape(shape_id)
+            if shape is None:
+                continue
+            thickness = max(thickness, shape.thickness)
+            if shape.kind == 'arrow':
+                world_pad = max(world_pad, ARROW_HEAD_PAD)
+            elif shape.kind == 'point':
+                world_pad = max(world_pad, max(3, shape.thickness * 2))
+            elif shape.kind == 'text':
+                # Той самий шрифт, що й у ShapeRenderer - рамка в world одиницях
+                font = QtGui.QFont("Arial", int(16 * getattr(shape, 'font_scale', 1.0)))
+                texts.append((shape_id, QtGui.QFontMetricsF(font, self).boundingRect(getattr(shape, 'text', ''))))
+        
+        self._overlay_extent = (moving_shapes, thickness, world_pad, texts)
+        return thickness, world_pad, texts
+    
+    def _get_world_transform(self):
+        """Трансформація world -> screen (zoom + pan)"""
+        transform = QtGui.QTransform()
+        transform.translate(self.zoom_pan_manager.pan_x, self.zoom_pan_manager.pan_y)
+        transform.scale(self.zoom_pan_manager.zoom_factor, self.zoom_pan_manager.zoom_factor)
+        return transform
+    
+    def _get_moving_shapes(self):
+        """ID фігур, які зараз перетягуються або редагуються"""
+        selection = self.selection_manager
+        if selection.is_dragging():
+            return frozenset(selection.selected_shapes)
+        if selection.editing_curve or selection.dragging_control_point:
+            if selection.curve_shape_id is not None:
+                return frozenset([selection.curve_shape_id])
+        return frozenset()
+    
+    def _get_static_layer(self, moving_shapes):
+        """Отримати кешований шар з фоном та нерухомими фігурами
+        
+        Шар перемальовується лише коли змінюється zoom/pan, розмір віджета,
+        налаштування сітки чи версія сцени.
+        """
+        dpr = self.devicePixelRatioF()
+        canvas_limits = self._get_grid_canvas_limits()
+        key = (
+            self.width(), self.height(), dpr,
+            self.zoom_pan_manager.zoom_factor,
+            self.zoom_pan_manager.pan_x, self.zoom_pan_manager.pan_y,
+            self.grid_renderer.grid_step, self.grid_renderer.grid_bold_step,
+            tuple(canvas_limits.items()) if canvas_limits else None,
+            self.shape_manager.version,
+            frozenset(self.selection_manager.selected_shapes),
+            self.selection_manager.show_control_points,
+            moving_shapes,
+        )
+        if self._static_layer is not None and self._static_layer_key == key:
+            return self._static_layer
+        
+        layer = QtGui.QPixmap(max(1, int(self.width() * dpr)), max(1, int(self.height() * dpr)))
+        layer.setDevicePixelRatio(dpr)
+        layer.fill(QtGui.QColor(0, 0, 0))
+        
+        painter = QtGui.QPainter(layer)
+        
+        # Сітка та межі полотна - з кешованих плиток, осі (залежать від
+        # центру екрану) - поверх них
+        self.grid_renderer.draw_background(painter, self.rect(), self.zoom_pan_manager, canvas_limits, dpr)
+        painter.setTransform(self._get_world_transform())
+        self.grid_renderer.draw_center_axes(painter, self.rect(), self.zoom_pan_manager, canvas_limits)
+
+        # Малюємо фігури (тільки ті, що потрапляють у видиму область)
+        visible_rect = self.zoom_pan_manager.get_visible_world_rect(self.width(), self.height())
+        culled = self.shape_renderer.draw_shapes(
+            painter, 
+            self.shape_manager.shapes, 
+            self.selection_manager.selected_shapes,
+            self.zoom_pan_manager.zoom_factor,
+            self.selection_manager.show_control_points,
+            visible_rect=visible_rect,
+            shape_manager=self.shape_manager,
+            excluded_shapes=moving_shapes
+        )
+        painter.end()
+        self._update_render_stats(len(self.shape_manager.shapes) - culled, culled)
+        
+        self._static_layer = layer
+        self._static_layer_key = key
+        return layer
+    
+    def _get_grid_canvas_limits(self):
+        """Налаштування полотна для вирівнювання сітки (None якщо вимкнено)"""
+        if not self.canvas_limit_enabled:
+            return None
+        return {
+            'enabled': True,
+            'width': self.canvas_limit_width,
+            'height': self.canvas_limit_height
+        }
+    
+    def _update_render_stats(self, drawn, culled):
+        """Зберегти статистику кадру та повідомити, якщо вона змінилась"""
+        if drawn == self.last_drawn_count and culled == self.last_culled_count:
+            return
+        self.last_drawn_count = drawn
+        self.last_culled_count = culled
+        self.render_stats_changed.emit(drawn, culled)
+    
     # --- Методи для зміни налаштувань ---
     
     def set_color(self, color_bgr):
@@ -361,16 +561,42 @@ class CanvasWidget(QtWidgets.QWidget):
     # --- Редагування фігур ---
     
     def undo(self):
-        """Скасувати останню дію"""
-        self.shape_manager.undo()
-        self.autosave_manager.autosave()  # Зберігаємо після зміни
-        self.update()
+        """Скасувати останню дію
+        
+        Returns:
+            bool: чи було що скасовувати
+        """
+        return self._step_history(self.history.undo)
+    
+    def redo(self):
+        """Повторити скасовану дію"""
+        return self._step_history(self.history.redo)
+    
+    def _step_history(self, step):
+        """Виконати крок історії та оновити стан canvas"""
+        self.selection_manager.stop_dragging()
+        self.selection_manager.stop_curve_editing()
+        changed = step()
+        if changed:
+            self.autosave_manager.request_autosave()  # Зберігаємо після зміни
+            self.update()
+        return changed
+    
+    def delete_shapes(self, shape_ids):
+        """Видалити фігури за ID разом з їх членством у групах та виділенні
+        
+        Returns:
+            set: ID видалених фігур
+        """
+        return self.history.remove_shapes(shape_ids)
     
     def clear_all(self):
-        """Очистити всі фігури"""
-        self.shape_manager.clear_all()
+        """Очистити всі фігури (можна скасувати)"""
+        self.history.remove_shapes(self.shape_manager.get_shape_ids())
+        self.selection_manager.stop_dragging()
+        self.selection_manager.stop_curve_editing()
         self.selection_manager.clear_selection()
-        self.autosave_manager.autosave()  # Зберігаємо після зміни
+        self.autosave_manager.request_autosave()  # Зберігаємо після зміни
         self.update()
     
     def copy_selected(self):
@@ -379,49 +605,54 @@ class CanvasWidget(QtWidgets.QWidget):
     
     def paste(self):
         """Вставити фігури"""
-        new_indices = self.shape_manager.paste_shapes()
-        if new_indices:
-            self.selection_manager.selected_shapes = set(new_indices)
+        new_ids = self.shape_manager.paste_shapes()
+        if new_ids:
+            self.history.record_add(new_ids)
+            self.selection_manager.selected_shapes = set(new_ids)
             self.update()
     
     def flip_horizontal(self):
         """Відзеркалити по горизонталі"""
-        new_indices = self.shape_manager.flip_shapes_horizontal(
+        new_ids = self.shape_manager.flip_shapes_horizontal(
             self.selection_manager.selected_shapes
         )
-        if new_indices:
-            self.selection_manager.selected_shapes = set(new_indices)
+        if new_ids:
+            self.history.record_add(new_ids)
+            self.selection_manager.selected_shapes = set(new_ids)
             self.update()
     
     def flip_vertical(self):
         """Відзеркалити по вертикалі"""
-        new_indices = self.shape_manager.flip_shapes_vertical(
+        new_ids = self.shape_manager.flip_shapes_vertical(
             self.selection_manager.selected_shapes
         )
-        if new_indices:
-            self.selection_manager.selected_shapes = set(new_indices)
+        if new_ids:
+            self.history.record_add(new_ids)
+            self.selection_manager.selected_shapes = set(new_ids)
             self.update()
     
     def mirror_across_center_horizontal(self):
         """Дзеркалювати відносно вертикальної осі (через центр canvas)"""
         canvas_width = self.canvas_limit_width if self.canvas_limit_enabled else None
-        new_indices = self.shape_manager.mirror_shapes_across_center_horizontal(
+        new_ids = self.shape_manager.mirror_shapes_across_center_horizontal(
             self.selection_manager.selected_shapes,
             canvas_width
         )
-        if new_indices:
-            self.selection_manager.selected_shapes = set(new_indices)
+        if new_ids:
+            self.history.record_add(new_ids)
+            self.selection_manager.selected_shapes = set(new_ids)
             self.update()
     
     def mirror_across_center_vertical(self):
         """Дзеркалювати відносно горизонтальної осі (через центр canvas)"""
         canvas_height = self.canvas_limit_height if self.canvas_limit_enabled else None
-        new_indices = self.shape_manager.mirror_shapes_across_center_vertical(
+        new_ids = self.shape_manager.mirror_shapes_across_center_vertical(
             self.selection_manager.selected_shapes,
             canvas_height
         )
-        if new_indices:
-            self.selection_manager.selected_shapes = set(new_indices)
+        if new_ids:
+            self.history.record_add(new_ids)
+            self.selection_manager.selected_shapes = set(new_ids)
             self.update()
     
     # --- Zoom та Pan ---
@@ -434,7 +665,7 @@ class CanvasWidget(QtWidgets.QWidget):
     
     # --- Експорт та збереження ---
     
-    def generate_opencv_code(self, origin_mode='editor', canvas_width=None, canvas_height=None):
+    def generate_opencv_code(self, origin_mode='editor', canvas_width=None, canvas_height=None, cache_overlay=False):
         """Генерувати OpenCV код"""
         # Використовуємо межі полотна, якщо вони встановлені
         if self.canvas_limit_enabled:
@@ -448,7 +679,8 @@ class CanvasWidget(QtWidgets.QWidget):
             origin_mode,
             canvas_width,
             canvas_height,
-            groups
+            groups,
+            cache_overlay
         )
     
     def save_project(self, filename: str):
@@ -461,15 +693,28 @@ class CanvasWidget(QtWidgets.QWidget):
             canvas_limits
         )
     
-    def load_project(self, filename: str):
-        """Завантажити проект"""
-        shapes, groups_data, canvas_limits = ProjectIO.load_project(filename)
-        self.shape_manager.shapes = shapes
+    def load_project(self, filename: str, progress=None):
+        """Завантажити проект
+        
+        Фігури читаються потоково і одразу потрапляють у сховище ShapeManager.
+        
+        Args:
+            progress: callable(прочитано байт, розмір файлу) або None
+        
+        Returns:
+            dict: інші ключі верхнього рівня файлу (groups, canvas_limits...)
+        """
+        header = {}
+        self.shape_manager.set_shapes(ProjectIO.iter_project(filename, header, progress))
+        groups_data = header.get('groups')
+        canvas_limits = header.get('canvas_limits')
         self.selection_manager.clear_selection()
+        self.history.clear()
+        self.autosave_manager.reset_journal()
         
         # Завантажуємо групи
         if groups_data:
-            self.group_manager.from_dict(groups_data)
+            self.group_manager.from_dict(groups_data, self.shape_manager.shapes)
         else:
             self.group_manager.clear_all()
         
@@ -480,6 +725,7 @@ class CanvasWidget(QtWidgets.QWidget):
             self.canvas_limit_height = canvas_limits.get('height', 1080)
         
         self.update()
+        return header
     
     # --- Властивості для сумісності ---
     
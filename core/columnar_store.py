@@ -0,0 +1,668 @@
+"""
+Стовпцеве сховище фігур (struct-of-arrays) на NumPy
+
+Координати всіх фігур лежать в одному масиві (n, 8): кожен тип фігури має
+власну розкладку стовпців (LAYOUTS), невикористані стовпці - NaN. Колір,
+товщина, коди стилів та прапорці - окремі упаковані масиви. Порядок рядків
+збігається з порядком малювання, тому переміщення, дзеркалення та рамки
+для тисяч фігур - кілька векторних операцій.
+
+Для існуючого коду сховище поводиться як список фігур: індексація та
+ітерація повертають легкі ShapeView, а shape.coords - відображення на рядок.
+"""
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from shape import Shape
+
+
+# Розкладки координат: назва розкладки -> ключі coords у стовпцях 0..7
+LAYOUTS = {
+    'line': ('x1', 'y1', 'x2', 'y2'),
+    'arrow': ('x1', 'y1', 'x2', 'y2'),
+    'rectangle': ('x1', 'y1', 'x2', 'y2'),
+    'curve': ('x1', 'y1', 'x2', 'y2', 'cx', 'cy'),
+    'cubic': ('x1', 'y1', 'x2', 'y2', 'cx1', 'cy1', 'cx2', 'cy2'),
+    'circle': ('cx', 'cy', 'r'),
+    'ellipse': ('cx', 'cy', 'rx', 'ry', 'angle'),
+    'text': ('x', 'y'),
+    'point': ('x', 'y'),
+    'polygon': (),  # Вершини зберігаються окремим масивом на фігуру
+}
+LAYOUT_NAMES = tuple(LAYOUTS)
+LAYOUT_CODES = {name: code for code, name in enumerate(LAYOUT_NAMES)}
+COORD_COLUMNS = 8
+
+_X_KEYS = ('x', 'x1', 'x2', 'cx', 'cx1', 'cx2')
+_Y_KEYS = ('y', 'y1', 'y2', 'cy', 'cy1', 'cy2')
+
+# Маски стовпців з x та y координатами для кожної розкладки (для зсуву та дзеркалення)
+X_MASK = np.array([[i < len(keys) and keys[i] in _X_KEYS for i in range(COORD_COLUMNS)]
+                   for keys in LAYOUTS.values()])
+Y_MASK = np.array([[i < len(keys) and keys[i] in _Y_KEYS for i in range(COORD_COLUMNS)]
+                   for keys in LAYOUTS.values()])
+
+CUBIC = LAYOUT_CODES['cubic']
+POLYGON = LAYOUT_CODES['polygon']
+# Розкладки, рамка яких - мінімум/максимум по всіх точках
+_POINT_HULL = [LAYOUT_CODES[name] for name in ('line', 'arrow', 'rectangle', 'curve', 'cubic', 'point')]
+# При дзеркаленні тексту та точок координати обрізаються до цілих, як у ShapeManager
+_TRUNCATED = [LAYOUT_CODES['text'], LAYOUT_CODES['point']]
+
+_FILLED = 1
+_DYNAMIC = 2
+
+
+def layout_for(kind, coords):
+    """Код розкладки для типу фігури (кубічна крива - окрема розкладка)"""
+    if kind == 'curve' and 'cx1' in coords:
+        return CUBIC
+    try:
+        return LAYOUT_CODES[kind]
+    except KeyError:
+        raise ValueError(f"Unsupported shape kind: {kind}") from None
+
+
+class ColumnarShapeStore:
+    """Фігури сцени у стовпцевих масивах NumPy
+
+    Ключ фігури - її стабільний ID (призначає ShapeManager). Після видалень
+    відображення ID -> рядок перебудовується ліниво одним проходом.
+    """
+
+    def __init__(self):
+        self._size = 0
+        self._capacity = 0
+        self._coords = np.empty((0, COORD_COLUMNS))
+        self._layout = np.empty(0, np.uint8)
+        self._ids = np.empty(0, np.int64)
+        self._color = np.empty((0, 3), np.uint8)
+        self._thickness = np.empty(0, np.int32)
+        self._style = np.empty(0, np.uint8)
+        self._line_style = np.empty(0, np.uint8)
+        self._dash_length = np.empty(0, np.int32)
+        self._dot_length = np.empty(0, np.int32)
+        self._font_scale = np.empty(0, np.float64)
+        self._flags = np.empty(0, np.uint8)
+        self._text = []  # Рядок на фігуру ('' для не-тексту)
+        self._points = []  # Масив (m, 2) вершин для полігонів, інакше None
+
+        # Таблиця рядків для кодів style/line_style
+        self._strings = []
+        self._string_codes = {}
+
+        self._rows = {}
+        self._rows_dirty = False
+        self._sorter = None  # argsort(ids) для векторного пошуку рядків
+
+    # --- Поведінка списку ---
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += self._size
+        if not 0 <= pos < self._size:
+            raise IndexError("shape index out of range")
+        return ShapeView(self, int(self._ids[pos]))
+
+    def __iter__(self):
+        for shape_id in self._ids[:self._size].tolist():
+            yield ShapeView(self, shape_id)
+
+    def append(self, shape):
+        """Додати фігуру (Shape або будь-який об'єкт з тими ж атрибутами)"""
+        self.extend((shape,))
+
+    def extend(self, shapes):
+        """Додати фігури в кінець (порядок малювання зберігається)"""
+        if isinstance(shapes, ColumnarShapeStore):
+            self._extend_store(shapes)
+            return
+        shapes = list(shapes)
+        if not shapes:
+            return
+        start = self._size
+        self._reserve(start + len(shapes))
+
+        for row, shape in enumerate(shapes, start):
+            coords = shape.coords
+            layout = layout_for(shape.kind, coords)
+            self._layout[row] = layout
+            values = self._coords[row]
+            values.fill(np.nan)
+            for col, key in enumerate(LAYOUTS[LAYOUT_NAMES[layout]]):
+                if key in coords:
+                    values[col] = coords[key]
+            self._ids[row] = shape.id
+            self._color[row] = shape.color_bgr
+            self._thickness[row] = shape.thickness
+            self._style[row] = self.string_code(shape.style)
+            self._line_style[row] = self.string_code(getattr(shape, 'line_style', 'solid'))
+            self._dash_length[row] = getattr(shape, 'dash_length', 10)
+            self._dot_length[row] = getattr(shape, 'dot_length', 5)
+            self._font_scale[row] = getattr(shape, 'font_scale', 1.0)
+            self._flags[row] = ((_FILLED if getattr(shape, 'filled', False) else 0)
+                                | (_DYNAMIC if getattr(shape, 'dynamic', False) else 0))
+            self._text.append(getattr(shape, 'text', ''))
+            self._points.append(_points_array(coords.get('points')) if layout == POLYGON else None)
+            if not self._rows_dirty:
+                self._rows[shape.id] = row
+
+        self._size = start + len(shapes)
+        self._sorter = None
+
+    def insert(self, positions, shapes):
+        """Вставити фігури на задані позиції (відновлення після undo)
+
+        Args:
+            positions: кінцеві позиції фігур (у сховищі після вставки) за зростанням
+            shapes: фігури у тому ж порядку - список Shape або ColumnarShapeStore
+        """
+        if not len(positions):
+            return
+        start = self._size
+        self.extend(shapes)
+        if positions[0] == start:
+            return  # Усі фігури додані в кінець - порядок вже правильний
+
+        size = self._size
+        inserted = np.zeros(size, bool)
+        inserted[np.asarray(positions, np.intp)] = True
+        order = np.empty(size, np.intp)
+        order[inserted] = np.arange(start, size)
+        order[~inserted] = np.arange(start)
+        for name in self._ARRAYS:
+            arr = getattr(self, name)
+            arr[:size] = arr[:size][order]
+        order_list = order.tolist()
+        self._text = [self._text[row] for row in order_list]
+        self._points = [self._points[row] for row in order_list]
+        self._rows_dirty = True
+        self._sorter = None
+
+    def subset(self, shape_ids):
+        """Нове сховище з копіями рядків фігур (у порядку shape_ids)"""
+        rows = self.rows_of(shape_ids)
+        part = ColumnarShapeStore()
+        part._reserve(len(rows))
+        for name in self._ARRAYS:
+            getattr(part, name)[:len(rows)] = getattr(self, name)[rows]
+        for row in rows.tolist():
+            part._text.append(self._text[row])
+            points = self._points[row]
+            part._points.append(points.copy() if points is not None else None)
+        part._strings = list(self._strings)
+        part._string_codes = dict(self._string_codes)
+        part._size = len(rows)
+        part._rows_dirty = True
+        return part
+
+    def copy(self):
+        """Незалежна копія сховища (масиви копіюються цілком, без пошуку рядків)"""
+        part = ColumnarShapeStore()
+        part._reserve(self._size)
+        for name in self._ARRAYS:
+            getattr(part, name)[:self._size] = getattr(self, name)[:self._size]
+        part._text = list(self._text)
+        part._points = [points.copy() if points is not None else None for points in self._points]
+        part._strings = list(self._strings)
+        part._string_codes = dict(self._string_codes)
+        part._size = self._size
+        part._rows_dirty = True
+        return part
+
+    def _extend_store(self, other):
+        """Додати в кінець усі рядки іншого сховища (коди стилів перекодовуються)"""
+        count = other._size
+        if not count:
+            return
+        start = self._size
+        end = start + count
+        self._reserve(end)
+        for name in self._ARRAYS:
+            getattr(self, name)[start:end] = getattr(other, name)[:count]
+        codes = np.array([self.string_code(value) for value in other._strings], np.uint8)
+        self._style[start:end] = codes[other._style[:count]]
+        self._line_style[start:end] = codes[other._line_style[:count]]
+        self._text.extend(other._text)
+        self._points.extend(other._points)
+        if not self._rows_dirty:
+            self._rows.update(zip(other._ids[:count].tolist(), range(start, end)))
+        self._size = end
+        self._sorter = None
+
+    def pop(self):
+        """Видалити останню фігуру
+
+        Returns:
+            Shape: від'єднана копія видаленої фігури
+        """
+        if not self._size:
+            raise IndexError("pop from empty store")
+        shape = self.to_shape(self._size - 1)
+        self._size -= 1
+        self._text.pop()
+        self._points.pop()
+        self._rows.pop(shape.id, None)
+        self._sorter = None
+        return shape
+
+    def clear(self):
+        """Видалити всі фігури (ємність масивів зберігається)"""
+        self._size = 0
+        self._text.clear()
+        self._points.clear()
+        self._rows.clear()
+        self._rows_dirty = False
+        self._sorter = None
+
+    def remove_ids(self, shape_ids):
+        """Видалити фігури за ID одним ущільненням масивів"""
+        n = self._size
+        keep = ~np.isin(self._ids[:n], np.fromiter(shape_ids, np.int64))
+        kept = int(keep.sum())
+        if kept == n:
+            return
+        for name in self._ARRAYS:
+            arr = getattr(self, name)
+            arr[:kept] = arr[:n][keep]
+        keep_list = keep.tolist()
+        self._text = [t for t, k in zip(self._text, keep_list) if k]
+        self._points = [p for p, k in zip(self._points, keep_list) if k]
+        self._size = kept
+        self._rows_dirty = True
+        self._sorter = None
+
+    _ARRAYS = ('_coords', '_layout', '_ids', '_color', '_thickness', '_style', '_line_style',
+               '_dash_length', '_dot_length', '_font_scale', '_flags')
+
+    def _reserve(self, size):
+        """Збільшити ємність масивів (подвоєнням) до size рядків"""
+        if size <= self._capacity:
+            return
+        capacity = max(size, self._capacity * 2, 64)
+        for name in self._ARRAYS:
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+        self._capacity = capacity
+
+    # --- Доступ за ID ---
+
+    def ids(self):
+        """ID фігур у порядку малювання (копія)"""
+        return self._ids[:self._size].copy()
+
+    def row_of(self, shape_id):
+        """Рядок фігури за ID (KeyError, якщо її немає)"""
+        if self._rows_dirty:
+            self._rows = dict(zip(self._ids[:self._size].tolist(), range(self._size)))
+            self._rows_dirty = False
+        return self._rows[shape_id]
+
+    def rows_of(self, shape_ids):
+        """Масив рядків для ID (векторний пошук по відсортованих ID)"""
+        ids = self._ids[:self._size]
+        if self._sorter is None:
+            self._sorter = np.argsort(ids, kind='stable')
+        query = np.fromiter(shape_ids, np.int64)
+        if not len(query):
+            return np.empty(0, np.intp)
+        if not len(ids):
+            raise KeyError(int(query[0]))
+        found = np.searchsorted(ids, query, sorter=self._sorter)
+        rows = self._sorter[np.minimum(found, len(ids) - 1)]
+        missing = ids[rows] != query
+        if missing.any():
+            raise KeyError(int(query[missing][0]))
+        return rows
+
+    def string_code(self, value):
+        """Код рядка в таблиці стилів (додає новий рядок за потреби)"""
+        code = self._string_codes.get(value)
+        if code is None:
+            if len(self._strings) > np.iinfo(np.uint8).max:
+                raise ValueError("Too many distinct style names")
+            code = self._string_codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def to_shape(self, row):
+        """Створити звичайний Shape з рядка сховища"""
+        view = ShapeView(self, int(self._ids[row]))
+        shape = Shape(
+            view.kind,
+            color_bgr=view.color_bgr,
+            thickness=view.thickness,
+            style=view.style,
+            line_style=view.line_style,
+            text=view.text,
+            font_scale=view.font_scale,
+            filled=view.filled,
+            dash_length=view.dash_length,
+            dot_length=view.dot_length,
+            dynamic=view.dynamic,
+            **dict(view.coords)
+        )
+        shape.id = view.id
+        return shape
+
+    # --- Групові операції ---
+
+    def translate(self, shape_ids, dx, dy):
+        """Зсунути фігури на (dx, dy)"""
+        rows = self.rows_of(shape_ids)
+        layouts = self._layout[rows]
+        self._coords[rows] += X_MASK[layouts] * dx + Y_MASK[layouts] * dy
+        for row in rows[layouts == POLYGON].tolist():
+            if self._points[row] is not None:
+                self._points[row] += (dx, dy)
+
+    def mirror(self, shape_ids, axis, horizontal=True):
+        """Відзеркалити фігури відносно осі
+
+        Args:
+            axis: x вертикальної осі (horizontal=True) або y горизонтальної
+        """
+        rows = self.rows_of(shape_ids)
+        layouts = self._layout[rows]
+        block = self._coords[rows]
+        mirrored = 2.0 * axis - block
+        truncated = np.isin(layouts, _TRUNCATED)
+        mirrored[truncated] = np.trunc(mirrored[truncated])
+        mask = (X_MASK if horizontal else Y_MASK)[layouts]
+        self._coords[rows] = np.where(mask, mirrored, block)
+
+        col = 0 if horizontal else 1
+        for row in rows[layouts == POLYGON].tolist():
+            points = self._points[row]
+            if points is not None:
+                points[:, col] = 2.0 * axis - points[:, col]
+
+    def duplicate(self, shape_ids, new_ids):
+        """Додати в кінець копії фігур з новими ID"""
+        rows = self.rows_of(shape_ids)
+        start = self._size
+        end = start + len(rows)
+        self._reserve(end)
+        for name in self._ARRAYS:
+            arr = getattr(self, name)
+            arr[start:end] = arr[rows]
+        self._ids[start:end] = new_ids
+        for row in rows.tolist():
+            self._text.append(self._text[row])
+            points = self._points[row]
+            self._points.append(points.copy() if points is not None else None)
+        if not self._rows_dirty:
+            self._rows.update(zip(list(new_ids), range(start, end)))
+        self._size = end
+        self._sorter = None
+
+    def bboxes(self, shape_ids=None):
+        """Рамки фігур, як utils.geometry.get_shape_bbox
+
+        Returns:
+            numpy.ndarray (n, 4): min_x, min_y, max_x, max_y; NaN - рамки немає
+        """
+        rows = np.arange(self._size) if shape_ids is None else self.rows_of(shape_ids)
+        coords = self._coords[rows]
+        layouts = self._layout[rows]
+        out = np.full((len(rows), 4), np.nan)
+
+        hull = np.isin(layouts, _POINT_HULL)
+        if hull.any():
+            block = coords[hull]
+            xm = X_MASK[layouts[hull]]
+            ym = Y_MASK[layouts[hull]]
+            out[hull] = np.stack((np.where(xm, block, np.inf).min(axis=1),
+                                  np.where(ym, block, np.inf).min(axis=1),
+                                  np.where(xm, block, -np.inf).max(axis=1),
+                                  np.where(ym, block, -np.inf).max(axis=1)), axis=1)
+
+        sel = layouts == LAYOUT_CODES['circle']
+        if sel.any():
+            cx, cy, r = coords[sel, 0], coords[sel, 1], coords[sel, 2]
+            out[sel] = np.stack((cx - r, cy - r, cx + r, cy + r), axis=1)
+
+        sel = layouts == LAYOUT_CODES['ellipse']
+        if sel.any():
+            cx, cy, rx, ry, angle = coords[sel, :5].T
+            # Повернутий еліпс - беремо описане коло
+            rotated = np.nan_to_num(angle) != 0
+            big = np.maximum(rx, ry)
+            rx = np.where(rotated, big, rx)
+            ry = np.where(rotated, big, ry)
+            out[sel] = np.stack((cx - rx, cy - ry, cx + rx, cy + ry), axis=1)
+
+        sel = np.flatnonzero(layouts == LAYOUT_CODES['text'])
+        if len(sel):
+            lengths = np.array([len(self._text[row]) for row in rows[sel].tolist()])
+            scale = self._font_scale[rows[sel]]
+            x, y = coords[sel, 0], coords[sel, 1]
+            out[sel] = np.stack((x, y - 20 * scale, x + lengths * 10 * scale, y), axis=1)
+
+        for i in np.flatnonzero(layouts == POLYGON).tolist():
+            points = self._points[rows[i]]
+            if points is not None and len(points):
+                out[i, :2] = points.min(axis=0)
+                out[i, 2:] = points.max(axis=0)
+
+        return out
+
+
+def _points_array(points):
+    """Вершини полігону як масив (m, 2) float64 або None"""
+    if points is None:
+        return None
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+
+def _number(value):
+    """Значення координати як Python-число: цілі залишаються int (10, а не 10.0)"""
+    return int(value) if value.is_integer() else value
+
+
+class _Column:
+    """Атрибут ShapeView, що читає/пише один стовпець сховища"""
+
+    def __init__(self, column, cast):
+        self.column = column
+        self.cast = cast
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        store = view._store
+        return self.cast(getattr(store, self.column)[store.row_of(view._id)])
+
+    def __set__(self, view, value):
+        store = view._store
+        getattr(store, self.column)[store.row_of(view._id)] = value
+
+
+class _Flag:
+    """Булевий атрибут ShapeView у бітовому полі прапорців"""
+
+    def __init__(self, bit):
+        self.bit = bit
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        store = view._store
+        return bool(store._flags[store.row_of(view._id)] & self.bit)
+
+    def __set__(self, view, value):
+        store = view._store
+        row = store.row_of(view._id)
+        if value:
+            store._flags[row] |= self.bit
+        else:
+            store._flags[row] &= ~self.bit & 0xFF
+
+
+class _StyleName:
+    """Рядковий атрибут ShapeView, закодований у таблиці рядків сховища"""
+
+    def __init__(self, column):
+        self.column = column
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        store = view._store
+        return store._strings[getattr(store, self.column)[store.row_of(view._id)]]
+
+    def __set__(self, view, value):
+        store = view._store
+        getattr(store, self.column)[store.row_of(view._id)] = store.string_code(value)
+
+
+class ShapeView:
+    """Легке представлення фігури зі стовпцевого сховища
+
+    Має ті самі атрибути, що й Shape; зміни пишуться прямо в масиви.
+    """
+
+    __slots__ = ('_store', '_id')
+
+    thickness = _Column('_thickness', int)
+    dash_length = _Column('_dash_length', int)
+    dot_length = _Column('_dot_length', int)
+    font_scale = _Column('_font_scale', float)
+    style = _StyleName('_style')
+    line_style = _StyleName('_line_style')
+    filled = _Flag(_FILLED)
+    dynamic = _Flag(_DYNAMIC)
+
+    def __init__(self, store, shape_id):
+        self._store = store
+        self._id = shape_id
+
+    def __eq__(self, other):
+        return isinstance(other, ShapeView) and other._store is self._store and other._id == self._id
+
+    def __hash__(self):
+        return hash((id(self._store), self._id))
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def _row(self):
+        return self._store.row_of(self._id)
+
+    @property
+    def kind(self):
+        name = LAYOUT_NAMES[self._store._layout[self._row]]
+        return 'curve' if name == 'cubic' else name
+
+    @kind.setter
+    def kind(self, value):
+        # Значення спільних стовпців (x1, y1, x2, y2) зберігаються
+        store = self._store
+        store._layout[self._row] = layout_for(value, ())
+
+    @property
+    def color_bgr(self):
+        return tuple(self._store._color[self._row].tolist())
+
+    @color_bgr.setter
+    def color_bgr(self, value):
+        self._store._color[self._row] = value
+
+    @property
+    def text(self):
+        return self._store._text[self._row]
+
+    @text.setter
+    def text(self, value):
+        self._store._text[self._row] = value
+
+    @property
+    def coords(self):
+        return CoordsView(self._store, self._id)
+
+    @coords.setter
+    def coords(self, values):
+        store = self._store
+        row = self._row
+        layout = layout_for(self.kind, values)
+        store._layout[row] = layout
+        store._coords[row] = np.nan
+        for col, key in enumerate(LAYOUTS[LAYOUT_NAMES[layout]]):
+            if key in values:
+                store._coords[row, col] = values[key]
+        store._points[row] = _points_array(values.get('points')) if layout == POLYGON else None
+
+
+class CoordsView(MutableMapping):
+    """Координати фігури зі сховища як словник (відсутні ключі - NaN)"""
+
+    __slots__ = ('_store', '_id')
+
+    def __init__(self, store, shape_id):
+        self._store = store
+        self._id = shape_id
+
+    def _keys(self):
+        store = self._store
+        row = store.row_of(self._id)
+        layout = store._layout[row]
+        if layout == POLYGON:
+            return row, ('points',) if store._points[row] is not None else ()
+        values = store._coords[row]
+        keys = LAYOUTS[LAYOUT_NAMES[layout]]
+        return row, tuple(key for col, key in enumerate(keys) if not np.isnan(values[col]))
+
+    def __getitem__(self, key):
+        store = self._store
+        row = store.row_of(self._id)
+        layout = store._layout[row]
+        if layout == POLYGON:
+            points = store._points[row] if key == 'points' else None
+            if points is None:
+                raise KeyError(key)
+            return [tuple(_number(v) for v in p) for p in points.tolist()]
+        keys = LAYOUTS[LAYOUT_NAMES[layout]]
+        if key in keys:
+            value = store._coords[row, keys.index(key)]
+            if not np.isnan(value):
+                return _number(float(value))
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        store = self._store
+        row = store.row_of(self._id)
+        layout = store._layout[row]
+        if layout == POLYGON and key == 'points':
+            store._points[row] = _points_array(value)
+            return
+        keys = LAYOUTS[LAYOUT_NAMES[layout]]
+        if key not in keys:
+            raise KeyError(f"'{key}' is not a coordinate of {LAYOUT_NAMES[layout]}")
+        store._coords[row, keys.index(key)] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        store = self._store
+        row = store.row_of(self._id)
+        if key == 'points':
+            store._points[row] = None
+        else:
+            store._coords[row, LAYOUTS[LAYOUT_NAMES[store._layout[row]]].index(key)] = np.nan
+
+    def __contains__(self, key):
+        return key in self._keys()[1]
+
+    def __iter__(self):
+        return iter(self._keys()[1])
+
+    def __len__(self):
+        return len(self._keys()[1])
@@ -6,51 +6,57 @@
 class ShapeGroup:
     """Клас для представлення групи фігур"""
     
-    def __init__(self, name, shape_indices=None, color=None):
+    def __init__(self, name, shape_ids=None, color=None):
         """
         Args:
             name: назва групи
-            shape_indices: список індексів фігур в групі
+            shape_ids: список ID фігур в групі
             color: колір для відображення групи (опціонально)
         """
         self.name = name
-        self.shape_indices = set(shape_indices) if shape_indices else set()
+        self.shape_ids = set(shape_ids) if shape_ids else set()
         self.color = color or (100, 150, 255)  # За замовчуванням синій
     
-    def add_shape(self, idx):
+    def add_shape(self, shape_id):
         """Додати фігуру до групи"""
-        self.shape_indices.add(idx)
+        self.shape_ids.add(shape_id)
     
-    def remove_shape(self, idx):
+    def remove_shape(self, shape_id):
         """Видалити фігуру з групи"""
-        self.shape_indices.discard(idx)
+        self.shape_ids.discard(shape_id)
     
-    def has_shape(self, idx):
+    def has_shape(self, shape_id):
         """Чи містить група цю фігуру"""
-        return idx in self.shape_indices
+        return shape_id in self.shape_ids
     
     def clear(self):
         """Очистити групу"""
-        self.shape_indices.clear()
+        self.shape_ids.clear()
     
     def is_empty(self):
         """Чи пуста група"""
-        return len(self.shape_indices) == 0
+        return len(self.shape_ids) == 0
 
 
 class GroupManager:
-    """Менеджер для управління групами фігур"""
+    """Менеджер для управління групами фігур
+    
+    Групи зберігають стабільні ID фігур, тому видалення фігур не зсуває
+    членство інших фігур. У файлі проекту групи записуються позиціями
+    фігур у списку (ключ 'shape_indices').
+    """
     
     def __init__(self):
         self.groups = []  # Список груп
+        self.version = 0  # Збільшується при кожній зміні груп
     
-    def create_group(self, name, shape_indices=None):
+    def create_group(self, name, shape_ids=None):
         """
         Створити нову групу
         
         Args:
             name: назва групи
-            shape_indices: список індексів фігур
+            shape_ids: список ID фігур
         
         Returns:
             ShapeGroup: створена група
@@ -64,13 +70,15 @@ class GroupManager:
                 i += 1
             name = f"{base_name}_{i}"
         
-        group = ShapeGroup(name, shape_indices)
+        group = ShapeGroup(name, shape_ids)
         self.groups.append(group)
+        self.version += 1
         return group
     
     def delete_group(self, group_name):
         """Видалити групу за назвою"""
         self.groups = [g for g in self.groups if g.name != group_name]
+        self.version += 1
     
     def get_group_by_name(self, name):
         """Отримати групу за назвою"""
@@ -79,107 +87,115 @@ class GroupManager:
                 return group
         return None
     
-    def get_groups_for_shape(self, shape_idx):
+    def get_groups_for_shape(self, shape_id):
         """Отримати всі групи, які містять цю фігуру"""
         result = []
         for group in self.groups:
-            if group.has_shape(shape_idx):
+            if group.has_shape(shape_id):
                 result.append(group)
         return result
     
-    def add_shapes_to_group(self, group_name, shape_indices):
+    def add_shapes_to_group(self, group_name, shape_ids):
         """Додати фігури до групи"""
         group = self.get_group_by_name(group_name)
         if group:
-            for idx in shape_indices:
-                group.add_shape(idx)
+            group.shape_ids.update(shape_ids)
+            self.version += 1
     
-    def remove_shapes_from_group(self, group_name, shape_indices):
+    def remove_shapes_from_group(self, group_name, shape_ids):
         """Видалити фігури з групи"""
         group = self.get_group_by_name(group_name)
         if group:
-            for idx in shape_indices:
-                group.remove_shape(idx)
+            group.shape_ids.difference_update(shape_ids)
+            self.version += 1
     
-    def remove_shape_from_all_groups(self, shape_idx):
+    def remove_shape_from_all_groups(self, shape_id):
         """Видалити фігуру з усіх груп"""
         for group in self.groups:
-            group.remove_shape(shape_idx)
+            group.remove_shape(shape_id)
+        self.version += 1
     
-    def update_indices_after_deletion(self, deleted_idx):
-        """
-        Оновити індекси після видалення фігури
+    def remove_shapes_from_all_groups(self, shape_ids):
+        """Видалити фігури з усіх груп (після видалення фігур)
         
         Args:
-            deleted_idx: індекс видаленої фігури
+            shape_ids: ID видалених фігур; ID решти фігур не змінюються,
+                тому оновлення - O(кількість видалених) на групу
         """
+        shape_ids = set(shape_ids)
         for group in self.groups:
-            # Видаляємо видалену фігуру
-            group.remove_shape(deleted_idx)
-            
-            # Зменшуємо індекси фігур що були після видаленої
-            new_indices = set()
-            for idx in group.shape_indices:
-                if idx > deleted_idx:
-                    new_indices.add(idx - 1)
-                else:
-                    new_indices.add(idx)
-            group.shape_indices = new_indices
+            group.shape_ids.difference_update(shape_ids)
+        self.version += 1
     
     def get_all_group_names(self):
         """Отримати список всіх назв груп"""
         return [g.name for g in self.groups]
     
-    def get_ungrouped_shapes(self, total_shapes):
+    def get_ungrouped_shapes(self, shape_ids):
         """
-        Отримати індекси фігур, які не в жодній групі
+        Отримати ID фігур, які не в жодній групі
         
         Args:
-            total_shapes: загальна кількість фігур
+            shape_ids: ID всіх фігур
         
         Returns:
-            set: індекси фігур без груп
+            set: ID фігур без груп
         """
         grouped = set()
         for group in self.groups:
-            grouped.update(group.shape_indices)
+            grouped.update(group.shape_ids)
         
-        all_shapes = set(range(total_shapes))
-        return all_shapes - grouped
+        return set(shape_ids) - grouped
     
     def rename_group(self, old_name, new_name):
         """Перейменувати групу"""
         group = self.get_group_by_name(old_name)
         if group and not self.get_group_by_name(new_name):
             group.name = new_name
+            self.version += 1
             return True
         return False
     
     def clear_all(self):
         """Очистити всі групи"""
         self.groups.clear()
+        self.version += 1
     
-    def to_dict(self):
-        """Конвертувати в словник для збереження"""
+    def to_dict(self, shapes):
+        """Конвертувати в словник для збереження
+        
+        Args:
+            shapes: список фігур - ID членів групи записуються їх позиціями
+        """
+        # Без груп позиції не потрібні - не проходимо весь список фігур
+        positions = {shape.id: pos for pos, shape in enumerate(shapes)} if self.groups else {}
         return {
             'groups': [
                 {
                     'name': g.name,
-                    'shape_indices': list(g.shape_indices),
+                    'shape_indices': sorted(positions[shape_id] for shape_id in g.shape_ids
+                                            if shape_id in positions),
                     'color': g.color
                 }
                 for g in self.groups
             ]
         }
     
-    def from_dict(self, data):
-        """Завантажити з словника"""
+    def from_dict(self, data, shapes):
+        """Завантажити з словника
+        
+        Args:
+            data: словник з to_dict
+            shapes: завантажені фігури з уже призначеними ID
+        """
         self.groups.clear()
         for g_data in data.get('groups', []):
+            shape_ids = [shapes[pos].id for pos in g_data.get('shape_indices', [])
+                         if 0 <= pos < len(shapes)]
             group = ShapeGroup(
                 g_data['name'],
-                g_data.get('shape_indices', []),
+                shape_ids,
                 tuple(g_data.get('color', (100, 150, 255)))
             )
             self.groups.append(group)
-
+        self.version += 1
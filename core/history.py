@@ -0,0 +1,451 @@
+"""
+Історія змін (undo/redo) на командах з компактними різницями
+
+Кожна команда зберігає лише те, що змінилось: ID фігур і зсув для
+перетягування, старі значення властивості, стан однієї фігури при
+редагуванні кривої. Вартість undo/redo - O(змінених фігур), знімок усієї
+сцени не робиться ніколи.
+"""
+import time
+
+
+# Оцінка пам'яті для ліміту історії (байти)
+_COMMAND_BYTES = 200  # Сам об'єкт команди
+_ID_BYTES = 40  # ID у кортежі/словнику
+_SHAPE_BYTES = 400  # Від'єднана копія фігури (Shape з __slots__ та координатами)
+
+
+class Command:
+    """Базова команда історії: вже виконана зміна, яку можна скасувати"""
+
+    def undo(self, history):
+        raise NotImplementedError
+
+    def redo(self, history):
+        raise NotImplementedError
+
+    def nbytes(self):
+        """Оцінка пам'яті, яку тримає команда"""
+        return _COMMAND_BYTES
+
+    def merge(self, other):
+        """Поглинути наступну команду (злиття послідовних змін)
+
+        Returns:
+            bool: True, якщо other злита в цю команду
+        """
+        return False
+
+    def changes(self):
+        """Що змінює команда (в обидва боки) - для журналу автозбереження
+
+        Returns:
+            tuple: (ID фігур, назви груп)
+        """
+        return (), ()
+
+
+class AddShapesCommand(Command):
+    """Додавання фігур (малювання, вставка, відзеркалені копії)"""
+
+    def __init__(self, shape_ids):
+        self.shape_ids = tuple(shape_ids)
+        self.removed = None  # (позиції, фігури) після undo - для redo
+
+    def undo(self, history):
+        self.removed = history.detach_shapes(self.shape_ids)
+        history.remove_shapes_silently(self.shape_ids)
+
+    def redo(self, history):
+        history.shape_manager.insert_shapes(*self.removed)
+        self.removed = None
+
+    def nbytes(self):
+        size = _COMMAND_BYTES + len(self.shape_ids) * _ID_BYTES
+        if self.removed:
+            size += len(self.removed[0]) * _SHAPE_BYTES
+        return size
+
+    def changes(self):
+        return self.shape_ids, ()
+
+
+class RemoveShapesCommand(Command):
+    """Видалення фігур разом з їх позиціями та членством у групах"""
+
+    def __init__(self, shape_ids, removed, memberships):
+        """
+        Args:
+            shape_ids: ID видалених фігур у порядку малювання
+            removed: (позиції, фігури) до видалення - з History.detach_shapes
+            memberships: {назва групи: ID видалених фігур у ній}
+        """
+        self.shape_ids = tuple(shape_ids)
+        self.removed = removed
+        self.memberships = memberships
+
+    def undo(self, history):
+        history.shape_manager.insert_shapes(*self.removed)
+        for name, shape_ids in self.memberships.items():
+            history.group_manager.add_shapes_to_group(name, shape_ids)
+
+    def redo(self, history):
+        # Фігури могли змінитись після undo - знімаємо їх стан заново
+        self.removed = history.detach_shapes(self.shape_ids)
+        history.remove_shapes_silently(self.shape_ids)
+
+    def nbytes(self):
+        members = sum(len(ids) for ids in self.memberships.values())
+        return (_COMMAND_BYTES + len(self.shape_ids) * (_SHAPE_BYTES + _ID_BYTES)
+                + members * _ID_BYTES)
+
+    def changes(self):
+        return self.shape_ids, tuple(self.memberships)
+
+
+class TranslateCommand(Command):
+    """Переміщення фігур: зберігається лише зсув"""
+
+    def __init__(self, shape_ids, dx, dy):
+        self.shape_ids = tuple(sorted(shape_ids))
+        self.dx = dx
+        self.dy = dy
+
+    def undo(self, history):
+        history.shape_manager.translate_shapes(self.shape_ids, -self.dx, -self.dy)
+
+    def redo(self, history):
+        history.shape_manager.translate_shapes(self.shape_ids, self.dx, self.dy)
+
+    def nbytes(self):
+        return _COMMAND_BYTES + len(self.shape_ids) * _ID_BYTES
+
+    def changes(self):
+        return self.shape_ids, ()
+
+
+class PropertyCommand(Command):
+    """Зміна однієї властивості (колір, товщина, стиль...) у кількох фігур"""
+
+    def __init__(self, attr, old_values, new_value):
+        """
+        Args:
+            attr: назва атрибута Shape ('color_bgr', 'thickness', ...)
+            old_values: {ID: попереднє значення}
+            new_value: нове значення для всіх фігур
+        """
+        self.attr = attr
+        self.old_values = old_values
+        self.new_value = new_value
+
+    def undo(self, history):
+        for shape_id, value in self.old_values.items():
+            history.set_shape_attr(shape_id, self.attr, value)
+        history.shape_manager.mark_shapes_changed(self.old_values)
+
+    def redo(self, history):
+        for shape_id in self.old_values:
+            history.set_shape_attr(shape_id, self.attr, self.new_value)
+        history.shape_manager.mark_shapes_changed(self.old_values)
+
+    def nbytes(self):
+        return _COMMAND_BYTES + len(self.old_values) * _ID_BYTES * 2
+
+    def merge(self, other):
+        # Послідовні зміни того ж атрибута тих самих фігур (прокрутка спінбоксу)
+        if (not isinstance(other, PropertyCommand) or other.attr != self.attr
+                or other.old_values.keys() != self.old_values.keys()):
+            return False
+        self.new_value = other.new_value
+        return True
+
+    def changes(self):
+        return tuple(self.old_values), ()
+
+
+class ShapeStateCommand(Command):
+    """Зміна типу та координат однієї фігури (редагування кривої)"""
+
+    def __init__(self, shape_id, before, after):
+        """
+        Args:
+            before, after: (kind, dict координат)
+        """
+        self.shape_id = shape_id
+        self.before = before
+        self.after = after
+
+    def _apply(self, history, state):
+        shape = history.shape_manager.get_shape(self.shape_id)
+        if shape is None:
+            return
+        shape.kind = state[0]
+        shape.coords = dict(state[1])
+        history.shape_manager.mark_shapes_changed((self.shape_id,))
+
+    def undo(self, history):
+        self._apply(history, self.before)
+
+    def redo(self, history):
+        self._apply(history, self.after)
+
+    def changes(self):
+        return (self.shape_id,), ()
+
+
+class GroupCommand(Command):
+    """Зміна однієї групи: створення, видалення, перейменування, склад"""
+
+    def __init__(self, before, after):
+        """
+        Args:
+            before, after: (позиція, назва, frozenset ID, колір) або None
+        """
+        self.before = before
+        self.after = after
+
+    def _switch(self, history, current, target):
+        groups = history.group_manager
+        if current is not None:
+            groups.delete_group(current[1])
+        if target is not None:
+            index, name, shape_ids, color = target
+            group = groups.create_group(name, shape_ids)
+            group.color = color
+            groups.groups.remove(group)
+            groups.groups.insert(min(index, len(groups.groups)), group)
+
+    def undo(self, history):
+        self._switch(history, self.after, self.before)
+
+    def redo(self, history):
+        self._switch(history, self.before, self.after)
+
+    def nbytes(self):
+        size = _COMMAND_BYTES
+        for state in (self.before, self.after):
+            if state is not None:
+                size += len(state[2]) * _ID_BYTES
+        return size
+
+    def changes(self):
+        names = {state[1] for state in (self.before, self.after) if state is not None}
+        return (), tuple(names)
+
+
+class History:
+    """Журнал команд з обмеженням пам'яті
+
+    Команди, що перевищують ліміт, видаляються з найстаріших (остання
+    команда зберігається завжди). Нова команда очищає стек redo.
+    Зливаються лише команди, які викликач позначив ключем злиття як
+    продовження тієї ж взаємодії (прокрутка спінбоксу): однаковий ключ
+    поспіль, не пізніше coalesce_interval секунд від першої команди серії.
+    Після undo/redo серія завжди починається заново.
+    """
+
+    def __init__(self, shape_manager, group_manager, selection_manager=None,
+                 memory_limit=64 * 1024 * 1024, coalesce_interval=1.0):
+        self.shape_manager = shape_manager
+        self.group_manager = group_manager
+        self.selection_manager = selection_manager
+        self.memory_limit = memory_limit
+        self.coalesce_interval = coalesce_interval
+
+        self._undo = []  # [(команда, час першої команди серії)]
+        self._redo = []
+        self._bytes = 0  # Оцінка пам'яті стеку undo
+        self._coalesce_key = None  # Ключ серії, до якої можна долити верхню команду
+
+        # callable(команда) після кожної зміни (push/undo/redo) - журнал автозбереження
+        self.on_change = None
+
+    # --- Стек ---
+
+    def push(self, command, coalesce_key=None):
+        """Додати вже виконану команду
+
+        Args:
+            command: виконана команда
+            coalesce_key: ключ взаємодії; команда зливається з попередньою
+                лише при тому ж ключі (None - ніколи не зливається)
+        """
+        now = time.monotonic()
+        self._redo.clear()
+        self._notify(command)
+
+        if coalesce_key is not None and coalesce_key == self._coalesce_key and self._undo:
+            last, stamp = self._undo[-1]
+            if now - stamp <= self.coalesce_interval:
+                before = last.nbytes()
+                if last.merge(command):
+                    # Час серії не зсувається - рахується від першої команди
+                    self._bytes += last.nbytes() - before
+                    return
+
+        self._coalesce_key = coalesce_key
+        self._undo.append((command, now))
+        self._bytes += command.nbytes()
+        self._trim()
+
+    def _trim(self):
+        """Видалити найстаріші команди понад ліміт пам'яті"""
+        drop = 0
+        while self._bytes > self.memory_limit and drop < len(self._undo) - 1:
+            self._bytes -= self._undo[drop][0].nbytes()
+            drop += 1
+        if drop:
+            del self._undo[:drop]
+
+    def undo(self):
+        """Скасувати останню команду
+
+        Returns:
+            bool: чи було що скасовувати
+        """
+        if not self._undo:
+            return False
+        command, _ = self._undo.pop()
+        self._coalesce_key = None
+        self._bytes -= command.nbytes()
+        command.undo(self)
+        self._redo.append(command)
+        self._notify(command)
+        return True
+
+    def redo(self):
+        """Повторити останню скасовану команду"""
+        if not self._redo:
+            return False
+        command = self._redo.pop()
+        command.redo(self)
+        self._notify(command)
+        # Повторена команда не зливається ні з попередньою, ні з наступною
+        self._coalesce_key = None
+        self._undo.append((command, time.monotonic()))
+        self._bytes += command.nbytes()
+        self._trim()
+        return True
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        """Очистити історію (новий або завантажений проект)"""
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+        self._coalesce_key = None
+
+    def memory_usage(self):
+        """Оцінка пам'яті стеку undo в байтах"""
+        return self._bytes
+
+    def _notify(self, command):
+        if self.on_change is not None:
+            self.on_change(command)
+
+    # --- Запис змін ---
+
+    def record_add(self, shape_ids):
+        """Записати додані фігури"""
+        if shape_ids:
+            self.push(AddShapesCommand(shape_ids))
+
+    def remove_shapes(self, shape_ids):
+        """Видалити фігури з записом в історію
+
+        Returns:
+            set: ID видалених фігур
+        """
+        shape_ids = self.shape_manager.sort_ids(set(shape_ids))
+        if not shape_ids:
+            return set()
+        removed = self.detach_shapes(shape_ids)
+
+        id_set = set(shape_ids)
+        memberships = {}
+        for group in self.group_manager.groups:
+            members = group.shape_ids & id_set
+            if members:
+                memberships[group.name] = frozenset(members)
+
+        result = self.remove_shapes_silently(shape_ids)
+        self.push(RemoveShapesCommand(shape_ids, removed, memberships))
+        return result
+
+    def record_translate(self, shape_ids, dx, dy):
+        """Записати переміщення фігур на (dx, dy)"""
+        if shape_ids and (dx or dy):
+            self.push(TranslateCommand(shape_ids, dx, dy))
+
+    def record_property(self, attr, old_values, new_value, continuous=False):
+        """Записати зміну атрибута (old_values - {ID: старе значення})
+
+        continuous - зміна є кроком тієї ж взаємодії (прокрутка спінбоксу):
+        послідовні кроки для того ж атрибута тих самих фігур зливаються.
+        """
+        if old_values:
+            key = ('property', attr, frozenset(old_values)) if continuous else None
+            self.push(PropertyCommand(attr, old_values, new_value), key)
+
+    @staticmethod
+    def shape_state(shape):
+        """Стан фігури для ShapeStateCommand"""
+        return shape.kind, dict(shape.coords)
+
+    def record_shape_state(self, shape_id, before):
+        """Записати зміну типу/координат фігури відносно стану before"""
+        shape = self.shape_manager.get_shape(shape_id)
+        if shape is None:
+            return
+        after = self.shape_state(shape)
+        if after != before:
+            self.push(ShapeStateCommand(shape_id, before, after))
+
+    def snapshot_group(self, name):
+        """Стан групи для GroupCommand (None, якщо групи немає)"""
+        for index, group in enumerate(self.group_manager.groups):
+            if group.name == name:
+                return index, group.name, frozenset(group.shape_ids), group.color
+        return None
+
+    def record_group_change(self, before, name_after):
+        """Записати зміну групи: before - snapshot_group до зміни"""
+        after = self.snapshot_group(name_after) if name_after is not None else None
+        if after != before:
+            self.push(GroupCommand(before, after))
+
+    # --- Допоміжні операції для команд ---
+
+    def detach_shapes(self, shape_ids):
+        """Від'єднані фігури з позиціями, у порядку малювання
+
+        Returns:
+            tuple: (позиції, фігури) - список Shape, а для стовпцевого сховища
+                ColumnarShapeStore з копіями рядків
+        """
+        manager = self.shape_manager
+        shape_ids = manager.sort_ids(shape_ids)
+        positions = [manager.index_of(shape_id) for shape_id in shape_ids]
+        if manager.columnar:
+            return positions, manager.shapes.subset(shape_ids)
+        return positions, [manager.shapes[pos] for pos in positions]
+
+    def remove_shapes_silently(self, shape_ids):
+        """Видалити фігури, їх членство у групах та виділення без запису в історію"""
+        removed = self.shape_manager.remove_shapes(shape_ids)
+        if removed:
+            self.group_manager.remove_shapes_from_all_groups(removed)
+            if self.selection_manager is not None:
+                self.selection_manager.deselect_shapes(removed)
+        return removed
+
+    def set_shape_attr(self, shape_id, attr, value):
+        """Встановити атрибут фігури за ID"""
+        shape = self.shape_manager.get_shape(shape_id)
+        if shape is not None:
+            setattr(shape, attr, value)
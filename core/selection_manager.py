@@ -2,6 +2,8 @@
 Менеджер для вибору та переміщення фігур
 """
 import math
+from shape import (circle_coords, ellipse_coords, is_cubic_curve, line_coords,
+                   point_coords)
 from utils.geometry import point_near_line, point_near_curve, point_near_cubic_curve
 
 
@@ -9,16 +11,17 @@ class SelectionManager:
     """Клас для управління виділенням та переміщенням фігур"""
     
     def __init__(self):
-        self.selected_shapes = set()  # Індекси вибраних фігур
+        self.selected_shapes = set()  # ID вибраних фігур
         
         # Для переміщення фігур
         self.dragging_shapes = False
         self.drag_start = None  # Початкова позиція курсору (world coords)
-        self.original_coords = {}  # Оригінальні координати фігур перед переміщенням
+        self.original_coords = {}  # ID -> оригінальні координати фігури перед переміщенням
+        self.drag_offset = (0, 0)  # Поточний зсув перетягування (для історії)
         
         # Для редагування кривих
         self.editing_curve = False
-        self.curve_shape_idx = None
+        self.curve_shape_id = None
         self.dragging_control_point = False
         self.editing_cubic_curve = False  # Для кубічних кривих
         self.cubic_curve_endpoint = None  # 'start' або 'end' - який кінець редагуємо
@@ -29,45 +32,65 @@ class SelectionManager:
         """Очистити виділення"""
         self.selected_shapes.clear()
     
-    def select_shape(self, idx):
+    def select_shape(self, shape_id):
         """Вибрати фігуру"""
-        self.selected_shapes.add(idx)
+        self.selected_shapes.add(shape_id)
     
-    def deselect_shape(self, idx):
+    def deselect_shape(self, shape_id):
         """Скасувати виділення фігури"""
-        self.selected_shapes.discard(idx)
+        self.selected_shapes.discard(shape_id)
     
-    def toggle_shape(self, idx):
+    def deselect_shapes(self, shape_ids):
+        """Скасувати виділення кількох фігур (наприклад, видалених)"""
+        shape_ids = set(shape_ids)
+        self.selected_shapes -= shape_ids
+        self.original_coords = {k: v for k, v in self.original_coords.items() if k not in shape_ids}
+        if self.curve_shape_id in shape_ids:
+            self.stop_curve_editing()
+    
+    def toggle_shape(self, shape_id):
         """Перемкнути виділення фігури"""
-        if idx in self.selected_shapes:
-            self.selected_shapes.remove(idx)
+        if shape_id in self.selected_shapes:
+            self.selected_shapes.remove(shape_id)
         else:
-            self.selected_shapes.add(idx)
+            self.selected_shapes.add(shape_id)
     
-    def is_selected(self, idx):
+    def is_selected(self, shape_id):
         """Чи вибрана фігура"""
-        return idx in self.selected_shapes
+        return shape_id in self.selected_shapes
     
-    def find_shape_at_point(self, shapes, x, y, zoom_factor, tolerance=10):
-        """Знайти фігуру під курсором"""
+    def find_shape_at_point(self, shape_manager, x, y, zoom_factor, tolerance=10):
+        """Знайти фігуру під курсором
+        
+        Перевіряються лише фігури, рамки яких лежать поруч з точкою
+        (просторовий індекс), зверху вниз.
+        
+        Returns:
+            int: ID фігури або None
+        """
         tolerance = tolerance / zoom_factor
         
-        # Шукаємо з кінця списку (верхні фігури)
-        for idx in range(len(shapes) - 1, -1, -1):
-            shape = shapes[idx]
-            if self._is_point_on_shape(shape, x, y, tolerance):
-                return idx
+        spatial_index = shape_manager.get_spatial_index()
+        candidates = shape_manager.sort_ids(spatial_index.query_point(x, y, tolerance), reverse=True)
+        
+        for shape_id in candidates:
+            if self._is_point_on_shape(shape_manager.get_shape(shape_id), x, y, tolerance):
+                return shape_id
         return None
     
-    def find_shapes_in_rect(self, shapes, x1, y1, x2, y2):
-        """Знайти всі фігури в прямокутнику"""
-        shapes_in_rect = []
-        for idx, shape in enumerate(shapes):
-            if self._is_shape_in_rect(shape, x1, y1, x2, y2):
-                shapes_in_rect.append(idx)
-        return shapes_in_rect
+    def find_shapes_in_rect(self, shape_manager, x1, y1, x2, y2):
+        """Знайти всі фігури в прямокутнику
+        
+        Returns:
+            list: ID фігур у порядку малювання
+        """
+        spatial_index = shape_manager.get_spatial_index()
+        candidates = shape_manager.sort_ids(spatial_index.query_rect(x1, y1, x2, y2))
+        
+        return [shape_id for shape_id in candidates
+                if self._is_shape_in_rect(shape_manager.get_shape(shape_id), x1, y1, x2, y2)]
     
-    def start_dragging(self, shapes, world_x, world_y):
+    def start_dragging(self, shape_manager, world_x, world_y):
         """Почати перетягування вибраних фігур"""
         if not self.selected_shapes:
             return False
@@ -75,32 +98,29 @@ class SelectionManager:
         self.dragging_shapes = True
         self.drag_start = (world_x, world_y)
         self.original_coords = {}
+        self.drag_offset = (0, 0)
         
-        for idx in self.selected_shapes:
-            if 0 <= idx < len(shapes):
-                shape = shapes[idx]
-                self.original_coords[idx] = dict(shape.coords)
+        for shape_id in self.selected_shapes:
+            shape = shape_manager.get_shape(shape_id)
+            if shape is not None:
+                self.original_coords[shape_id] = dict(shape.coords)
         
         return True
     
-    def update_dragging(self, shapes, world_x, world_y):
+    def update_dragging(self, shape_manager, world_x, world_y):
         """Оновити позиції фігур під час перетягування"""
         if not self.dragging_shapes or self.drag_start is None:
             return False
         
         dx = world_x - self.drag_start[0]
         dy = world_y - self.drag_start[1]
+        self.drag_offset = (dx, dy)
         
-        for idx in self.selected_shapes:
-            if idx not in self.original_coords:
-                continue
-            
-            if idx >= len(shapes):
+        for shape_id, orig in self.original_coords.items():
+            shape = shape_manager.get_shape(shape_id)
+            if shape is None:
                 continue
             
-            shape = shapes[idx]
-            orig = self.original_coords[idx]
-            
             self._update_shape_position(shape, orig, dx, dy)
         
         return True
@@ -110,31 +130,29 @@ class SelectionManager:
         self.dragging_shapes = False
         self.drag_start = None
         self.original_coords = {}
+        self.drag_offset = (0, 0)
     
     def is_dragging(self):
         """Чи відбувається перетягування"""
         return self.dragging_shapes
     
-    def start_curve_editing(self, idx, world_x, world_y):
+    def start_curve_editing(self, shape_id, world_x, world_y):
         """Почати редагування кривої (перетворення лінії в криву)"""
         self.editing_curve = True
-        self.curve_shape_idx = idx
+        self.curve_shape_id = shape_id
         self.drag_start = (world_x, world_y)
     
-    def start_cubic_curve_editing(self, idx, world_x, world_y, endpoint, shapes):
+    def start_cubic_curve_editing(self, shape_id, world_x, world_y, endpoint, shape_manager):
         """Почати редагування кубічної кривої (перетворення лінії в криву з 2 контрольними точками)
         
         Args:
-            idx: індекс фігури
+            shape_id: ID фігури
             world_x, world_y: координати кліку
             endpoint: 'start' або 'end' - який кінець лінії тягнемо
-            shapes: список фігур
+            shape_manager: ShapeManager з фігурами
         """
-        if idx >= len(shapes):
-            return
-        
-        shape = shapes[idx]
-        if shape.kind not in ['line', 'arrow']:
+        shape = shape_manager.get_shape(shape_id)
+        if shape is None or shape.kind not in ['line', 'arrow']:
             return
         
         c = shape.coords
@@ -173,31 +191,33 @@ class SelectionManager:
         
         # Встановлюємо режим перетягування відповідної контрольної точки
         self.dragging_control_point = True
-        self.curve_shape_idx = idx
+        self.curve_shape_id = shape_id
         self.cubic_curve_endpoint = endpoint
         # Визначаємо яку контрольну точку будемо тягнути
         self.dragging_which_control = 'cx1' if endpoint == 'start' else 'cx2'
-        self.selected_shapes = {idx}
+        self.selected_shapes = {shape_id}
         self.drag_start = (world_x, world_y)
     
-    def start_control_point_dragging(self, idx, which_control='cx'):
+    def start_control_point_dragging(self, shape_id, which_control='cx'):
         """Почати перетягування контрольної точки кривої
         
         Args:
-            idx: індекс фігури
+            shape_id: ID фігури
             which_control: 'cx' для квадратичної, 'cx1' або 'cx2' для кубічної
         """
         self.dragging_control_point = True
         self.dragging_which_control = which_control
-        self.curve_shape_idx = idx
-        self.selected_shapes = {idx}
+        self.curve_shape_id = shape_id
+        self.selected_shapes = {shape_id}
     
-    def update_curve_editing(self, shapes, world_x, world_y):
+    def update_curve_editing(self, shape_manager, world_x, world_y):
         """Оновити редагування кривої"""
-        if self.curve_shape_idx is None or self.curve_shape_idx >= len(shapes):
+        if self.curve_shape_id is None:
             return False
         
-        shape = shapes[self.curve_shape_idx]
+        shape = shape_manager.get_shape(self.curve_shape_id)
+        if shape is None:
+            return False
         
         # Перетворення лінії в квадратичну криву (клік по середині)
         if self.editing_curve and shape.kind in ['line', 'arrow']:
@@ -226,7 +246,7 @@ class SelectionManager:
             self.editing_curve = False
             self.dragging_control_point = True
             self.dragging_which_control = 'cx'
-            self.selected_shapes = {self.curve_shape_idx}
+            self.selected_shapes = {self.curve_shape_id}
             return True
         
         # Кубічна крива вже була створена в start_cubic_curve_editing, тут не потрібно робити перетворення
@@ -235,7 +255,7 @@ class SelectionManager:
         if self.dragging_control_point and shape.kind == 'curve':
             c = shape.coords
             # Перевіряємо чи це кубічна крива (має cx1, cy1, cx2, cy2)
-            if 'cx1' in c and 'cy1' in c and 'cx2' in c and 'cy2' in c:
+            if is_cubic_curve(c):
                 # Кубічна крива - оновлюємо відповідну контрольну точку
                 if self.dragging_which_control == 'cx1':
                     shape.coords['cx1'] = world_x
@@ -256,28 +276,25 @@ class SelectionManager:
         self.editing_curve = False
         self.editing_cubic_curve = False
         self.dragging_control_point = False
-        self.curve_shape_idx = None
+        self.curve_shape_id = None
         self.cubic_curve_endpoint = None
         self.dragging_which_control = None
     
-    def is_near_control_point(self, shapes, shape_idx, x, y, zoom_factor):
+    def is_near_control_point(self, shape_manager, shape_id, x, y, zoom_factor):
         """Перевірити чи курсор близько до контрольної точки кривої
         
         Повертає True якщо близько до будь-якої контрольної точки.
         Оновлює self.dragging_which_control для визначення якої саме.
         """
-        if shape_idx >= len(shapes):
-            return False
-        
-        shape = shapes[shape_idx]
-        if shape.kind != 'curve':
+        shape = shape_manager.get_shape(shape_id)
+        if shape is None or shape.kind != 'curve':
             return False
         
         c = shape.coords
         tolerance = 10 / zoom_factor
         
         # Перевіряємо кубічну криву (з двома контрольними точками)
-        if 'cx1' in c and 'cy1' in c and 'cx2' in c and 'cy2' in c:
+        if is_cubic_curve(c):
             dist1 = math.hypot(x - c['cx1'], y - c['cy1'])
             dist2 = math.hypot(x - c['cx2'], y - c['cy2'])
             
@@ -301,30 +318,31 @@ class SelectionManager:
     def _is_point_on_shape(self, shape, x, y, tolerance):
         """Перевірити чи точка на фігурі"""
         if shape.kind in ['line', 'arrow']:
-            c = shape.coords
-            return point_near_line(x, y, c['x1'], c['y1'], c['x2'], c['y2'], tolerance)
+            x1, y1, x2, y2 = line_coords(shape.coords)
+            return point_near_line(x, y, x1, y1, x2, y2, tolerance)
         elif shape.kind == 'curve':
             c = shape.coords
+            x1, y1, x2, y2 = line_coords(c)
             # Перевіряємо чи це кубічна крива
-            if 'cx1' in c and 'cy1' in c and 'cx2' in c and 'cy2' in c:
-                return point_near_cubic_curve(x, y, c['x1'], c['y1'], c['x2'], c['y2'], 
+            if is_cubic_curve(c):
+                return point_near_cubic_curve(x, y, x1, y1, x2, y2, 
                                              c['cx1'], c['cy1'], c['cx2'], c['cy2'], tolerance)
             else:
                 # Квадратична крива
-                return point_near_curve(x, y, c['x1'], c['y1'], c['x2'], c['y2'], c['cx'], c['cy'], tolerance)
+                return point_near_curve(x, y, x1, y1, x2, y2, c['cx'], c['cy'], tolerance)
         elif shape.kind == 'circle':
-            c = shape.coords
-            dist = math.hypot(x - c['cx'], y - c['cy'])
-            return abs(dist - c['r']) < tolerance
+            cx, cy, r = circle_coords(shape.coords)
+            dist = math.hypot(x - cx, y - cy)
+            return abs(dist - r) < tolerance
         elif shape.kind == 'ellipse':
-            c = shape.coords
-            dx = (x - c['cx']) / c['rx'] if c['rx'] > 0 else 0
-            dy = (y - c['cy']) / c['ry'] if c['ry'] > 0 else 0
+            cx, cy, rx, ry = ellipse_coords(shape.coords)
+            dx = (x - cx) / rx if rx > 0 else 0
+            dy = (y - cy) / ry if ry > 0 else 0
             dist = math.hypot(dx, dy)
-            return abs(dist - 1.0) < tolerance / max(c['rx'], c['ry'])
+            return abs(dist - 1.0) < tolerance / max(rx, ry)
         elif shape.kind == 'rectangle':
-            c = shape.coords
-            x1, y1, x2, y2 = min(c['x1'], c['x2']), min(c['y1'], c['y2']), max(c['x1'], c['x2']), max(c['y1'], c['y2'])
+            ax, ay, bx, by = line_coords(shape.coords)
+            x1, y1, x2, y2 = min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)
             # Перевіряємо близькість до країв прямокутника
             return ((abs(x - x1) < tolerance or abs(x - x2) < tolerance) and y1 <= y <= y2) or \
                    ((abs(y - y1) < tolerance or abs(y - y2) < tolerance) and x1 <= x <= x2)
@@ -339,16 +357,16 @@ class SelectionManager:
                         return True
             return False
         elif shape.kind == 'text':
-            c = shape.coords
+            tx, ty = point_coords(shape.coords)
             text = getattr(shape, 'text', '')
             font_scale = getattr(shape, 'font_scale', 1.0)
             text_width = len(text) * 10 * font_scale
             text_height = 20 * font_scale
-            return (c['x'] <= x <= c['x'] + text_width and
-                    c['y'] - text_height <= y <= c['y'])
+            return (tx <= x <= tx + text_width and
+                    ty - text_height <= y <= ty)
         elif shape.kind == 'point':
-            c = shape.coords
-            dist = math.hypot(x - c['x'], y - c['y'])
+            px, py = point_coords(shape.coords)
+            dist = math.hypot(x - px, y - py)
             return dist < tolerance
         
         return False
@@ -356,24 +374,24 @@ class SelectionManager:
     def _is_shape_in_rect(self, shape, x1, y1, x2, y2):
         """Перевірити чи фігура в прямокутнику"""
         if shape.kind in ['line', 'arrow', 'curve']:
-            c = shape.coords
-            return (x1 <= c['x1'] <= x2 and y1 <= c['y1'] <= y2 and
-                    x1 <= c['x2'] <= x2 and y1 <= c['y2'] <= y2)
+            ax, ay, bx, by = line_coords(shape.coords)
+            return (x1 <= ax <= x2 and y1 <= ay <= y2 and
+                    x1 <= bx <= x2 and y1 <= by <= y2)
         elif shape.kind in ['circle', 'ellipse']:
             c = shape.coords
             return x1 <= c['cx'] <= x2 and y1 <= c['cy'] <= y2
         elif shape.kind == 'rectangle':
-            c = shape.coords
-            cx = (c['x1'] + c['x2']) / 2
-            cy = (c['y1'] + c['y2']) / 2
+            ax, ay, bx, by = line_coords(shape.coords)
+            cx = (ax + bx) / 2
+            cy = (ay + by) / 2
             return x1 <= cx <= x2 and y1 <= cy <= y2
         elif shape.kind == 'polygon':
             c = shape.coords
             if 'points' in c and len(c['points']) > 0:
                 return all(x1 <= px <= x2 and y1 <= py <= y2 for px, py in c['points'])
         elif shape.kind in ['text', 'point']:
-            c = shape.coords
-            return x1 <= c['x'] <= x2 and y1 <= c['y'] <= y2
+            px, py = point_coords(shape.coords)
+            return x1 <= px <= x2 and y1 <= py <= y2
         
         return False
     
@@ -2,103 +2,373 @@
 Менеджер для управління фігурами (додавання, видалення, копіювання)
 """
 import math
+from itertools import islice
+
+import numpy as np
+
 from shape import Shape
+from core.columnar_store import ColumnarShapeStore
+from core.spatial_index import SpatialIndex
+from utils.geometry import get_shape_bbox
+
+
+# Ключі координат, що зсуваються по x та y
+_X_KEYS = ('x', 'x1', 'x2', 'cx', 'cx1', 'cx2')
+_Y_KEYS = ('y', 'y1', 'y2', 'cy', 'cy1', 'cy2')
+
+# Розмір пакета фігур при потоковому заповненні стовпцевого сховища
+_LOAD_BATCH = 4096
 
 
 class ShapeManager:
     """Клас для управління колекцією фігур"""
     
-    def __init__(self):
-        self.shapes = []
+    def __init__(self, columnar=False):
+        """
+        Args:
+            columnar: зберігати фігури у стовпцевих масивах NumPy (ColumnarShapeStore)
+                замість списку Shape - для великих сцен з груповими операціями
+        """
+        self.columnar = columnar
+        self.shapes = ColumnarShapeStore() if columnar else []
         self.clipboard = []  # Буфер обміну
+        self.version = 0  # Лічильник змін сцени
+        
+        # Стабільні ID фігур: ID -> позиція у списку (перебудовується ліниво після видалень)
+        self._next_id = 1
+        self._positions = {}
+        self._positions_dirty = False
+        
+        # Просторовий індекс для hit-testing (ключ - ID фігури)
+        self.spatial_index = SpatialIndex()
+        self._index_dirty = False
+        
+        # Кеш рендеру (ShapeRenderer): ID -> перо, пензель і геометрія фігури;
+        # запис скидається при будь-якій зміні фігури
+        self.render_cache = {}
+        # Кеш знімків (ProjectIO.snapshot_project): ID -> незмінний запис фігури,
+        # скидається там само, де й render_cache
+        self.record_cache = {}
     
     def add_shape(self, shape):
-        """Додати фігуру"""
+        """Додати фігуру
+        
+        Фігура отримує новий ID, якщо в неї ще немає вільного.
+        
+        Returns:
+            int: ID фігури
+        """
+        if shape.id is None or self.index_of(shape.id) is not None:
+            shape.id = self._next_id
+        self._next_id = max(self._next_id, shape.id + 1)
+        
         self.shapes.append(shape)
+        if not self._positions_dirty:
+            self._positions[shape.id] = len(self.shapes) - 1
+        if not self._index_dirty:
+            self.spatial_index.insert(shape.id, get_shape_bbox(shape))
+        self.version += 1
+        return shape.id
+    
+    def remove_shape(self, shape_id):
+        """Видалити фігуру за ID"""
+        return self.remove_shapes((shape_id,))
+    
+    def remove_shapes(self, shape_ids):
+        """Видалити кілька фігур за ID
+        
+        Список ущільнюється одним проходом, індекс оновлюється лише для
+        видалених фігур, позиції решти перераховуються при наступному запиті.
+        
+        Returns:
+            set: ID фактично видалених фігур
+        """
+        removed = {shape_id for shape_id in shape_ids if self.index_of(shape_id) is not None}
+        if not removed:
+            return removed
+        
+        if self.columnar:
+            self.shapes.remove_ids(removed)
+        else:
+            self.shapes = [shape for shape in self.shapes if shape.id not in removed]
+        if not self._index_dirty:
+            for shape_id in removed:
+                self.spatial_index.remove(shape_id)
+        for shape_id in removed:
+            self.render_cache.pop(shape_id, None)
+            self.record_cache.pop(shape_id, None)
+        self._positions_dirty = True
+        self.version += 1
+        return removed
+    
+    def insert_shapes(self, positions, shapes):
+        """Повернути фігури на їх позиції зі збереженням ID (undo/redo)
+        
+        Args:
+            positions: кінцеві позиції фігур за зростанням
+            shapes: фігури у тому ж порядку - список Shape або, для стовпцевого
+                сховища, ColumnarShapeStore (як їх повертає History.detach_shapes)
+        """
+        if not len(positions):
+            return
+        shape_ids = [shape.id for shape in shapes]
+        if self.columnar:
+            self.shapes.insert(positions, shapes)
+        else:
+            # Злиття зрізами замість list.insert для кожної фігури
+            old = self.shapes
+            merged = []
+            taken = 0
+            for pos, shape in zip(positions, shapes):
+                count = pos - len(merged)
+                merged.extend(old[taken:taken + count])
+                taken += count
+                merged.append(shape)
+            merged.extend(old[taken:])
+            self.shapes = merged
+        
+        self._next_id = max(self._next_id, max(shape_ids) + 1)
+        self._positions_dirty = True
+        if not self._index_dirty:
+            if self.columnar:
+                self._update_index_bulk(shape_ids)
+            else:
+                for shape in shapes:
+                    self.spatial_index.insert(shape.id, get_shape_bbox(shape))
+        self.version += 1
+    
+    def set_shapes(self, shapes):
+        """Замінити весь список фігур (завантаження проекту)
+        
+        Фігури без ID або з ID, що повторюються, отримують нові ID.
+        
+        Args:
+            shapes: список або ітератор фігур (ProjectIO.iter_project) - стовпцеве
+                сховище наповнюється пакетами, не тримаючи всі Shape одночасно
+        """
+        used = set()
+        next_id = 1
+        
+        def assign_ids(batch):
+            nonlocal next_id
+            for shape in batch:
+                if shape.id is None or shape.id in used:
+                    shape.id = next_id
+                used.add(shape.id)
+                next_id = max(next_id, shape.id + 1)
+            return batch
+        
+        # Поточний стан змінюється лише після успішного читання всіх фігур
+        if self.columnar:
+            store = ColumnarShapeStore()
+            shapes = iter(shapes)
+            while True:
+                batch = assign_ids(list(islice(shapes, _LOAD_BATCH)))
+                if not batch:
+                    break
+                store.extend(batch)
+            self.shapes = store
+        else:
+            self.shapes = assign_ids(list(shapes))
+        
+        self._next_id = next_id
+        self._positions_dirty = True
+        self._index_dirty = True
+        self.render_cache.clear()
+        self.record_cache.clear()
+        self.version += 1
+    
+    def get_shape(self, shape_id):
+        """Отримати фігуру за ID (None, якщо її немає)"""
+        pos = self.index_of(shape_id)
+        return self.shapes[pos] if pos is not None else None
+    
+    def index_of(self, shape_id):
+        """Позиція фігури у списку (порядок малювання) або None"""
+        if self._positions_dirty:
+            self._rebuild_positions()
+        return self._positions.get(shape_id)
     
-    def remove_shape(self, idx):
-        """Видалити фігуру за індексом"""
-        if 0 <= idx < len(self.shapes):
-            del self.shapes[idx]
+    def get_shape_ids(self):
+        """ID всіх фігур у порядку малювання"""
+        if self.columnar:
+            return self.shapes.ids().tolist()
+        return [shape.id for shape in self.shapes]
     
-    def undo(self):
-        """Скасувати останню дію (видалити останню фігуру)"""
-        if self.shapes:
-            self.shapes.pop()
+    def sort_ids(self, shape_ids, reverse=False):
+        """Відсортувати ID за порядком малювання, відкинувши неіснуючі
+        
+        Args:
+            reverse: True - спочатку верхні фігури
+        """
+        if self._positions_dirty:
+            self._rebuild_positions()
+        positions = self._positions
+        return sorted((shape_id for shape_id in shape_ids if shape_id in positions),
+                      key=positions.__getitem__, reverse=reverse)
+    
+    def _rebuild_positions(self):
+        """Перебудувати відображення ID -> позиція"""
+        self._positions = {shape_id: pos for pos, shape_id in enumerate(self.get_shape_ids())}
+        self._positions_dirty = False
+    
+    def mark_shapes_changed(self, shape_ids, interactive=False):
+        """Повідомити, що геометрія фігур змінилась (переміщення, редагування)
+        
+        Args:
+            shape_ids: ID змінених фігур
+            interactive: проміжна зміна під час перетягування - індекс оновлюється,
+                але версія сцени не змінюється, поки фігури ще рухаються
+        """
+        for shape_id in shape_ids:
+            self.render_cache.pop(shape_id, None)
+            self.record_cache.pop(shape_id, None)
+        if not self._index_dirty:
+            if self.columnar:
+                shape_ids = self.sort_ids(shape_ids)
+                if len(shape_ids) > len(self.shapes) // 2:
+                    # Змінилась більша частина сцени - дешевше перебудувати індекс при запиті
+                    self._index_dirty = True
+                else:
+                    self._update_index_bulk(shape_ids)
+            else:
+                for shape_id in shape_ids:
+                    shape = self.get_shape(shape_id)
+                    if shape is not None:
+                        self.spatial_index.update(shape_id, get_shape_bbox(shape))
+        if not interactive:
+            self.version += 1
+    
+    def get_spatial_index(self):
+        """Отримати актуальний просторовий індекс (ключі - ID фігур)"""
+        if self._index_dirty:
+            self._rebuild_index()
+        return self.spatial_index
+    
+    def _rebuild_index(self):
+        """Перебудувати просторовий індекс з нуля"""
+        self.spatial_index.clear()
+        if self.columnar:
+            self._update_index_bulk(self.get_shape_ids())
+        else:
+            for shape in self.shapes:
+                self.spatial_index.insert(shape.id, get_shape_bbox(shape))
+        self._index_dirty = False
+    
+    def _update_index_bulk(self, shape_ids):
+        """Оновити індекс рамками, обчисленими одним проходом стовпцевого сховища"""
+        boxes = self.shapes.bboxes(shape_ids).tolist()
+        for shape_id, bbox in zip(shape_ids, boxes):
+            self.spatial_index.update(shape_id, None if math.isnan(bbox[0]) else tuple(bbox))
     
     def clear_all(self):
         """Очистити всі фігури"""
         self.shapes.clear()
+        self.spatial_index.clear()
+        self._index_dirty = False
+        self.render_cache.clear()
+        self.record_cache.clear()
+        self._positions.clear()
+        self._positions_dirty = False
+        self.version += 1
+    
+    def get_selection_bbox(self, shape_ids):
+        """Спільна рамка фігур за ID"""
+        if self.columnar:
+            shape_ids = self.sort_ids(shape_ids)
+            if not shape_ids:
+                return None
+            boxes = self.shapes.bboxes(shape_ids)
+            boxes = boxes[~np.isnan(boxes[:, 0])]
+            if not len(boxes):
+                return None
+            return (*boxes[:, :2].min(axis=0).tolist(), *boxes[:, 2:].max(axis=0).tolist())
+        
+        from utils.geometry import get_selection_bbox
+        return get_selection_bbox([self.get_shape(shape_id) for shape_id in shape_ids])
     
-    def copy_shapes(self, indices):
-        """Копіювати фігури за індексами в буфер обміну"""
-        self.clipboard = [self.shapes[idx] for idx in sorted(indices) if 0 <= idx < len(self.shapes)]
+    def translate_shapes(self, shape_ids, dx, dy):
+        """Зсунути фігури на (dx, dy)
+        
+        У стовпцевому сховищі - одна векторна операція на всі фігури.
+        """
+        shape_ids = self.sort_ids(shape_ids)
+        if not shape_ids:
+            return
+        
+        if self.columnar:
+            self.shapes.translate(shape_ids, dx, dy)
+        else:
+            for shape_id in shape_ids:
+                c = self.get_shape(shape_id).coords
+                for key in _X_KEYS:
+                    if key in c:
+                        c[key] += dx
+                for key in _Y_KEYS:
+                    if key in c:
+                        c[key] += dy
+                if 'points' in c:
+                    c['points'] = [(x + dx, y + dy) for x, y in c['points']]
+        
+        self.mark_shapes_changed(shape_ids)
+    
+    def copy_shapes(self, shape_ids):
+        """Копіювати фігури за ID в буфер обміну (у порядку малювання)"""
+        shape_ids = self.sort_ids(shape_ids)
+        if self.columnar:
+            # Від'єднані копії: рядки сховища зсуваються після видалень
+            self.clipboard = [self.shapes.to_shape(self.index_of(shape_id)) for shape_id in shape_ids]
+        else:
+            self.clipboard = [self.get_shape(shape_id) for shape_id in shape_ids]
     
     def paste_shapes(self, offset_x=30, offset_y=30):
-        """Вставити фігури з буфера обміну зі зсувом"""
+        """Вставити фігури з буфера обміну зі зсувом
+        
+        Returns:
+            list: ID нових фігур
+        """
         if not self.clipboard:
             return []
         
-        new_shapes_indices = []
+        new_shape_ids = []
         
         for shape in self.clipboard:
             new_shape = self._create_shape_copy(shape, offset_x, offset_y)
-            self.shapes.append(new_shape)
-            new_shapes_indices.append(len(self.shapes) - 1)
+            new_shape_ids.append(self.add_shape(new_shape))
         
-        return new_shapes_indices
+        return new_shape_ids
     
-    def flip_shapes_horizontal(self, selected_indices, gap=20):
+    def flip_shapes_horizontal(self, selected_ids, gap=20):
         """Створити відзеркалені копії фігур по горизонталі"""
-        from utils.geometry import get_selection_bbox
-        
-        if not selected_indices:
+        if not selected_ids:
             return []
         
-        bbox = get_selection_bbox(self.shapes, selected_indices)
+        bbox = self.get_selection_bbox(selected_ids)
         if bbox is None:
             return []
         
         min_x, min_y, max_x, max_y = bbox
         mirror_axis = max_x + gap
         
-        new_shapes_indices = []
-        
-        for idx in sorted(selected_indices):
-            shape = self.shapes[idx]
-            new_shape = self._create_flipped_shape_horizontal(shape, mirror_axis)
-            self.shapes.append(new_shape)
-            new_shapes_indices.append(len(self.shapes) - 1)
-        
-        return new_shapes_indices
+        return self._create_mirrored_copies(selected_ids, mirror_axis, horizontal=True)
     
-    def flip_shapes_vertical(self, selected_indices, gap=20):
+    def flip_shapes_vertical(self, selected_ids, gap=20):
         """Створити відзеркалені копії фігур по вертикалі"""
-        from utils.geometry import get_selection_bbox
-        
-        if not selected_indices:
+        if not selected_ids:
             return []
         
-        bbox = get_selection_bbox(self.shapes, selected_indices)
+        bbox = self.get_selection_bbox(selected_ids)
         if bbox is None:
             return []
         
         min_x, min_y, max_x, max_y = bbox
         mirror_axis = max_y + gap
         
-        new_shapes_indices = []
-        
-        for idx in sorted(selected_indices):
-            shape = self.shapes[idx]
-            new_shape = self._create_flipped_shape_vertical(shape, mirror_axis)
-            self.shapes.append(new_shape)
-            new_shapes_indices.append(len(self.shapes) - 1)
-        
-        return new_shapes_indices
+        return self._create_mirrored_copies(selected_ids, mirror_axis, horizontal=False)
     
-    def mirror_shapes_across_center_horizontal(self, selected_indices, canvas_width=None):
+    def mirror_shapes_across_center_horizontal(self, selected_ids, canvas_width=None):
         """Дзеркалювати фігури відносно вертикальної осі через центр canvas"""
-        if not selected_indices:
+        if not selected_ids:
             return []
         
         # Визначаємо центральну вісь
@@ -106,26 +376,17 @@ class ShapeManager:
             mirror_axis = canvas_width / 2.0
         else:
             # Якщо немає canvas, використовуємо центр виділення
-            from utils.geometry import get_selection_bbox
-            bbox = get_selection_bbox(self.shapes, selected_indices)
+            bbox = self.get_selection_bbox(selected_ids)
             if bbox is None:
                 return []
             min_x, min_y, max_x, max_y = bbox
             mirror_axis = (min_x + max_x) / 2.0
         
-        new_shapes_indices = []
-        
-        for idx in sorted(selected_indices):
-            shape = self.shapes[idx]
-            new_shape = self._create_flipped_shape_horizontal(shape, mirror_axis)
-            self.shapes.append(new_shape)
-            new_shapes_indices.append(len(self.shapes) - 1)
-        
-        return new_shapes_indices
+        return self._create_mirrored_copies(selected_ids, mirror_axis, horizontal=True)
     
-    def mirror_shapes_across_center_vertical(self, selected_indices, canvas_height=None):
+    def mirror_shapes_across_center_vertical(self, selected_ids, canvas_height=None):
         """Дзеркалювати фігури відносно горизонтальної осі через центр canvas"""
-        if not selected_indices:
+        if not selected_ids:
             return []
         
         # Визначаємо центральну вісь
@@ -133,22 +394,40 @@ class ShapeManager:
             mirror_axis = canvas_height / 2.0
         else:
             # Якщо немає canvas, використовуємо центр виділення
-            from utils.geometry import get_selection_bbox
-            bbox = get_selection_bbox(self.shapes, selected_indices)
+            bbox = self.get_selection_bbox(selected_ids)
             if bbox is None:
                 return []
             min_x, min_y, max_x, max_y = bbox
             mirror_axis = (min_y + max_y) / 2.0
         
-        new_shapes_indices = []
+        return self._create_mirrored_copies(selected_ids, mirror_axis, horizontal=False)
+    
+    def _create_mirrored_copies(self, selected_ids, mirror_axis, horizontal):
+        """Додати дзеркальні копії фігур відносно осі
+        
+        Returns:
+            list: ID нових фігур
+        """
+        source_ids = self.sort_ids(selected_ids)
+        if not self.columnar:
+            create = (self._create_flipped_shape_horizontal if horizontal
+                      else self._create_flipped_shape_vertical)
+            return [self.add_shape(create(self.get_shape(shape_id), mirror_axis))
+                    for shape_id in source_ids]
         
-        for idx in sorted(selected_indices):
-            shape = self.shapes[idx]
-            new_shape = self._create_flipped_shape_vertical(shape, mirror_axis)
-            self.shapes.append(new_shape)
-            new_shapes_indices.append(len(self.shapes) - 1)
+        # Стовпцеве сховище: копіюємо рядки та дзеркалимо їх векторно
+        new_ids = list(range(self._next_id, self._next_id + len(source_ids)))
+        self._next_id += len(new_ids)
+        start = len(self.shapes)
+        self.shapes.duplicate(source_ids, new_ids)
+        self.shapes.mirror(new_ids, mirror_axis, horizontal)
         
-        return new_shapes_indices
+        if not self._positions_dirty:
+            self._positions.update(zip(new_ids, range(start, start + len(new_ids))))
+        if not self._index_dirty:
+            self._update_index_bulk(new_ids)
+        self.version += 1
+        return new_ids
     
     def _create_shape_copy(self, shape, offset_x, offset_y):
         """Створити копію фігури зі зсувом"""
@@ -162,7 +441,8 @@ class ShapeManager:
             font_scale=getattr(shape, 'font_scale', 1.0),
             filled=getattr(shape, 'filled', False),
             dash_length=getattr(shape, 'dash_length', 10),
-            dot_length=getattr(shape, 'dot_length', 5)
+            dot_length=getattr(shape, 'dot_length', 5),
+            dynamic=getattr(shape, 'dynamic', False)
         )
         
         # Копіюємо координати зі зсувом
@@ -248,7 +528,8 @@ class ShapeManager:
             font_scale=getattr(shape, 'font_scale', 1.0),
             filled=getattr(shape, 'filled', False),
             dash_length=getattr(shape, 'dash_length', 10),
-            dot_length=getattr(shape, 'dot_length', 5)
+            dot_length=getattr(shape, 'dot_length', 5),
+            dynamic=getattr(shape, 'dynamic', False)
         )
         
         if shape.kind in ['line', 'arrow']:
@@ -347,7 +628,8 @@ class ShapeManager:
             font_scale=getattr(shape, 'font_scale', 1.0),
             filled=getattr(shape, 'filled', False),
             dash_length=getattr(shape, 'dash_length', 10),
-            dot_length=getattr(shape, 'dot_length', 5)
+            dot_length=getattr(shape, 'dot_length', 5),
+            dynamic=getattr(shape, 'dynamic', False)
         )
         
         if shape.kind in ['line', 'arrow']:
@@ -0,0 +1,144 @@
+"""
+Просторовий індекс фігур (рівномірна сітка) для швидкого hit-testing
+"""
+import math
+
+
+class SpatialIndex:
+    """Рівномірна сітка з bounding box фігур
+
+    Кожна фігура реєструється в усіх комірках, які перетинає її рамка.
+    Фігури, що покривають надто багато комірок, зберігаються окремим
+    списком і перевіряються завжди - так одна велика рамка не роздуває індекс.
+    """
+
+    def __init__(self, cell_size=128, max_cells_per_shape=256):
+        self.cell_size = cell_size
+        self.max_cells_per_shape = max_cells_per_shape
+        self._cells = {}  # (cx, cy) -> set(ключів)
+        self._entries = {}  # ключ -> (bbox, список комірок або None для великих)
+        self._large = set()  # Ключі фігур, що не поміщаються в сітку
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def clear(self):
+        """Очистити індекс"""
+        self._cells.clear()
+        self._entries.clear()
+        self._large.clear()
+
+    def get_bbox(self, key):
+        """Отримати закешований bounding box фігури"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def insert(self, key, bbox):
+        """Додати фігуру в індекс
+
+        Args:
+            key: ключ фігури (індекс у списку)
+            bbox: (min_x, min_y, max_x, max_y) або None
+        """
+        if key in self._entries:
+            self.remove(key)
+
+        if bbox is None:
+            return
+
+        x1, y1, x2, y2 = self._cell_range(bbox)
+        if (x2 - x1 + 1) * (y2 - y1 + 1) > self.max_cells_per_shape:
+            self._large.add(key)
+            self._entries[key] = (bbox, None)
+            return
+
+        cells = []
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                cell = (cx, cy)
+                bucket = self._cells.get(cell)
+                if bucket is None:
+                    bucket = self._cells[cell] = set()
+                bucket.add(key)
+                cells.append(cell)
+        self._entries[key] = (bbox, cells)
+
+    def remove(self, key):
+        """Видалити фігуру з індексу"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        cells = entry[1]
+        if cells is None:
+            self._large.discard(key)
+            return
+
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._cells[cell]
+
+    def update(self, key, bbox):
+        """Оновити рамку фігури (після переміщення або редагування)"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == bbox:
+            return
+        self.insert(key, bbox)
+
+    def query_rect(self, x1, y1, x2, y2):
+        """Знайти ключі фігур, рамки яких перетинають прямокутник
+
+        Returns:
+            set: ключі кандидатів (порядок не визначено)
+        """
+        if x1 > x2:
+            x1, x2 = x2, x1
+        if y1 > y2:
+            y1, y2 = y2, y1
+
+        result = set()
+        entries = self._entries
+
+        cx1, cy1, cx2, cy2 = self._cell_range((x1, y1, x2, y2))
+        num_cells = (cx2 - cx1 + 1) * (cy2 - cy1 + 1)
+
+        if num_cells > len(self._cells):
+            # Запит більший за заповнену частину сітки - простіше пройти по комірках
+            candidates = set()
+            for (cx, cy), bucket in self._cells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    candidates.update(bucket)
+        else:
+            candidates = set()
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    bucket = self._cells.get((cx, cy))
+                    if bucket:
+                        candidates.update(bucket)
+        candidates.update(self._large)
+
+        for key in candidates:
+            bx1, by1, bx2, by2 = entries[key][0]
+            if bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1:
+                result.add(key)
+        return result
+
+    def query_point(self, x, y, tolerance=0):
+        """Знайти ключі фігур, рамки яких лежать ближче tolerance до точки"""
+        return self.query_rect(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
+
+    def _cell_range(self, bbox):
+        """Діапазон комірок, які покриває рамка"""
+        size = self.cell_size
+        return (
+            math.floor(bbox[0] / size),
+            math.floor(bbox[1] / size),
+            math.floor(bbox[2] / size),
+            math.floor(bbox[3] / size),
+        )
@@ -1,14 +1,21 @@
 """
 Генератор коду OpenCV для експорту фігур
 """
-import math
+import inspect
+
+from utils.bezier import bezier_basis, bezier_points, estimate_curve_steps
+from utils.dash_pattern import (
+    polyline_arc_lengths, points_at_distances, dash_segments, dot_centers,
+    draw_dash_pattern, draw_dot_pattern
+)
 
 
 class CodeGenerator:
     """Клас для генерації OpenCV коду з фігур"""
     
     @staticmethod
-    def generate_opencv_code(shapes, origin_mode='editor', canvas_width=None, canvas_height=None, groups=None):
+    def generate_opencv_code(shapes, origin_mode='editor', canvas_width=None, canvas_height=None, groups=None,
+                             cache_overlay=False):
         """
         Генерувати OpenCV код з фігур
         
@@ -18,6 +25,8 @@ class CodeGenerator:
             canvas_width: ширина полотна
             canvas_height: висота полотна
             groups: список груп ShapeGroup (опціонально)
+            cache_overlay: растеризувати статичні фігури один раз (OverlayCache) і лише
+                змішувати їх з кадром; фігури з dynamic=True малюються щокадру поверх
         
         Returns:
             str: згенерований Python код
@@ -30,202 +39,71 @@ class CodeGenerator:
         lines.append('"""')
         lines.append('import cv2')
         lines.append('import numpy as np')
-        lines.append('import math')
+        lines.append('from functools import lru_cache')
         lines.append('')
         lines.append('')
         lines.append('# === Допоміжні функції ===')
         lines.append('')
         
         # Допоміжні функції
+        # Пунктири та точки (NumPy + один виклик cv2.polylines) - той самий код, що й у редакторі
+        for func in (polyline_arc_lengths, points_at_distances, dash_segments, dot_centers,
+                     draw_dash_pattern, draw_dot_pattern):
+            lines.extend(inspect.getsource(func).rstrip().splitlines())
+            lines.append('')
         lines.append('def draw_dashed_line(frame, pt1, pt2, color, thickness=1, dash_length=10):')
         lines.append('    """Малювання пунктирної лінії"""')
-        lines.append('    x1, y1 = pt1')
-        lines.append('    x2, y2 = pt2')
-        lines.append('    ')
-        lines.append('    dx = x2 - x1')
-        lines.append('    dy = y2 - y1')
-        lines.append('    length = math.sqrt(dx * dx + dy * dy)')
-        lines.append('    ')
-        lines.append('    if length == 0:')
-        lines.append('        return')
-        lines.append('    ')
-        lines.append('    dx /= length')
-        lines.append('    dy /= length')
-        lines.append('    ')
-        lines.append('    current_length = 0')
-        lines.append('    draw = True')
-        lines.append('    ')
-        lines.append('    while current_length < length:')
-        lines.append('        start_x = int(x1 + dx * current_length)')
-        lines.append('        start_y = int(y1 + dy * current_length)')
-        lines.append('        ')
-        lines.append('        current_length += dash_length')
-        lines.append('        if current_length > length:')
-        lines.append('            current_length = length')
-        lines.append('        ')
-        lines.append('        end_x = int(x1 + dx * current_length)')
-        lines.append('        end_y = int(y1 + dy * current_length)')
-        lines.append('        ')
-        lines.append('        if draw:')
-        lines.append('            cv2.line(frame, (start_x, start_y), (end_x, end_y), color, thickness, cv2.LINE_AA)')
-        lines.append('        ')
-        lines.append('        draw = not draw')
+        lines.append('    draw_dash_pattern(frame, (pt1, pt2), color, thickness, dash_length)')
         lines.append('')
         lines.append('def draw_dotted_line(frame, pt1, pt2, color, thickness=1, dot_spacing=5):')
         lines.append('    """Малювання точкової лінії"""')
-        lines.append('    x1, y1 = pt1')
-        lines.append('    x2, y2 = pt2')
-        lines.append('    ')
-        lines.append('    dx = x2 - x1')
-        lines.append('    dy = y2 - y1')
-        lines.append('    length = math.sqrt(dx * dx + dy * dy)')
-        lines.append('    ')
-        lines.append('    if length == 0:')
-        lines.append('        return')
-        lines.append('    ')
-        lines.append('    dx /= length')
-        lines.append('    dy /= length')
-        lines.append('    ')
-        lines.append('    num_dots = int(length / dot_spacing)')
-        lines.append('    ')
-        lines.append('    for i in range(num_dots + 1):')
-        lines.append('        x = int(x1 + dx * dot_spacing * i)')
-        lines.append('        y = int(y1 + dy * dot_spacing * i)')
-        lines.append('        cv2.circle(frame, (x, y), thickness, color, -1, cv2.LINE_AA)')
+        lines.append('    draw_dot_pattern(frame, (pt1, pt2), color, thickness, dot_spacing, include_end=False)')
         lines.append('')
         lines.append('def draw_dashed_polyline(frame, points, color, thickness=1, dash_length=10):')
         lines.append('    """Малювання пунктирної лінії вздовж polyline (кожен штрих — пряма)"""')
-        lines.append('    if len(points) < 2 or dash_length <= 0:')
-        lines.append('        return')
-        lines.append('    ')
-        lines.append('    total_length = polyline_length(points)')
-        lines.append('    if total_length <= 0:')
-        lines.append('        return')
-        lines.append('    ')
-        lines.append('    current = 0.0')
-        lines.append('    draw_segment = True')
-        lines.append('    ')
-        lines.append('    while current < total_length:')
-        lines.append('        next_dist = min(current + dash_length, total_length)')
-        lines.append('        if draw_segment:')
-        lines.append('            start_pt = point_on_polyline(points, current)')
-        lines.append('            end_pt = point_on_polyline(points, next_dist)')
-        lines.append('            if start_pt and end_pt:')
-        lines.append('                x1, y1 = int(round(start_pt[0])), int(round(start_pt[1]))')
-        lines.append('                x2, y2 = int(round(end_pt[0])), int(round(end_pt[1]))')
-        lines.append('                if x1 != x2 or y1 != y2:')
-        lines.append('                    cv2.line(frame, (x1, y1), (x2, y2), color, thickness, cv2.LINE_AA)')
-        lines.append('                else:')
-        lines.append('                    cv2.circle(frame, (x1, y1), max(1, thickness), color, -1, cv2.LINE_AA)')
-        lines.append('        current = next_dist')
-        lines.append('        draw_segment = not draw_segment')
+        lines.append('    draw_dash_pattern(frame, points, color, thickness, dash_length)')
         lines.append('')
         lines.append('def draw_dotted_polyline(frame, points, color, thickness=1, dot_spacing=5):')
         lines.append('    """Малювання точок вздовж polyline з рівним кроком"""')
-        lines.append('    if len(points) < 2 or dot_spacing <= 0:')
-        lines.append('        return')
-        lines.append('    ')
-        lines.append('    total_length = polyline_length(points)')
-        lines.append('    if total_length <= 0:')
-        lines.append('        return')
-        lines.append('    ')
-        lines.append('    dist = 0.0')
-        lines.append('    while dist <= total_length:')
-        lines.append('        pt = point_on_polyline(points, dist)')
-        lines.append('        if pt:')
-        lines.append('            x, y = int(round(pt[0])), int(round(pt[1]))')
-        lines.append('            cv2.circle(frame, (x, y), max(1, thickness), color, -1, cv2.LINE_AA)')
-        lines.append('        dist += dot_spacing')
-        lines.append('    ')
-        lines.append('    pt_end = point_on_polyline(points, total_length)')
-        lines.append('    if pt_end:')
-        lines.append('        x, y = int(round(pt_end[0])), int(round(pt_end[1]))')
-        lines.append('        cv2.circle(frame, (x, y), max(1, thickness), color, -1, cv2.LINE_AA)')
-        lines.append('')
-        lines.append('def polyline_length(points):')
-        lines.append('    """Обчислити довжину polyline"""')
-        lines.append('    total = 0.0')
-        lines.append('    for i in range(len(points) - 1):')
-        lines.append('        total += math.hypot(points[i + 1][0] - points[i][0], points[i + 1][1] - points[i][1])')
-        lines.append('    return total')
-        lines.append('')
-        lines.append('def point_on_polyline(points, target_dist):')
-        lines.append('    """Отримати точку polyline на заданій відстані"""')
-        lines.append('    if not points:')
-        lines.append('        return None')
-        lines.append('    ')
-        lines.append('    if target_dist <= 0:')
-        lines.append('        return points[0]')
-        lines.append('    ')
-        lines.append('    travelled = 0.0')
-        lines.append('    for i in range(len(points) - 1):')
-        lines.append('        pt1 = points[i]')
-        lines.append('        pt2 = points[i + 1]')
-        lines.append('        segment = math.hypot(pt2[0] - pt1[0], pt2[1] - pt1[1])')
-        lines.append('        if segment == 0:')
-        lines.append('            continue')
-        lines.append('        if travelled + segment >= target_dist:')
-        lines.append('            t = (target_dist - travelled) / segment')
-        lines.append('            x = pt1[0] + (pt2[0] - pt1[0]) * t')
-        lines.append('            y = pt1[1] + (pt2[1] - pt1[1]) * t')
-        lines.append('            return (x, y)')
-        lines.append('        travelled += segment')
-        lines.append('    return points[-1]')
+        lines.append('    draw_dot_pattern(frame, points, color, max(1, thickness), dot_spacing)')
         lines.append('')
+        # Ядро кривих Безьє (NumPy) - той самий код, що й у редакторі
+        for func in (bezier_basis, bezier_points):
+            lines.extend(inspect.getsource(func).rstrip().splitlines())
+            lines.append('')
         lines.append('def draw_bezier_curve(frame, x1, y1, x2, y2, cx, cy, color, thickness=1, steps=20):')
         lines.append('    """Малювання квадратичної кривої Безьє"""')
-        lines.append('    points = []')
-        lines.append('    for i in range(steps + 1):')
-        lines.append('        t = i / steps')
-        lines.append('        bx = int((1 - t) ** 2 * x1 + 2 * (1 - t) * t * cx + t ** 2 * x2)')
-        lines.append('        by = int((1 - t) ** 2 * y1 + 2 * (1 - t) * t * cy + t ** 2 * y2)')
-        lines.append('        points.append([bx, by])')
-        lines.append('    pts = np.array([points], dtype=np.int32)')
-        lines.append('    cv2.polylines(frame, pts, False, color, thickness, cv2.LINE_AA)')
+        lines.append('    pts = bezier_points(((x1, y1), (cx, cy), (x2, y2)), steps).astype(np.int32)')
+        lines.append('    cv2.polylines(frame, [pts], False, color, thickness, cv2.LINE_AA)')
         lines.append('')
         lines.append('def draw_cubic_bezier_curve(frame, x1, y1, x2, y2, cx1, cy1, cx2, cy2, color, thickness=1, steps=50):')
         lines.append('    """Малювання кубічної кривої Безьє"""')
-        lines.append('    points = []')
-        lines.append('    for i in range(steps + 1):')
-        lines.append('        t = i / steps')
-        lines.append('        bx = int((1-t)**3*x1 + 3*(1-t)**2*t*cx1 + 3*(1-t)*t**2*cx2 + t**3*x2)')
-        lines.append('        by = int((1-t)**3*y1 + 3*(1-t)**2*t*cy1 + 3*(1-t)*t**2*cy2 + t**3*y2)')
-        lines.append('        points.append([bx, by])')
-        lines.append('    pts = np.array([points], dtype=np.int32)')
-        lines.append('    cv2.polylines(frame, pts, False, color, thickness, cv2.LINE_AA)')
+        lines.append('    pts = bezier_points(((x1, y1), (cx1, cy1), (cx2, cy2), (x2, y2)), steps).astype(np.int32)')
+        lines.append('    cv2.polylines(frame, [pts], False, color, thickness, cv2.LINE_AA)')
         lines.append('')
         lines.append('def calculate_bezier_points(x1, y1, x2, y2, cx, cy, num_points=50):')
         lines.append('    """Розрахувати точки квадратичної кривої Безьє"""')
-        lines.append('    points = []')
-        lines.append('    for i in range(num_points + 1):')
-        lines.append('        t = i / num_points')
-        lines.append('        x = (1 - t) ** 2 * x1 + 2 * (1 - t) * t * cx + t ** 2 * x2')
-        lines.append('        y = (1 - t) ** 2 * y1 + 2 * (1 - t) * t * cy + t ** 2 * y2')
-        lines.append('        points.append((int(x), int(y)))')
-        lines.append('    return points')
+        lines.append('    return bezier_points(((x1, y1), (cx, cy), (x2, y2)), num_points).astype(np.int32).tolist()')
         lines.append('')
         lines.append('def calculate_cubic_bezier_points(x1, y1, x2, y2, cx1, cy1, cx2, cy2, num_points=50):')
         lines.append('    """Розрахувати точки кубічної кривої Безьє"""')
-        lines.append('    points = []')
-        lines.append('    for i in range(num_points + 1):')
-        lines.append('        t = i / num_points')
-        lines.append('        t_inv = 1 - t')
-        lines.append('        x = t_inv ** 3 * x1 + 3 * t_inv ** 2 * t * cx1 + 3 * t_inv * t ** 2 * cx2 + t ** 3 * x2')
-        lines.append('        y = t_inv ** 3 * y1 + 3 * t_inv ** 2 * t * cy1 + 3 * t_inv * t ** 2 * cy2 + t ** 3 * y2')
-        lines.append('        points.append((int(x), int(y)))')
-        lines.append('    return points')
+        lines.append('    return bezier_points(((x1, y1), (cx1, cy1), (cx2, cy2), (x2, y2)), num_points).astype(np.int32).tolist()')
         lines.append('')
         lines.append('')
         
+        if cache_overlay:
+            lines.extend(CodeGenerator._generate_overlay_cache_class())
+        
         # Якщо є групи, генеруємо класи для кожної групи
         if groups and len(groups) > 0:
             # Збираємо фігури по групах
+            # (члени груп - ID фігур, порядок малювання береться зі списку)
+            positions = {shape.id: idx for idx, shape in enumerate(shapes)}
             group_shapes = {}
             for group in groups:
-                group_shapes[group.name] = []
-                for idx in group.shape_indices:
-                    if 0 <= idx < len(shapes):
-                        group_shapes[group.name].append((idx, shapes[idx]))
+                indices = sorted(positions[shape_id] for shape_id in group.shape_ids
+                                 if shape_id in positions)
+                group_shapes[group.name] = [(idx, shapes[idx]) for idx in indices]
             
             # Генеруємо класи для груп
             for group in groups:
@@ -268,11 +146,12 @@ class CodeGenerator:
                 for color_name, color_tuple in colors.items():
                     lines.append(f"            '{color_name}': {color_tuple},")
                 lines.append('        }')
+                if cache_overlay:
+                    lines.append('        self.overlay_cache = OverlayCache(self.draw_static)')
                 lines.append('    ')
-                lines.append('    def draw(self, frame):')
-                lines.append('        """Намалювати фігури на кадрі"""')
                 
-                # Генеруємо код для кожної фігури в групі
+                # Пари (фігура, ключ кольору) для кожної фігури в групі
+                shape_items = []
                 for idx, shape in group_shapes_list:
                     color_tuple = shape.color_bgr
                     color_key = None
@@ -280,11 +159,28 @@ class CodeGenerator:
                         if val == color_tuple:
                             color_key = key
                             break
-                    
-                    shape_code = CodeGenerator._generate_shape_code(shape, color_key, origin_mode, canvas_width, canvas_height)
-                    lines.extend(shape_code)
+                    shape_items.append((shape, color_key))
                 
-                lines.append('        return frame')
+                if cache_overlay:
+                    static_items = [item for item in shape_items if not getattr(item[0], 'dynamic', False)]
+                    dynamic_items = [item for item in shape_items if getattr(item[0], 'dynamic', False)]
+                    
+                    lines.extend(CodeGenerator._generate_draw_function(
+                        'def draw_static(self, frame):', 'Намалювати статичні фігури (растеризуються один раз)',
+                        static_items, origin_mode, canvas_width, canvas_height, '    '))
+                    lines.append('    ')
+                    lines.extend(CodeGenerator._generate_draw_function(
+                        'def draw_dynamic(self, frame):', 'Намалювати динамічні фігури (щокадру)',
+                        dynamic_items, origin_mode, canvas_width, canvas_height, '    '))
+                    lines.append('    ')
+                    lines.append('    def draw(self, frame):')
+                    lines.append('        """Накласти кешовані статичні фігури та намалювати динамічні"""')
+                    lines.append('        frame = self.overlay_cache.apply(frame)')
+                    lines.append('        return self.draw_dynamic(frame)')
+                else:
+                    lines.extend(CodeGenerator._generate_draw_function(
+                        'def draw(self, frame):', 'Намалювати фігури на кадрі',
+                        shape_items, origin_mode, canvas_width, canvas_height, '    '))
                 lines.append('')
                 lines.append('')
             
@@ -317,14 +213,33 @@ class CodeGenerator:
             lines.append('    cv2.destroyAllWindows()')
         else:
             # Якщо немає груп, генеруємо простий код без класів
-            lines.append('def draw_overlay(frame):')
-            lines.append('    """Намалювати всі фігури на кадрі"""')
+            shape_items = [(shape, None) for shape in shapes]
             
-            for shape in shapes:
-                shape_code = CodeGenerator._generate_shape_code(shape, None, origin_mode, canvas_width, canvas_height)
-                lines.extend(shape_code)
-            
-            lines.append('    return frame')
+            if cache_overlay:
+                static_items = [item for item in shape_items if not getattr(item[0], 'dynamic', False)]
+                dynamic_items = [item for item in shape_items if getattr(item[0], 'dynamic', False)]
+                
+                lines.extend(CodeGenerator._generate_draw_function(
+                    'def draw_static(frame):', 'Намалювати статичні фігури (растеризуються один раз)',
+                    static_items, origin_mode, canvas_width, canvas_height, ''))
+                lines.append('')
+                lines.append('')
+                lines.extend(CodeGenerator._generate_draw_function(
+                    'def draw_dynamic(frame):', 'Намалювати динамічні фігури (щокадру)',
+                    dynamic_items, origin_mode, canvas_width, canvas_height, ''))
+                lines.append('')
+                lines.append('')
+                lines.append('overlay_cache = OverlayCache(draw_static)')
+                lines.append('')
+                lines.append('')
+                lines.append('def draw_overlay(frame):')
+                lines.append('    """Накласти кешовані статичні фігури та намалювати динамічні"""')
+                lines.append('    frame = overlay_cache.apply(frame)')
+                lines.append('    return draw_dynamic(frame)')
+            else:
+                lines.extend(CodeGenerator._generate_draw_function(
+                    'def draw_overlay(frame):', 'Намалювати всі фігури на кадрі',
+                    shape_items, origin_mode, canvas_width, canvas_height, ''))
             lines.append('')
             lines.append('')
             lines.append('# Приклад використання:')
@@ -375,10 +290,80 @@ class CodeGenerator:
         return name
     
     @staticmethod
-    def _generate_shape_code(shape, color_key, origin_mode, canvas_width, canvas_height):
+    def _generate_draw_function(signature, docstring, shape_items, origin_mode, canvas_width, canvas_height, indent):
+        """Генерувати функцію (або метод) малювання набору фігур
+        
+        Args:
+            signature: рядок 'def name(...):'
+            docstring: опис функції
+            shape_items: список пар (фігура, ключ кольору або None)
+            indent: відступ самого def ('' для функції, '    ' для методу)
+        """
+        body_indent = indent + '    '
+        lines = [f'{indent}{signature}', f'{body_indent}"""{docstring}"""']
+        
+        for shape, color_key in shape_items:
+            lines.extend(CodeGenerator._generate_shape_code(
+                shape, color_key, origin_mode, canvas_width, canvas_height, body_indent))
+        
+        lines.append(f'{body_indent}return frame')
+        return lines
+    
+    @staticmethod
+    def _generate_overlay_cache_class():
+        """Генерувати клас OverlayCache для експорту з кешуванням статичних фігур"""
+        lines = []
+        lines.append('class OverlayCache:')
+        lines.append('    """Статичний HUD, растеризований один раз для кожного розміру кадру')
+        lines.append('    ')
+        lines.append('    HUD малюється на чорному та білому фоні: різниця дає точну прозорість')
+        lines.append('    (з урахуванням згладжування). Далі кожен кадр лише змішується з ним:')
+        lines.append('    frame = frame * (1 - alpha) + overlay. Кадр - BGR uint8.')
+        lines.append('    """')
+        lines.append('    ')
+        lines.append('    def __init__(self, draw_func):')
+        lines.append('        self.draw_func = draw_func')
+        lines.append('        self.size = None')
+        lines.append('        self.overlay = None')
+        lines.append('        self.transmission = None')
+        lines.append('        self.roi = None')
+        lines.append('    ')
+        lines.append('    def render(self, width, height):')
+        lines.append('        """Растеризувати HUD для кадру заданого розміру"""')
+        lines.append('        on_black = np.zeros((height, width, 3), dtype=np.uint8)')
+        lines.append('        on_white = np.full((height, width, 3), 255, dtype=np.uint8)')
+        lines.append('        self.draw_func(on_black)')
+        lines.append('        self.draw_func(on_white)')
+        lines.append('        ')
+        lines.append('        self.overlay = on_black')
+        lines.append('        self.transmission = cv2.subtract(on_white, on_black)')
+        lines.append('        ')
+        lines.append('        # Обмежуємо змішування областю, де є HUD')
+        lines.append('        points = cv2.findNonZero(255 - self.transmission.min(axis=2))')
+        lines.append('        self.roi = cv2.boundingRect(points) if points is not None else None')
+        lines.append('        self.size = (width, height)')
+        lines.append('    ')
+        lines.append('    def apply(self, frame):')
+        lines.append('        """Накласти HUD на кадр (на місці)"""')
+        lines.append('        height, width = frame.shape[:2]')
+        lines.append('        if self.size != (width, height):')
+        lines.append('            self.render(width, height)')
+        lines.append('        if self.roi is None:')
+        lines.append('            return frame')
+        lines.append('        ')
+        lines.append('        x, y, w, h = self.roi')
+        lines.append('        frame_roi = frame[y:y + h, x:x + w]')
+        lines.append('        cv2.multiply(frame_roi, self.transmission[y:y + h, x:x + w], dst=frame_roi, scale=1.0 / 255)')
+        lines.append('        cv2.add(frame_roi, self.overlay[y:y + h, x:x + w], dst=frame_roi)')
+        lines.append('        return frame')
+        lines.append('')
+        lines.append('')
+        return lines
+    
+    @staticmethod
+    def _generate_shape_code(shape, color_key, origin_mode, canvas_width, canvas_height, indent='        '):
         """Генерувати код для однієї фігури"""
         lines = []
-        indent = '        '
         
         # Конвертуємо координати якщо потрібно
         def convert_coords(coords_dict):
@@ -387,7 +372,7 @@ class CodeGenerator:
                 if isinstance(value, (int, float)):
                     if origin_mode == 'opencv' and canvas_height:
                         # Конвертуємо Y координату
-                        if key.startswith('y') or key == 'cy':
+                        if key.startswith('y') or key.startswith('cy'):
                             result[key] = canvas_height - value
                         else:
                             result[key] = value
@@ -493,69 +478,47 @@ class CodeGenerator:
             fill = -1 if shape.filled else shape.thickness
             lines.append(f'{indent}cv2.ellipse(frame, ({cx}, {cy}), ({rx}, {ry}), {angle}, 0, 360, {color_str}, {fill}, cv2.LINE_AA)')
         
-        elif shape.kind == 'curve':
+        elif shape.kind == 'curve' and 'cx1' not in coords:
             # Квадратична крива Безьє
             x1, y1 = int(coords['x1']), int(coords['y1'])
             x2, y2 = int(coords['x2']), int(coords['y2'])
             cx, cy = int(coords['cx']), int(coords['cy'])
-            steps = CodeGenerator._estimate_curve_steps(coords)
+            steps = estimate_curve_steps(coords)
             
             if line_style == 'solid':
                 lines.append(f'{indent}draw_bezier_curve(frame, {x1}, {y1}, {x2}, {y2}, {cx}, {cy}, {color_str}, {shape.thickness}, {steps})')
             elif line_style == 'dashed':
                 # Для пунктирних кривих обчислюємо точки та малюємо пунктир вздовж polyline
-                lines.append(f'{indent}bezier_points = calculate_bezier_points({x1}, {y1}, {x2}, {y2}, {cx}, {cy}, {steps})')
-                lines.append(f'{indent}draw_dashed_polyline(frame, bezier_points, {color_str}, {shape.thickness}, {dash_length})')
+                lines.append(f'{indent}curve_points = calculate_bezier_points({x1}, {y1}, {x2}, {y2}, {cx}, {cy}, {steps})')
+                lines.append(f'{indent}draw_dashed_polyline(frame, curve_points, {color_str}, {shape.thickness}, {dash_length})')
             elif line_style == 'dotted':
                 # Для точкових кривих обчислюємо точки та малюємо polyline точками
-                lines.append(f'{indent}bezier_points = calculate_bezier_points({x1}, {y1}, {x2}, {y2}, {cx}, {cy}, {steps})')
-                lines.append(f'{indent}draw_dotted_polyline(frame, bezier_points, {color_str}, {shape.thickness}, {dot_length})')
+                lines.append(f'{indent}curve_points = calculate_bezier_points({x1}, {y1}, {x2}, {y2}, {cx}, {cy}, {steps})')
+                lines.append(f'{indent}draw_dotted_polyline(frame, curve_points, {color_str}, {shape.thickness}, {dot_length})')
             else:
                 # За замовчуванням суцільна крива
                 lines.append(f'{indent}draw_bezier_curve(frame, {x1}, {y1}, {x2}, {y2}, {cx}, {cy}, {color_str}, {shape.thickness}, {steps})')
         
-        elif shape.kind == 'cubic_curve':
-            # Кубічна крива Безьє
+        elif shape.kind in ('curve', 'cubic_curve'):
+            # Кубічна крива Безьє (редактор зберігає її як 'curve' з cx1/cx2)
             x1, y1 = int(coords['x1']), int(coords['y1'])
             x2, y2 = int(coords['x2']), int(coords['y2'])
             cx1, cy1 = int(coords['cx1']), int(coords['cy1'])
             cx2, cy2 = int(coords['cx2']), int(coords['cy2'])
-            steps = CodeGenerator._estimate_curve_steps(coords, cubic=True)
+            steps = estimate_curve_steps(coords, cubic=True)
             
             if line_style == 'solid':
                 lines.append(f'{indent}draw_cubic_bezier_curve(frame, {x1}, {y1}, {x2}, {y2}, {cx1}, {cy1}, {cx2}, {cy2}, {color_str}, {shape.thickness}, {steps})')
             elif line_style == 'dashed':
                 # Для пунктирних кривих використовуємо polyline з урахуванням довжини
-                lines.append(f'{indent}bezier_points = calculate_cubic_bezier_points({x1}, {y1}, {x2}, {y2}, {cx1}, {cy1}, {cx2}, {cy2}, {steps})')
-                lines.append(f'{indent}draw_dashed_polyline(frame, bezier_points, {color_str}, {shape.thickness}, {dash_length})')
+                lines.append(f'{indent}curve_points = calculate_cubic_bezier_points({x1}, {y1}, {x2}, {y2}, {cx1}, {cy1}, {cx2}, {cy2}, {steps})')
+                lines.append(f'{indent}draw_dashed_polyline(frame, curve_points, {color_str}, {shape.thickness}, {dash_length})')
             elif line_style == 'dotted':
                 # Для точкових кривих використовуємо polyline з урахуванням довжини
-                lines.append(f'{indent}bezier_points = calculate_cubic_bezier_points({x1}, {y1}, {x2}, {y2}, {cx1}, {cy1}, {cx2}, {cy2}, {steps})')
-                lines.append(f'{indent}draw_dotted_polyline(frame, bezier_points, {color_str}, {shape.thickness}, {dot_length})')
+                lines.append(f'{indent}curve_points = calculate_cubic_bezier_points({x1}, {y1}, {x2}, {y2}, {cx1}, {cy1}, {cx2}, {cy2}, {steps})')
+                lines.append(f'{indent}draw_dotted_polyline(frame, curve_points, {color_str}, {shape.thickness}, {dot_length})')
             else:
                 # За замовчуванням суцільна крива
                 lines.append(f'{indent}draw_cubic_bezier_curve(frame, {x1}, {y1}, {x2}, {y2}, {cx1}, {cy1}, {cx2}, {cy2}, {color_str}, {shape.thickness}, {steps})')
         
         return lines
-
-    @staticmethod
-    def _estimate_curve_steps(coords, cubic=False):
-        """Оцінити кількість сегментів для кривої для кращої якості"""
-        def dist(pt_a, pt_b):
-            return math.hypot(pt_a[0] - pt_b[0], pt_a[1] - pt_b[1])
-        
-        if cubic:
-            p0 = (coords['x1'], coords['y1'])
-            p1 = (coords['cx1'], coords['cy1'])
-            p2 = (coords['cx2'], coords['cy2'])
-            p3 = (coords['x2'], coords['y2'])
-            approx_len = dist(p0, p1) + dist(p1, p2) + dist(p2, p3)
-        else:
-            p0 = (coords['x1'], coords['y1'])
-            p1 = (coords['cx'], coords['cy'])
-            p2 = (coords['x2'], coords['y2'])
-            approx_len = dist(p0, p1) + dist(p1, p2)
-        
-        approx_len += dist((coords['x1'], coords['y1']), (coords['x2'], coords['y2']))
-        steps = int(max(60, min(400, approx_len / 3)))
-        return steps
@@ -1,8 +1,204 @@
 """
-Збереження та завантаження проектів (JSON)
+Збереження та завантаження проектів (JSON та бінарний .hudp)
+
+Бінарний формат: заголовок (MAGIC, версія формату, компресія, розміри),
+далі - опціонально стиснуті маніфест JSON та буфер упакованих масивів.
+Координати фігур лежать блоками за (kind, ключі координат); кожен масив
+чисел має найкомпактніший dtype без втрат (uint8..int64, float32, якщо
+значення точно представимі, інакше float64), тож JSON 2.3 -> .hudp -> JSON
+дає той самий файл. Рядки (типи, стилі, тексти, назви груп) - в таблиці.
 """
+import codecs
+import gc
 import json
-from shape import Shape
+import lzma
+import os
+import re
+import struct
+import sys
+import zlib
+from contextlib import contextmanager
+from itertools import chain
+from operator import attrgetter
+
+import numpy as np
+
+from core.columnar_store import ColumnarShapeStore
+from shape import Shape, ShapeCoords, coords_factory
+
+
+BINARY_EXTENSION = '.hudp'
+BINARY_MAGIC = b'HUDP'
+BINARY_FORMAT_VERSION = 1
+# MAGIC, версія формату, код компресії, резерв, розмір маніфесту, розмір даних
+_HEADER = struct.Struct('<4sHBBIQ')
+
+_COMPRESSION_CODES = {None: 0, 'zlib': 1, 'lzma': 2}
+_COMPRESSION_NAMES = {code: name for name, code in _COMPRESSION_CODES.items()}
+
+_INT_DTYPES = (np.uint8, np.int16, np.int32, np.int64)
+
+_FILLED = 1
+_DYNAMIC = 2
+
+
+def _pack_numbers(values, buffer):
+    """Додати числа в буфер з найкомпактнішим dtype без втрат
+
+    Цілі (int) - найменший цілий тип, в який вони вміщуються; дробові -
+    float32, якщо всі значення точно представимі, інакше float64. Якщо
+    цілі й дробові змішані, додається бітова маска цілих значень.
+
+    Returns:
+        dict: опис масиву для маніфесту
+    """
+    types = set(map(type, values))
+    if types <= {int}:
+        ints = np.array(values, dtype=np.int64)
+        low, high = (int(ints.min()), int(ints.max())) if len(ints) else (0, 0)
+        for dtype in _INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return _append_array(ints.astype(dtype), buffer)
+    
+    floats = np.array(values, dtype=np.float64)
+    with np.errstate(over='ignore'):
+        narrow = floats.astype(np.float32)
+    exact = (narrow == floats) | (np.isnan(floats) & np.isnan(narrow))
+    ref = _append_array(narrow if exact.all() else floats, buffer)
+    if int in types:
+        is_int = np.fromiter((type(value) is int for value in values), bool, len(values))
+        ref['ints'] = _append_array(np.packbits(is_int), buffer)
+    return ref
+
+
+# Властивості фігури для JSON-знімка (порядок - як розпаковує project_to_dict)
+_SHAPE_PROPS = attrgetter('id', 'kind', 'color_bgr', 'thickness', 'style', 'line_style', 'filled',
+                          'dash_length', 'dot_length', 'dynamic', 'text', 'font_scale')
+
+
+def _coords_items(coords, readers):
+    """Ключі та значення координат фігури
+    
+    Для записів ShapeCoords з усіма полями значення читаються одним
+    attrgetter на тип запису (readers - кеш тип -> (ключі, attrgetter)).
+    
+    Returns:
+        tuple: (ключі, значення)
+    """
+    reader = readers.get(type(coords))
+    if reader is None:
+        fields = getattr(coords, '__slots__', ()) if isinstance(coords, ShapeCoords) else ()
+        reader = readers[type(coords)] = (tuple(fields), attrgetter(*fields)) if len(fields) > 1 else False
+    if reader:
+        try:
+            return reader[0], reader[1](coords)
+        except AttributeError:
+            pass  # Частина полів відсутня - загальний шлях
+    keys = tuple(iter(coords))
+    return keys, tuple(map(coords.__getitem__, keys))
+
+
+def _unpack_numbers(ref, data):
+    """Список Python-чисел з опису _pack_numbers"""
+    values = _read_array(ref, data).tolist()
+    if 'ints' in ref:
+        mask = np.unpackbits(_read_array(ref['ints'], data), count=ref['count']).astype(bool)
+        for index in np.flatnonzero(mask).tolist():
+            values[index] = int(values[index])
+    return values
+
+
+def _append_array(array, buffer):
+    """Дописати масив у буфер, вирівнявши початок до 8 байт"""
+    buffer.extend(bytes(-len(buffer) % 8))
+    ref = {'dtype': array.dtype.str, 'offset': len(buffer), 'count': int(array.size)}
+    buffer.extend(np.ascontiguousarray(array).tobytes())
+    return ref
+
+
+def _read_array(ref, data):
+    """Масив з буфера за описом _append_array (без копіювання)"""
+    return np.frombuffer(data, dtype=np.dtype(ref['dtype']), count=ref['count'], offset=ref['offset'])
+
+
+class _JsonStreamReader:
+    """Послідовне читання значень JSON з файлу шматками
+    
+    Кожне значення розбирається json.JSONDecoder.raw_decode з буфера; якщо
+    значення обірване на межі шматка, буфер дочитується (з подвоєнням
+    розміру читання, щоб великі значення не розбиралися квадратично).
+    """
+    
+    _WHITESPACE = re.compile(r'[ \t\n\r]*')
+    
+    def __init__(self, f, chunk_size, on_read=None):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._on_read = on_read
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.bytes_read = 0
+    
+    def _fill(self, size):
+        """Дочитати ще size байт у буфер (прочитане раніше відкидається)
+        
+        Returns:
+            bool: False - файл закінчився
+        """
+        if self._eof:
+            return False
+        data = self._file.read(size)
+        self.bytes_read += len(data)
+        self._eof = not data
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(data, final=self._eof)
+        self._pos = 0
+        if self._on_read:
+            self._on_read(self.bytes_read)
+        return not self._eof
+    
+    def peek(self):
+        """Наступний непробільний символ ('' - кінець файлу)"""
+        while True:
+            self._pos = self._WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(self._chunk_size):
+                return ''
+    
+    def next_char(self, allowed):
+        """Прочитати наступний непробільний символ з allowed"""
+        char = self.peek()
+        if not char or char not in allowed:
+            raise ValueError(f"Malformed project file: expected one of {allowed!r} "
+                             f"near byte {self.bytes_read}")
+        self._pos += 1
+        return char
+    
+    def expect(self, char):
+        """Пропустити очікуваний символ"""
+        self.next_char(char)
+    
+    def value(self):
+        """Розібрати наступне значення JSON"""
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                obj, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # Число в кінці буфера могло бути обрізане - дочитуємо й розбираємо ще раз
+            if end == len(self._buffer) and self._fill(size):
+                continue
+            self._pos = end
+            return obj
 
 
 class ProjectIO:
@@ -10,7 +206,7 @@ class ProjectIO:
     
     @staticmethod
     def save_project(shapes, filename, groups=None, canvas_limits=None):
-        """Зберегти проект у JSON файл
+        """Зберегти проект у JSON файл (або бінарний - для розширення .hudp)
         
         Args:
             shapes: список фігур
@@ -18,75 +214,495 @@ class ProjectIO:
             groups: GroupManager або None
             canvas_limits: dict з налаштуваннями меж полотна
         """
+        if filename.lower().endswith(BINARY_EXTENSION):
+            ProjectIO.save_project_binary(shapes, filename, groups, canvas_limits)
+            return
+        
+        snapshot = ProjectIO.snapshot_project(shapes, groups, canvas_limits)
+        ProjectIO.write_project_data(ProjectIO.project_to_dict(snapshot), filename)
+    
+    @staticmethod
+    def snapshot_project(shapes, groups=None, canvas_limits=None, record_cache=None):
+        """Швидкий знімок проекту для запису в іншому потоці
+        
+        Для списку фігур властивості читаються кортежами, координати
+        копіюються (списки точок теж); стовпцеве сховище копіюється цілком.
+        Знімок не залежить від подальших змін сцени, перетворення на
+        словник - project_to_dict.
+        
+        Args:
+            record_cache: кеш записів фігур (ShapeManager.record_cache) - записи
+                будуються лише для фігур, змінених після попереднього знімка
+        
+        Returns:
+            dict: знімок (shapes, groups, canvas_limits)
+        """
+        if isinstance(shapes, ColumnarShapeStore):
+            records = shapes.copy()
+        elif record_cache is not None:
+            records = ProjectIO._cached_shape_records(shapes, record_cache)
+        else:
+            records = ProjectIO._shape_records(shapes)
+        return {
+            'shapes': records,
+            'groups': groups.to_dict(shapes) if groups else None,
+            'canvas_limits': dict(canvas_limits) if canvas_limits else None
+        }
+    
+    @staticmethod
+    def _shape_records(shapes):
+        """Кортежі (властивості, ключі координат, значення координат) фігур"""
+        readers = {}
+        read_props = _SHAPE_PROPS
+        records = []
+        append = records.append
+        for shape in shapes:
+            keys, values = _coords_items(shape.coords, readers)
+            if 'points' in keys:
+                values = tuple([list(p) for p in value] if key == 'points' else value
+                               for key, value in zip(keys, values))
+            append((read_props(shape), keys, values))
+        return records
+    
+    @staticmethod
+    def _cached_shape_records(shapes, cache):
+        """Записи _shape_records з кешу; відсутні будуються одним пакетом"""
+        missing = [shape for shape in shapes if shape.id not in cache]
+        for record in ProjectIO._shape_records(missing):
+            cache[record[0][0]] = record
+        return [cache[shape.id] for shape in shapes]
+    
+    @staticmethod
+    def project_to_dict(snapshot, with_ids=False):
+        """Словник проекту (формат JSON 2.3) зі знімка snapshot_project
+        
+        Args:
+            with_ids: записати ID фігур (автозбереження - на них посилається журнал)
+        """
+        records = snapshot['shapes']
+        if isinstance(records, ColumnarShapeStore):
+            records = ProjectIO._shape_records(records)
+        
         project_data = {
             'version': '2.3',  # Оновлюємо версію для підтримки canvas_limits
-            'shapes': []
+            'shapes': [ProjectIO._record_to_dict(record, with_ids) for record in records]
         }
         
-        for shape in shapes:
-            shape_data = {
-                'kind': shape.kind,
-                'color_bgr': shape.color_bgr,
-                'thickness': shape.thickness,
-                'style': shape.style,
-                'line_style': getattr(shape, 'line_style', 'solid'),
-                'filled': getattr(shape, 'filled', False),
-                'dash_length': getattr(shape, 'dash_length', 10),
-                'dot_length': getattr(shape, 'dot_length', 5),
-                'coords': dict(shape.coords)
-            }
-            
-            # Додаткові параметри для тексту
-            if shape.kind == 'text':
-                shape_data['text'] = getattr(shape, 'text', '')
-                shape_data['font_scale'] = getattr(shape, 'font_scale', 1.0)
-            
-            project_data['shapes'].append(shape_data)
-        
         # Додаємо інформацію про групи
-        if groups:
-            project_data['groups'] = groups.to_dict()
+        if snapshot['groups']:
+            project_data['groups'] = snapshot['groups']
         
         # Додаємо налаштування меж полотна
-        if canvas_limits:
-            project_data['canvas_limits'] = canvas_limits
+        if snapshot['canvas_limits']:
+            project_data['canvas_limits'] = snapshot['canvas_limits']
+        
+        return project_data
+    
+    @staticmethod
+    def snapshot_shapes(snapshot):
+        """Фігури зі знімка snapshot_project - нові об'єкти, незалежні від сцени
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(project_data, f, indent=2, ensure_ascii=False)
+        Стовпцеве сховище у знімку вже є копією - повертається воно саме.
+        """
+        records = snapshot['shapes']
+        if isinstance(records, ColumnarShapeStore):
+            return records
+        colors = {}
+        return [ProjectIO._shape_from_dict(ProjectIO._record_to_dict(record, True), colors)
+                for record in records]
+    
+    @staticmethod
+    def shape_to_dict(shape):
+        """Запис JSON однієї фігури разом з її ID"""
+        return ProjectIO._record_to_dict(ProjectIO._shape_records((shape,))[0], True)
     
     @staticmethod
-    def load_project(filename):
-        """Завантажити проект з JSON файлу
+    def shape_from_dict(shape_data):
+        """Shape із запису JSON (ID - з запису, якщо він є)"""
+        return ProjectIO._shape_from_dict(shape_data, {})
+    
+    @staticmethod
+    def _record_to_dict(record, with_id):
+        """Запис JSON фігури з кортежу _shape_records"""
+        (shape_id, kind, color_bgr, thickness, style, line_style, filled, dash_length,
+         dot_length, dynamic, text, font_scale), keys, values = record
+        shape_data = {
+            'kind': kind,
+            'color_bgr': color_bgr,
+            'thickness': thickness,
+            'style': style,
+            'line_style': line_style,
+            'filled': filled,
+            'dash_length': dash_length,
+            'dot_length': dot_length,
+            'dynamic': dynamic,
+            'coords': dict(zip(keys, values))
+        }
+        
+        # Додаткові параметри для тексту
+        if kind == 'text':
+            shape_data['text'] = text
+            shape_data['font_scale'] = font_scale
+        
+        if with_id:
+            shape_data['id'] = shape_id
+        return shape_data
+    
+    @staticmethod
+    def write_project_data(project_data, filename, indent=2):
+        """Атомарно записати словник проекту у JSON файл
+        
+        Дані пишуться у тимчасовий файл у тій самій теці, скидаються на
+        диск (fsync) і лише потім замінюють цільовий файл, тож перерваний
+        запис не псує попередню версію.
+        
+        Args:
+            project_data: словник (напр. з project_to_dict)
+            filename: назва файлу
+            indent: відступ JSON (None - компактний запис)
+        """
+        with ProjectIO._atomic_file(filename, 'w', encoding='utf-8') as f:
+            json.dump(project_data, f, indent=indent, ensure_ascii=False)
+    
+    @staticmethod
+    @contextmanager
+    def _atomic_file(filename, mode, encoding=None):
+        """Тимчасовий файл, що після успішного запису (flush + fsync) замінює filename
+        
+        Тимчасовий файл створюється в тій самій теці (os.replace в межах
+        файлової системи атомарний); при помилці він видаляється, а цільовий
+        файл лишається незмінним.
+        """
+        directory = os.path.dirname(os.path.abspath(filename))
+        tmp_name = os.path.join(directory, f".{os.path.basename(filename)}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_name, mode, encoding=encoding) as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, filename)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+    
+    @staticmethod
+    def load_project(filename, progress=None):
+        """Завантажити проект з JSON або бінарного файлу (формат визначається за MAGIC)
+        
+        Args:
+            progress: callable(прочитано байт, розмір файлу) або None
         
         Returns:
             tuple: (shapes, groups_data, canvas_limits) - список фігур, дані груп та налаштування полотна
         """
-        with open(filename, 'r', encoding='utf-8') as f:
-            project_data = json.load(f)
+        header = {}
+        shapes = list(ProjectIO.iter_project(filename, header, progress))
         
-        shapes = []
+        # Інформація про групи та налаштування меж полотна (якщо є)
+        return shapes, header.get('groups'), header.get('canvas_limits')
+    
+    @staticmethod
+    def iter_project(filename, header, progress=None, chunk_size=1 << 20):
+        """Генератор фігур проекту: JSON читається шматками, фігури будуються по одній
         
-        for shape_data in project_data.get('shapes', []):
-            shape = Shape(
-                kind=shape_data['kind'],
-                color_bgr=tuple(shape_data['color_bgr']),
-                thickness=shape_data['thickness'],
-                style=shape_data.get('style', 'default'),
-                line_style=shape_data.get('line_style', 'solid'),
-                filled=shape_data.get('filled', False),
-                dash_length=shape_data.get('dash_length', 10),
-                dot_length=shape_data.get('dot_length', 5),
-                text=shape_data.get('text', ''),
-                font_scale=shape_data.get('font_scale', 1.0),
-                **shape_data['coords']
-            )
-            shapes.append(shape)
+        Дерево JSON цілком у пам'яті не тримається - кожен запис фігури
+        розбирається й одразу перетворюється на Shape. Бінарний .hudp
+        завантажується цілком (він і так компактний).
         
-        # Завантажуємо інформацію про групи (якщо є)
-        groups_data = project_data.get('groups', None)
+        Args:
+            header: dict, куди записуються інші ключі верхнього рівня
+                (version, groups, canvas_limits); повний після вичерпання генератора
+            progress: callable(прочитано байт, розмір файлу) або None
+            chunk_size: розмір шматка читання в байтах
         
-        # Завантажуємо налаштування меж полотна (якщо є)
-        canvas_limits = project_data.get('canvas_limits', None)
+        Yields:
+            Shape
+        """
+        total = os.path.getsize(filename)
+        if ProjectIO.is_binary_project(filename):
+            shapes, groups_data, canvas_limits = ProjectIO.load_project_binary(filename)
+            header.update(groups=groups_data, canvas_limits=canvas_limits)
+            if progress:
+                progress(total, total)
+            yield from shapes
+            return
         
-        return shapes, groups_data, canvas_limits
-
+        colors = {}  # Однакові кольори ділять один кортеж
+        with open(filename, 'rb') as f:
+            reader = _JsonStreamReader(f, chunk_size, lambda done: progress and progress(done, total))
+            reader.expect('{')
+            if reader.peek() == '}':
+                return
+            while True:
+                key = reader.value()
+                reader.expect(':')
+                if key == 'shapes':
+                    reader.expect('[')
+                    if reader.peek() == ']':
+                        reader.expect(']')
+                    else:
+                        while True:
+                            yield ProjectIO._shape_from_dict(reader.value(), colors)
+                            if reader.next_char(',]') == ']':
+                                break
+                else:
+                    header[key] = reader.value()
+                if reader.next_char(',}') == '}':
+                    break
+    
+    @staticmethod
+    def _shape_from_dict(shape_data, colors):
+        """Створити Shape із запису JSON
+        
+        Args:
+            colors: dict для спільних кортежів однакових кольорів
+        """
+        color = tuple(shape_data['color_bgr'])
+        # Назви типів і стилів повторюються - інтернуємо, щоб не тримати копію рядка на фігуру
+        shape = Shape(
+            kind=sys.intern(shape_data['kind']),
+            color_bgr=colors.setdefault(color, color),
+            thickness=shape_data['thickness'],
+            style=sys.intern(shape_data.get('style', 'default')),
+            line_style=sys.intern(shape_data.get('line_style', 'solid')),
+            filled=shape_data.get('filled', False),
+            dash_length=shape_data.get('dash_length', 10),
+            dot_length=shape_data.get('dot_length', 5),
+            dynamic=shape_data.get('dynamic', False),
+            text=shape_data.get('text', ''),
+            font_scale=shape_data.get('font_scale', 1.0),
+            **shape_data['coords']
+        )
+        # ID є лише в автозбереженні (на них посилається журнал змін)
+        shape.id = shape_data.get('id')
+        return shape
+    
+    @staticmethod
+    def is_binary_project(filename):
+        """Чи є файл бінарним проектом (перевірка MAGIC)"""
+        with open(filename, 'rb') as f:
+            return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    
+    @staticmethod
+    def save_project_binary(shapes, filename, groups=None, canvas_limits=None, compression='zlib'):
+        """Зберегти проект у бінарний файл .hudp
+        
+        Args:
+            shapes: список фігур
+            filename: назва файлу
+            groups: GroupManager або None
+            canvas_limits: dict з налаштуваннями меж полотна
+            compression: None, 'zlib' або 'lzma'
+        """
+        if compression not in _COMPRESSION_CODES:
+            raise ValueError(f"Unknown compression: {compression}")
+        
+        shapes = list(shapes)
+        strings = {}  # Таблиця рядків: рядок -> індекс
+        
+        def string_codes(values):
+            """Індекси рядків у таблиці (нові рядки додаються в кінець)"""
+            for value in dict.fromkeys(values):
+                strings.setdefault(value, len(strings))
+            return list(map(strings.__getitem__, values))
+        
+        def column(name):
+            return list(map(attrgetter(name), shapes))
+        
+        kinds = column('kind')
+        buffer = bytearray()
+        manifest = {
+            'version': '2.3',
+            'count': len(shapes),
+            'columns': {
+                'kind': _pack_numbers(string_codes(kinds), buffer),
+                'color_bgr': _pack_numbers(list(chain.from_iterable(column('color_bgr'))), buffer),
+                'thickness': _pack_numbers(column('thickness'), buffer),
+                'style': _pack_numbers(string_codes(column('style')), buffer),
+                'line_style': _pack_numbers(string_codes(column('line_style')), buffer),
+                'dash_length': _pack_numbers(column('dash_length'), buffer),
+                'dot_length': _pack_numbers(column('dot_length'), buffer),
+                'font_scale': _pack_numbers(column('font_scale'), buffer),
+                'flags': _pack_numbers([(_FILLED if shape.filled else 0) | (_DYNAMIC if shape.dynamic else 0)
+                                        for shape in shapes], buffer),
+                'text': _pack_numbers(string_codes(column('text')), buffer),
+            },
+            'blocks': [],
+        }
+        
+        # Блоки координат: (kind, ключі) -> (рядки, значення, кількості точок, точки)
+        blocks = {}
+        readers = {}
+        for row, (kind, coords) in enumerate(zip(kinds, column('coords'))):
+            keys, values = _coords_items(coords, readers)
+            block = blocks.get((kind, keys))
+            if block is None:
+                block = blocks[(kind, keys)] = ([], [], [], [])
+            block[0].append(row)
+            if 'points' in keys:
+                for key, value in zip(keys, values):
+                    if key == 'points':
+                        block[2].append(len(value))
+                        block[3].extend(chain.from_iterable(value))
+                    else:
+                        block[1].append(value)
+            else:
+                block[1].extend(values)
+        
+        for (kind, keys), (rows, values, counts, points) in blocks.items():
+            block = {
+                'kind': kind,
+                'keys': list(keys),
+                'rows': _pack_numbers(rows, buffer),
+                'values': _pack_numbers(values, buffer),
+            }
+            if 'points' in keys:
+                block['point_counts'] = _pack_numbers(counts, buffer)
+                block['points'] = _pack_numbers(points, buffer)
+            manifest['blocks'].append(block)
+        
+        if groups:
+            manifest['groups'] = [
+                {
+                    'name': string_codes([g['name']])[0],
+                    'color': list(g['color']),
+                    'shape_indices': _pack_numbers(g['shape_indices'], buffer),
+                }
+                for g in groups.to_dict(shapes)['groups']
+            ]
+        if canvas_limits:
+            manifest['canvas_limits'] = canvas_limits
+        
+        # Таблиця рядків: UTF-8 блоб та кінцеві зсуви рядків
+        encoded = [value.encode('utf-8') for value in strings]
+        manifest['strings'] = {
+            'ends': _pack_numbers(np.cumsum([len(value) for value in encoded], dtype=np.int64).tolist(), buffer),
+            'data': _append_array(np.frombuffer(b''.join(encoded), np.uint8), buffer),
+        }
+        
+        manifest_bytes = json.dumps(manifest, ensure_ascii=False).encode('utf-8')
+        body = manifest_bytes + bytes(buffer)
+        if compression == 'zlib':
+            body = zlib.compress(body, 1)
+        elif compression == 'lzma':
+            body = lzma.compress(body)
+        
+        header = _HEADER.pack(BINARY_MAGIC, BINARY_FORMAT_VERSION, _COMPRESSION_CODES[compression], 0,
+                              len(manifest_bytes), len(buffer))
+        # Атомарно, як і JSON: перерваний запис не псує попередню версію файлу
+        with ProjectIO._atomic_file(filename, 'wb') as f:
+            f.write(header)
+            f.write(body)
+    
+    @staticmethod
+    def load_project_binary(filename):
+        """Завантажити проект з бінарного файлу .hudp
+        
+        Returns:
+            tuple: (shapes, groups_data, canvas_limits) - як load_project
+        """
+        with open(filename, 'rb') as f:
+            header = f.read(_HEADER.size)
+            body = f.read()
+        
+        if len(header) < _HEADER.size:
+            raise ValueError("Truncated binary project header")
+        magic, version, compression, _, manifest_size, data_size = _HEADER.unpack(header)
+        if magic != BINARY_MAGIC:
+            raise ValueError("Not a binary project file")
+        if version > BINARY_FORMAT_VERSION:
+            raise ValueError(f"Unsupported binary project version: {version}")
+        compression = _COMPRESSION_NAMES.get(compression, 'unknown')
+        if compression == 'zlib':
+            body = zlib.decompress(body)
+        elif compression == 'lzma':
+            body = lzma.decompress(body)
+        elif compression is not None:
+            raise ValueError("Unknown binary project compression")
+        if len(body) != manifest_size + data_size:
+            raise ValueError("Corrupted binary project: size mismatch")
+        
+        manifest = json.loads(body[:manifest_size].decode('utf-8'))
+        data = memoryview(body)[manifest_size:]
+        
+        # Сотні тисяч нових об'єктів раз у раз запускали б циклічний GC - вимикаємо на час збирання
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return ProjectIO._decode_binary(manifest, data)
+        finally:
+            if gc_enabled:
+                gc.enable()
+    
+    @staticmethod
+    def _decode_binary(manifest, data):
+        """Зібрати фігури, групи та межі полотна з маніфесту та буфера масивів"""
+        ends = _unpack_numbers(manifest['strings']['ends'], data)
+        blob = _read_array(manifest['strings']['data'], data).tobytes()
+        strings = [sys.intern(blob[start:end].decode('utf-8'))
+                   for start, end in zip([0] + ends[:-1], ends)]
+        
+        columns = {name: _unpack_numbers(ref, data) for name, ref in manifest['columns'].items()}
+        count = manifest['count']
+        
+        # Координати: записи будуються блоками - один конструктор на (kind, ключі)
+        coords_rows = [None] * count
+        for block in manifest['blocks']:
+            keys = block['keys']
+            build = coords_factory(block['kind'], keys)
+            rows = _unpack_numbers(block['rows'], data)
+            values = _unpack_numbers(block['values'], data)
+            scalar_count = len(keys) - ('points' in keys)
+            key_columns = [values[i::scalar_count] for i in range(scalar_count)] if scalar_count else []
+            if 'points' in keys:
+                counts = _unpack_numbers(block['point_counts'], data)
+                flat = _unpack_numbers(block['points'], data)
+                pairs = list(zip(flat[0::2], flat[1::2]))
+                starts = np.concatenate(([0], np.cumsum(counts, dtype=np.int64))).tolist()
+                key_columns.insert(keys.index('points'),
+                                   [pairs[start:end] for start, end in zip(starts, starts[1:])])
+            for row, record_values in zip(rows, zip(*key_columns)):
+                coords_rows[row] = build(record_values)
+        
+        colors = {}  # Однакові кольори ділять один кортеж
+        flat_colors = columns['color_bgr']
+        color_rows = [colors.setdefault(color, color)
+                      for color in zip(flat_colors[0::3], flat_colors[1::3], flat_colors[2::3])]
+        
+        shapes = []
+        for kind, color, thickness, style, line_style, dash_length, dot_length, font_scale, flag, text, coords in zip(
+                columns['kind'], color_rows, columns['thickness'], columns['style'], columns['line_style'],
+                columns['dash_length'], columns['dot_length'], columns['font_scale'], columns['flags'],
+                columns['text'], coords_rows):
+            # Те саме, що Shape.__init__, але записи координат вже побудовані
+            shape = Shape.__new__(Shape)
+            shape.id = None
+            shape.kind = strings[kind]
+            shape.color_bgr = color
+            shape.thickness = thickness
+            shape.style = strings[style]
+            shape.line_style = strings[line_style]
+            shape.text = strings[text]
+            shape.font_scale = font_scale
+            shape.filled = bool(flag & _FILLED)
+            shape.dash_length = dash_length
+            shape.dot_length = dot_length
+            shape.dynamic = bool(flag & _DYNAMIC)
+            shape._coords = coords
+            shapes.append(shape)
+        
+        groups_data = None
+        if 'groups' in manifest:
+            groups_data = {
+                'groups': [
+                    {
+                        'name': strings[g['name']],
+                        'shape_indices': _unpack_numbers(g['shape_indices'], data),
+                        'color': g['color'],
+                    }
+                    for g in manifest['groups']
+                ]
+            }
+        
+        return shapes, groups_data, manifest.get('canvas_limits')
@@ -11,7 +11,11 @@ from ui_group_panel import GroupPanel
 
 
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self):
+    def __init__(self, columnar=False):
+        """
+        Args:
+            columnar: стовпцеве сховище фігур (ShapeManager(columnar=True))
+        """
         super().__init__()
         self.setWindowTitle("OpenCV HUD Editor")
         self.resize(800, 600)
@@ -19,7 +23,7 @@ class MainWindow(QtWidgets.QMainWindow):
         # Встановлюємо політику фокусу для прийому клавіатурних подій
         self.setFocusPolicy(QtCore.Qt.StrongFocus)
 
-        self.canvas = CanvasWidget()
+        self.canvas = CanvasWidget(columnar=columnar)
         self.setCentralWidget(self.canvas)
 
         # Створюємо панель груп
@@ -79,9 +83,15 @@ class MainWindow(QtWidgets.QMainWindow):
         undo_action = QtWidgets.QAction("&Undo", self)
         undo_action.setShortcut("Z")
         undo_action.setStatusTip("Undo last action")
-        undo_action.triggered.connect(self.canvas.undo)
+        undo_action.triggered.connect(self.undo)
         edit_menu.addAction(undo_action)
         
+        redo_action = QtWidgets.QAction("&Redo", self)
+        redo_action.setShortcut("Ctrl+Y")
+        redo_action.setStatusTip("Redo last undone action")
+        redo_action.triggered.connect(self.redo)
+        edit_menu.addAction(redo_action)
+        
         edit_menu.addSeparator()
         
         copy_action = QtWidgets.QAction("&Copy", self)
@@ -130,6 +140,13 @@ class MainWindow(QtWidgets.QMainWindow):
         
         edit_menu.addSeparator()
         
+        dynamic_action = QtWidgets.QAction("Toggle D&ynamic", self)
+        dynamic_action.setStatusTip("Mark selected shapes as dynamic (drawn every frame, not cached in exported overlay)")
+        dynamic_action.triggered.connect(self.toggle_dynamic_selected)
+        edit_menu.addAction(dynamic_action)
+        
+        edit_menu.addSeparator()
+        
         clear_action = QtWidgets.QAction("C&lear All", self)
         clear_action.setStatusTip("Clear all shapes")
         clear_action.triggered.connect(self.canvas.clear_all)
@@ -343,8 +360,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.coords_label = QtWidgets.QLabel("")
         self.shape_info_label = QtWidgets.QLabel("")
         self.zoom_label = QtWidgets.QLabel("Zoom: 100%")
+        self.render_stats_label = QtWidgets.QLabel("")
         self.statusBar().addPermanentWidget(self.coords_label)
         self.statusBar().addPermanentWidget(self.shape_info_label)
+        self.statusBar().addPermanentWidget(self.render_stats_label)
         self.statusBar().addPermanentWidget(self.zoom_label)
         
         # Підключення сигналів
@@ -352,6 +371,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.canvas.mouse_moved.connect(self.on_mouse_moved)
         self.canvas.shape_info_changed.connect(self.on_shape_info_changed)
         self.canvas.zoom_changed.connect(self.on_zoom_changed)
+        self.canvas.render_stats_changed.connect(self.on_render_stats_changed)
         
         # Ініціалізація початкових значень
         self.on_color_preset_changed('Green')
@@ -395,6 +415,10 @@ class MainWindow(QtWidgets.QMainWindow):
             info = autosave.get_autosave_info()
             
             if info:
+                canvas_line = ""
+                if info['canvas']:
+                    canvas_line = f"Canvas: {info['canvas'][0]}x{info['canvas'][1]}\n"
+                
                 msg = QtWidgets.QMessageBox(self)
                 msg.setIcon(QtWidgets.QMessageBox.Question)
                 msg.setWindowTitle("Restore Session")
@@ -402,7 +426,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 msg.setInformativeText(
                     f"Last saved: {info['modified'].strftime('%Y-%m-%d %H:%M:%S')}\n"
                     f"Shapes: {info['shapes']}\n"
-                    f"Groups: {info['groups']}\n\n"
+                    f"Groups: {info['groups']}\n"
+                    f"{canvas_line}\n"
                     f"Do you want to restore it?"
                 )
                 msg.setStandardButtons(QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
@@ -411,7 +436,12 @@ class MainWindow(QtWidgets.QMainWindow):
                 reply = msg.exec_()
                 
                 if reply == QtWidgets.QMessageBox.Yes:
-                    if autosave.load_autosave():
+                    dialog, progress = self._create_load_progress("Restoring session...")
+                    try:
+                        restored = autosave.load_autosave(progress)
+                    finally:
+                        dialog.close()
+                    if restored:
                         # Оновлюємо панель груп
                         if hasattr(self, 'group_panel'):
                             self.group_panel.refresh_groups()
@@ -494,7 +524,8 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def _save_now_and_update(self, autosave, label):
         """Зберегти зараз та оновити label"""
-        autosave.autosave()
+        autosave.autosave(force=True)
+        autosave.wait()
         if autosave.has_autosave():
             info = autosave.get_autosave_info()
             if info:
@@ -519,6 +550,12 @@ class MainWindow(QtWidgets.QMainWindow):
         zoom_percent = int(zoom_factor * 100)
         self.zoom_label.setText(f"Zoom: {zoom_percent}%")
     
+    def on_render_stats_changed(self, drawn: int, culled: int):
+        if culled:
+            self.render_stats_label.setText(f"Drawn: {drawn} | Culled: {culled}")
+        else:
+            self.render_stats_label.setText("")
+    
     def on_color_preset_changed(self, preset_name: str):
         if preset_name in COLOR_PRESETS:
             color_bgr = COLOR_PRESETS[preset_name]
@@ -546,7 +583,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def on_thickness_changed(self, value: int):
         self.canvas.set_thickness(value)
         # Якщо є вибрані фігури - змінюємо їх товщину
-        self._apply_to_selected_shapes('thickness', value)
+        self._apply_to_selected_shapes('thickness', value, continuous=True)
     
     def on_style_changed(self, style: str):
         self.canvas.set_style(style)
@@ -556,7 +593,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def on_font_scale_changed(self, value: float):
         self.canvas.set_font_scale(value)
         # Якщо є вибрані фігури тексту - змінюємо їх розмір
-        self._apply_to_selected_shapes('font_scale', value)
+        self._apply_to_selected_shapes('font_scale', value, continuous=True)
     
     def on_line_style_changed(self, line_style: str):
         """Обробник зміни стилю лінії"""
@@ -568,13 +605,13 @@ class MainWindow(QtWidgets.QMainWindow):
         """Обробник зміни довжини пунктира"""
         self.canvas.set_dash_length(value)
         # Якщо є вибрані фігури - змінюємо їх довжину пунктира
-        self._apply_to_selected_shapes('dash_length', value)
+        self._apply_to_selected_shapes('dash_length', value, continuous=True)
     
     def on_dot_length_changed(self, value: int):
         """Обробник зміни відстані між точками"""
         self.canvas.set_dot_length(value)
         # Якщо є вибрані фігури - змінюємо їх відстань між точками
-        self._apply_to_selected_shapes('dot_length', value)
+        self._apply_to_selected_shapes('dot_length', value, continuous=True)
     
     def on_filled_toggled(self, checked: bool):
         """Обробник зміни заповнення фігур"""
@@ -582,46 +619,34 @@ class MainWindow(QtWidgets.QMainWindow):
         # Якщо є вибрані фігури - змінюємо їх заповнення
         self._apply_to_selected_shapes('filled', checked)
     
-    def _apply_to_selected_shapes(self, property_name: str, value):
-        """Застосувати зміни до вибраних фігур"""
+    def _apply_to_selected_shapes(self, property_name: str, value, continuous=False):
+        """Застосувати зміни до вибраних фігур (з записом в історію)
+
+        continuous - крок прокрутки спінбоксу: кроки зливаються в одну команду
+        """
         if not self.canvas.selected_shapes:
             return
         
-        changed = False
-        for idx in self.canvas.selected_shapes:
-            if 0 <= idx < len(self.canvas.shapes):
-                shape = self.canvas.shapes[idx]
-                
-                if property_name == 'color':
-                    shape.color_bgr = value
-                    changed = True
-                elif property_name == 'thickness':
-                    shape.thickness = value
-                    changed = True
-                elif property_name == 'style':
-                    shape.style = value
-                    changed = True
-                elif property_name == 'font_scale':
-                    # Тільки для тексту
-                    if shape.kind == 'text':
-                        shape.font_scale = value
-                        changed = True
-                elif property_name == 'line_style':
-                    shape.line_style = value
-                    changed = True
-                elif property_name == 'dash_length':
-                    shape.dash_length = value
-                    changed = True
-                elif property_name == 'dot_length':
-                    shape.dot_length = value
-                    changed = True
-                elif property_name == 'filled':
-                    # Тільки для фігур, які можуть бути заповненими
-                    if shape.kind in ['circle', 'rectangle', 'ellipse', 'polygon']:
-                        shape.filled = value
-                        changed = True
-        
-        if changed:
+        shape_manager = self.canvas.shape_manager
+        attr = 'color_bgr' if property_name == 'color' else property_name
+        old_values = {}
+        for shape_id in self.canvas.selected_shapes:
+            shape = shape_manager.get_shape(shape_id)
+            if shape is None:
+                continue
+            # Розмір шрифту - тільки для тексту, заливка - тільки для замкнених фігур
+            if property_name == 'font_scale' and shape.kind != 'text':
+                continue
+            if property_name == 'filled' and shape.kind not in ['circle', 'rectangle', 'ellipse', 'polygon']:
+                continue
+            old_values[shape_id] = getattr(shape, attr)
+            setattr(shape, attr, value)
+        
+        if old_values:
+            # Розмір шрифту змінює рамку тексту - оновлюємо індекс. До запису в
+            # історію: він може одразу зробити знімок автозбереження
+            shape_manager.mark_shapes_changed(old_values)
+            self.canvas.history.record_property(attr, old_values, value, continuous)
             self.canvas.update()
 
     def keyPressEvent(self, event: QtGui.QKeyEvent):
@@ -682,7 +707,11 @@ class MainWindow(QtWidgets.QMainWindow):
             elif key == QtCore.Qt.Key_0 or key == QtCore.Qt.Key_Home:
                 self.canvas.reset_zoom()
             elif key == QtCore.Qt.Key_Z or text in ['Z', 'Я']:
-                self.canvas.undo()
+                # Shift+Z - повторити
+                if modifiers & QtCore.Qt.ShiftModifier:
+                    self.redo()
+                else:
+                    self.undo()
             elif key == QtCore.Qt.Key_F5:
                 self.export_code()
             else:
@@ -700,22 +729,59 @@ class MainWindow(QtWidgets.QMainWindow):
             # Ctrl+T для тестування на камері
             elif key == QtCore.Qt.Key_T or text in ['T', 'Е']:
                 self.show_camera_preview()
+            # Ctrl+Z / Ctrl+Shift+Z / Ctrl+Y - скасувати / повторити
+            elif key == QtCore.Qt.Key_Z or text in ['Z', 'Я']:
+                if modifiers & QtCore.Qt.ShiftModifier:
+                    self.redo()
+                else:
+                    self.undo()
+            elif key == QtCore.Qt.Key_Y or text in ['Y', 'Н']:
+                self.redo()
             else:
                 super().keyPressEvent(event)
     
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        """Дописати відкладене автозбереження перед закриттям"""
+        self.canvas.autosave_manager.flush()
+        super().closeEvent(event)
+    
+    def undo(self):
+        """Скасувати останню дію"""
+        if self.canvas.undo() and hasattr(self, 'group_panel'):
+            self.group_panel.refresh_groups()
+    
+    def redo(self):
+        """Повторити скасовану дію"""
+        if self.canvas.redo() and hasattr(self, 'group_panel'):
+            self.group_panel.refresh_groups()
+    
     def delete_selected(self):
         """Видалити вибрані фігури"""
         if not self.canvas.selected_shapes:
             return
         
-        # Видаляємо фігури (від кінця до початку, щоб індекси не зміщувалися)
-        for idx in sorted(self.canvas.selected_shapes, reverse=True):
-            if 0 <= idx < len(self.canvas.shapes):
-                del self.canvas.shapes[idx]
+        # Разом з фігурами прибираємо їх ID з груп
+        self.canvas.delete_shapes(list(self.canvas.selected_shapes))
         
         self.canvas.selected_shapes.clear()
+        if hasattr(self, 'group_panel'):
+            self.group_panel.refresh_groups()
         self.canvas.update()
 
+    def toggle_dynamic_selected(self):
+        """Позначити вибрані фігури як динамічні (або зняти позначку)"""
+        if not self.canvas.selected_shapes:
+            return
+
+        shape_manager = self.canvas.shape_manager
+        selected = [shape_manager.get_shape(shape_id) for shape_id in shape_manager.sort_ids(self.canvas.selected_shapes)]
+        # Якщо всі вже динамічні - знімаємо позначку, інакше встановлюємо
+        value = not all(getattr(shape, 'dynamic', False) for shape in selected)
+        self._apply_to_selected_shapes('dynamic', value)
+
+        state = "dynamic" if value else "static"
+        self.statusBar().showMessage(f"{len(selected)} shape(s) marked as {state}", 2000)
+
     def export_code(self):
         canvas_rect = self.canvas.rect()
         canvas_width = canvas_rect.width()
@@ -756,6 +822,13 @@ class MainWindow(QtWidgets.QMainWindow):
         info_label.setWordWrap(True)
         options_layout.addWidget(info_label)
         
+        self.cache_overlay_check = QtWidgets.QCheckBox("Cache static overlay (render once, composite per frame)")
+        self.cache_overlay_check.setToolTip(
+            "Static shapes are rasterized once per frame size and blended onto each frame.\n"
+            "Shapes marked as dynamic (Edit → Toggle Dynamic) are drawn every frame on top."
+        )
+        options_layout.addWidget(self.cache_overlay_check)
+        
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
         
@@ -776,11 +849,13 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def _generate_and_show_code(self, parent_dlg, canvas_width, canvas_height):
         origin_mode = self.origin_combo.currentData()
+        cache_overlay = self.cache_overlay_check.isChecked()
         
         code = self.canvas.generate_opencv_code(
             origin_mode=origin_mode,
             canvas_width=canvas_width,
-            canvas_height=canvas_height
+            canvas_height=canvas_height,
+            cache_overlay=cache_overlay
         )
         
         parent_dlg.accept()
@@ -851,14 +926,18 @@ class MainWindow(QtWidgets.QMainWindow):
                 )
     
     def save_project(self):
-        """Зберегти проект у JSON файл"""
-        filename, _ = QtWidgets.QFileDialog.getSaveFileName(
+        """Зберегти проект у JSON або бінарний (.hudp) файл"""
+        filename, selected_filter = QtWidgets.QFileDialog.getSaveFileName(
             self,
             "Save Project",
             "",
-            "JSON Files (*.json);;All Files (*)"
+            "JSON Files (*.json);;HUD Binary Project (*.hudp);;All Files (*)"
         )
         
+        # Формат визначається розширенням - додаємо його для бінарного фільтра
+        if filename and selected_filter.startswith("HUD Binary") and not filename.lower().endswith('.hudp'):
+            filename += '.hudp'
+        
         if filename:
             try:
                 self.canvas.save_project(filename)
@@ -875,17 +954,21 @@ class MainWindow(QtWidgets.QMainWindow):
                 )
     
     def load_project(self):
-        """Завантажити проект з JSON файлу"""
+        """Завантажити проект з JSON або бінарного (.hudp) файлу"""
         filename, _ = QtWidgets.QFileDialog.getOpenFileName(
             self,
             "Load Project",
             "",
-            "JSON Files (*.json);;All Files (*)"
+            "Projects (*.json *.hudp);;JSON Files (*.json);;HUD Binary Project (*.hudp);;All Files (*)"
         )
         
         if filename:
+            dialog, progress = self._create_load_progress("Loading project...")
             try:
-                self.canvas.load_project(filename)
+                try:
+                    self.canvas.load_project(filename, progress)
+                finally:
+                    dialog.close()
                 QtWidgets.QMessageBox.information(
                     self,
                     "Loaded",
@@ -898,6 +981,23 @@ class MainWindow(QtWidgets.QMainWindow):
                     f"Failed to load project:\n{str(e)}"
                 )
     
+    def _create_load_progress(self, label):
+        """Діалог прогресу для завантаження великих файлів
+        
+        Returns:
+            tuple: (QProgressDialog, callable(прочитано байт, розмір файлу))
+        """
+        dialog = QtWidgets.QProgressDialog(label, None, 0, 1000, self)
+        dialog.setWindowTitle("Loading")
+        dialog.setWindowModality(QtCore.Qt.WindowModal)
+        dialog.setMinimumDuration(500)  # Невеликі файли відкриваються без діалогу
+        
+        def progress(done, total):
+            # setValue модального діалогу обробляє події - вікно не зависає
+            dialog.setValue(min(1000, int(1000 * done / total)) if total else 1000)
+        
+        return dialog, progress
+    
     def show_canvas_limits_dialog(self):
         """Показати діалог налаштувань розміру полотна"""
         limits = self.canvas.get_canvas_limits()
@@ -3,6 +3,7 @@ OpenCV HUD Editor - головний файл додатку
 
 Редактор для створення оверлеїв HUD з експортом у OpenCV код
 """
+import argparse
 import sys
 from PyQt5 import QtWidgets
 
@@ -10,8 +11,13 @@ from main_window import MainWindow
 
 
 def main():
-    app = QtWidgets.QApplication(sys.argv)
-    win = MainWindow()
+    parser = argparse.ArgumentParser(description='OpenCV HUD Editor')
+    parser.add_argument('--columnar', action='store_true',
+                        help='зберігати фігури у стовпцевих масивах NumPy (великі сцени)')
+    args, qt_args = parser.parse_known_args()
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    win = MainWindow(columnar=args.columnar)
     win.show()
     win.setFocus()  # Явно встановлюємо фокус на вікно
     win.activateWindow()  # Активуємо вікно
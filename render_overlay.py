@@ -0,0 +1,215 @@
+"""
+Пакетне накладання HUD на відео та зображення без GUI
+
+Завантажує проект (ProjectIO.load_project) і малює HUD на кожному кадрі.
+Кожне відео рендериться цілком в одному процесі (декодування, HUD і
+кодування), кілька файлів - паралельно по файлах. Не потребує Qt, тому
+підходить для CI.
+
+Приклади:
+    python render_overlay.py project.json input.mp4 -o output.mp4
+    python render_overlay.py project.json clips/a.mp4 clips/b.mp4 -o rendered/ -j 4
+    python render_overlay.py project.json frames/ -o frames_hud/
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from export.project_io import ProjectIO
+from rendering.cv_renderer import HudOverlay
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+# Стан процесу-воркера: фігури, розмір полотна, растеризований HUD
+_worker = {}
+
+
+def _init_worker(project_file):
+    """Ініціалізація процесу: завантажити проект один раз"""
+    shapes, _, canvas_limits = ProjectIO.load_project(project_file)
+    _worker['shapes'] = shapes
+    _worker['target_size'] = get_target_size(canvas_limits)
+    _worker['overlay'] = HudOverlay()
+
+
+def get_target_size(canvas_limits):
+    """Розмір вихідних кадрів: межі полотна або None (розмір джерела)"""
+    if canvas_limits and canvas_limits.get('enabled'):
+        return int(canvas_limits['width']), int(canvas_limits['height'])
+    return None
+
+
+def _render_frame(frame):
+    """Масштабувати кадр під полотно та накласти HUD"""
+    size = _worker['target_size']
+    if size is not None and (frame.shape[1], frame.shape[0]) != size:
+        frame = cv2.resize(frame, size)
+    return _worker['overlay'].apply(frame, 0, _worker['shapes'])
+
+
+def _render_video_file(video_path, output_path, fourcc):
+    """Воркер: відрендерити все відео послідовно
+
+    Returns:
+        int: кількість кадрів
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video: {video_path}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    writer = None
+    frames = 0
+
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame = _render_frame(frame)
+            if writer is None:
+                writer = _open_writer(output_path, fourcc, fps, frame.shape[1], frame.shape[0])
+            writer.write(frame)
+            frames += 1
+    finally:
+        cap.release()
+        if writer is not None:
+            writer.release()
+
+    return frames
+
+
+def _render_image_file(image_path, output_path):
+    """Воркер: відрендерити одне зображення
+
+    Returns:
+        int: 1 якщо зображення оброблено
+    """
+    frame = cv2.imread(image_path, cv2.IMREAD_COLOR)
+    if frame is None:
+        raise IOError(f"Cannot read image: {image_path}")
+
+    if not cv2.imwrite(output_path, _render_frame(frame)):
+        raise IOError(f"Cannot write image: {output_path}")
+    return 1
+
+
+def _open_writer(output_path, fourcc, fps, width, height):
+    """Відкрити VideoWriter з перевіркою"""
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"Cannot open video writer: {output_path}")
+    return writer
+
+
+def collect_inputs(inputs):
+    """Розкрити каталоги зображень у списки файлів
+
+    Returns:
+        tuple: (videos, images) - списки шляхів
+    """
+    videos = []
+    images = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    images.append(os.path.join(path, name))
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            images.append(path)
+        else:
+            videos.append(path)
+    return videos, images
+
+
+def build_output_path(input_path, output, single_file):
+    """Шлях вихідного файлу
+
+    Для одного відео output - це файл (за замовчуванням <ім'я>_hud.mp4),
+    інакше - каталог, у якому зберігаються файли з тими ж іменами.
+    """
+    if single_file:
+        if output:
+            return output
+        stem = os.path.splitext(input_path)[0]
+        return f"{stem}_hud.mp4"
+    return os.path.join(output, os.path.basename(input_path))
+
+
+def parse_args(argv=None):
+    """Розібрати аргументи командного рядка"""
+    parser = argparse.ArgumentParser(
+        description="Render a saved HUD project onto video files or image directories (no GUI)."
+    )
+    parser.add_argument("project", help="HUD project file (.json)")
+    parser.add_argument("inputs", nargs="+", help="Input video files, images or image directories")
+    parser.add_argument("-o", "--output",
+                        help="Output video file (single video input) or output directory")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Number of files rendered in parallel (default: CPU count); "
+                             "each video is rendered in a single process")
+    parser.add_argument("--fourcc", default="mp4v",
+                        help="FourCC codec for output videos (default: mp4v)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = max(1, args.jobs)
+
+    videos, images = collect_inputs(args.inputs)
+    if not videos and not images:
+        print("No input files found", file=sys.stderr)
+        return 1
+
+    single_video = len(videos) == 1 and not images
+    if not single_video:
+        if not args.output:
+            print("--output directory is required for multiple inputs or image directories",
+                  file=sys.stderr)
+            return 1
+        os.makedirs(args.output, exist_ok=True)
+
+    tasks = [(path, _render_video_file,
+              (path, build_output_path(path, args.output, single_video), args.fourcc))
+             for path in videos]
+    tasks += [(path, _render_image_file, (path, build_output_path(path, args.output, False)))
+              for path in images]
+    # Паралелимо лише по файлах: більше процесів, ніж файлів, не допоможе
+    jobs = min(jobs, len(tasks))
+
+    start_time = time.perf_counter()
+    total_frames = 0
+
+    if jobs == 1:
+        # Один процес - без пулу і передачі кадрів між процесами
+        _init_worker(args.project)
+        for path, func, func_args in tasks:
+            frames = func(*func_args)
+            if func is _render_video_file:
+                print(f"{path} -> {func_args[1]}: {frames} frames")
+            total_frames += frames
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(args.project,)) as pool:
+            futures = [(path, func, func_args, pool.submit(func, *func_args))
+                       for path, func, func_args in tasks]
+            for path, func, func_args, future in futures:
+                frames = future.result()
+                if func is _render_video_file:
+                    print(f"{path} -> {func_args[1]}: {frames} frames")
+                total_frames += frames
+
+    elapsed = time.perf_counter() - start_time
+    fps = total_frames / elapsed if elapsed > 0 else 0.0
+    print(f"Rendered {total_frames} frames in {elapsed:.2f} s ({fps:.1f} frames/s, {jobs} workers)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
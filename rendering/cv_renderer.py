@@ -0,0 +1,215 @@
+"""
+Растеризація фігур засобами OpenCV (без залежності від Qt)
+
+Використовується попереднім переглядом камери та пакетним рендером.
+"""
+import cv2
+import numpy as np
+
+from shape import (circle_coords, ellipse_coords, is_cubic_curve, line_coords,
+                   point_coords)
+from utils.bezier import bezier_points, estimate_curve_steps, get_curve_control_points
+from utils.dash_pattern import draw_dash_pattern, draw_dot_pattern
+
+
+class CvRenderer:
+    """Малювання фігур на BGR кадрі через OpenCV"""
+    
+    @staticmethod
+    def draw_shapes(frame, shapes):
+        """Намалювати всі фігури на кадрі"""
+        for shape in shapes:
+            CvRenderer.draw_shape(frame, shape)
+    
+    @staticmethod
+    def draw_shape(frame, shape):
+        """Намалювати одну фігуру на кадрі (BGR numpy масив)"""
+        color = shape.color_bgr
+        thickness = shape.thickness
+        
+        # Безпечно отримуємо стиль лінії
+        line_style = getattr(shape, 'line_style', 'solid')
+        dash_length = getattr(shape, 'dash_length', 10)
+        dot_length = getattr(shape, 'dot_length', 5)
+        
+        if shape.kind == 'line':
+            x1, y1, x2, y2 = map(int, line_coords(shape.coords))
+            
+            if line_style == 'solid':
+                cv2.line(frame, (x1, y1), (x2, y2), color, thickness, cv2.LINE_AA)
+            elif line_style == 'dashed':
+                CvRenderer._draw_dashed_line(frame, (x1, y1), (x2, y2), color, thickness, dash_length)
+            elif line_style == 'dotted':
+                CvRenderer._draw_dotted_line(frame, (x1, y1), (x2, y2), color, thickness, dot_length)
+            else:
+                # За замовчуванням суцільна лінія
+                cv2.line(frame, (x1, y1), (x2, y2), color, thickness, cv2.LINE_AA)
+        
+        elif shape.kind == 'circle':
+            cx, cy = int(shape.coords['cx']), int(shape.coords['cy'])
+            radius = int(shape.coords.get('radius', shape.coords.get('r', 10)))
+            fill = -1 if shape.filled else thickness
+            cv2.circle(frame, (cx, cy), radius, color, fill, cv2.LINE_AA)
+        
+        elif shape.kind == 'rectangle':
+            x1, y1, x2, y2 = map(int, line_coords(shape.coords))
+            fill = -1 if shape.filled else thickness
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, fill, cv2.LINE_AA)
+        
+        elif shape.kind == 'arrow':
+            x1, y1, x2, y2 = map(int, line_coords(shape.coords))
+            
+            if line_style == 'solid':
+                cv2.arrowedLine(frame, (x1, y1), (x2, y2), color, thickness, cv2.LINE_AA, tipLength=0.3)
+            elif line_style == 'dashed':
+                # Для пунктирних стрілок малюємо пунктирну лінію
+                CvRenderer._draw_dashed_line(frame, (x1, y1), (x2, y2), color, thickness, dash_length)
+            elif line_style == 'dotted':
+                # Для точкових стрілок малюємо точкову лінію
+                CvRenderer._draw_dotted_line(frame, (x1, y1), (x2, y2), color, thickness, dot_length)
+            else:
+                # За замовчуванням суцільна стрілка
+                cv2.arrowedLine(frame, (x1, y1), (x2, y2), color, thickness, cv2.LINE_AA, tipLength=0.3)
+        
+        elif shape.kind == 'ellipse':
+            cx, cy, rx, ry = map(int, ellipse_coords(shape.coords))
+            fill = -1 if shape.filled else thickness
+            cv2.ellipse(frame, (cx, cy), (rx, ry), 0, 0, 360, color, fill, cv2.LINE_AA)
+        
+        elif shape.kind == 'point':
+            x, y = map(int, point_coords(shape.coords))
+            cv2.circle(frame, (x, y), thickness, color, -1, cv2.LINE_AA)
+        
+        elif shape.kind == 'polygon':
+            points = shape.coords['points']
+            pts = np.array([[int(p[0]), int(p[1])] for p in points], np.int32)
+            pts = pts.reshape((-1, 1, 2))
+            fill = shape.filled
+            if fill:
+                cv2.fillPoly(frame, [pts], color, cv2.LINE_AA)
+            else:
+                cv2.polylines(frame, [pts], True, color, thickness, cv2.LINE_AA)
+        
+        elif shape.kind == 'text':
+            x, y = map(int, point_coords(shape.coords))
+            text = shape.text
+            font_scale = shape.font_scale
+            cv2.putText(frame, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 
+                       font_scale, color, thickness, cv2.LINE_AA)
+        
+        elif shape.kind == 'curve':
+            # Малюємо криву Безьє (квадратичну або кубічну)
+            c = shape.coords
+            
+            is_cubic = is_cubic_curve(c)
+            steps = estimate_curve_steps(c, is_cubic)
+            
+            # Точки кривої (квадратичної або кубічної) одним матричним множенням
+            points = bezier_points(get_curve_control_points(c), steps)
+            
+            # Малюємо зі стилем
+            if line_style == 'dashed':
+                # Малюємо пунктирну криву, враховуючи безперервність
+                CvRenderer._draw_dashed_polyline(frame, points, color, thickness, dash_length)
+            elif line_style == 'dotted':
+                # Малюємо точкову криву, враховуючи безперервність
+                CvRenderer._draw_dotted_polyline(frame, points, color, thickness, dot_length)
+            else:
+                # Суцільна крива (за замовчуванням)
+                pts = points.astype(np.int32).reshape((-1, 1, 2))
+                cv2.polylines(frame, [pts], False, color, thickness, cv2.LINE_AA)
+    
+    @staticmethod
+    def _draw_dashed_line(frame, pt1, pt2, color, thickness, dash_length):
+        """Намалювати пунктирну лінію"""
+        draw_dash_pattern(frame, (pt1, pt2), color, thickness, dash_length)
+    
+    @staticmethod
+    def _draw_dotted_line(frame, pt1, pt2, color, thickness, dot_spacing):
+        """Намалювати точкову лінію"""
+        draw_dot_pattern(frame, (pt1, pt2), color, thickness, dot_spacing, include_end=False)
+    
+    @staticmethod
+    def _draw_dashed_polyline(frame, points, color, thickness, dash_length):
+        """Намалювати пунктир вздовж polyline (кожен штрих — рівна пряма)"""
+        draw_dash_pattern(frame, points, color, thickness, dash_length)
+    
+    @staticmethod
+    def _draw_dotted_polyline(frame, points, color, thickness, dot_spacing):
+        """Намалювати точкову polyline з рівномірним кроком (з точкою в кінці)"""
+        draw_dot_pattern(frame, points, color, max(1, thickness), dot_spacing)
+
+
+class HudOverlay:
+    """Попередньо растеризований HUD для швидкого накладання на кадри
+    
+    HUD малюється один раз на чорному та білому фоні: різниця між ними
+    дає точну alpha з урахуванням згладжування (LINE_AA), навіть для
+    чорних фігур. Перемальовується лише при зміні розміру кадру або
+    версії сцени.
+    """
+    
+    def __init__(self):
+        self._overlay = None  # (overlay, transmission, roi)
+        self._key = None
+    
+    def get(self, width, height, version, shapes):
+        """Отримати растеризований HUD для кадру заданого розміру
+        
+        Args:
+            width, height: розмір кадру
+            version: версія сцени, з якої знято фігури
+            shapes: список фігур
+            
+        Returns:
+            tuple: (overlay, transmission, roi)
+                overlay - HUD, намальований на чорному фоні (BGR, помножений на alpha)
+                transmission - (1 - alpha) * 255 для кожного каналу
+                roi - (x, y, w, h) області з HUD або None, якщо HUD порожній
+        """
+        key = (width, height, version)
+        if self._overlay is not None and self._key == key:
+            return self._overlay
+        
+        on_black = np.zeros((height, width, 3), np.uint8)
+        on_white = np.full((height, width, 3), 255, np.uint8)
+        for shape in shapes:
+            CvRenderer.draw_shape(on_black, shape)
+            CvRenderer.draw_shape(on_white, shape)
+        
+        transmission = cv2.subtract(on_white, on_black)
+        
+        coverage = 255 - transmission.min(axis=2)
+        points = cv2.findNonZero(coverage)
+        roi = cv2.boundingRect(points) if points is not None else None
+        
+        self._overlay = (on_black, transmission, roi)
+        self._key = key
+        return self._overlay
+    
+    def apply(self, frame, version, shapes):
+        """Накласти HUD на кадр (на місці)
+        
+        Args:
+            frame: BGR кадр (uint8), змінюється на місці
+            version: версія сцени
+            shapes: список фігур
+            
+        Returns:
+            frame
+        """
+        if not shapes:
+            return frame
+        
+        height, width = frame.shape[:2]
+        overlay, transmission, roi = self.get(width, height, version, shapes)
+        if roi is None:
+            return frame
+        
+        # frame = frame * (1 - alpha) + overlay, тільки в області з HUD
+        x, y, w, h = roi
+        frame_roi = frame[y:y + h, x:x + w]
+        cv2.multiply(frame_roi, transmission[y:y + h, x:x + w], dst=frame_roi, scale=1.0 / 255)
+        cv2.add(frame_roi, overlay[y:y + h, x:x + w], dst=frame_roi)
+        
+        return frame
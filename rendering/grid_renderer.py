@@ -1,15 +1,51 @@
 """
 Рендер сітки та центральних осей
 """
+import math
+from collections import OrderedDict
+
 from PyQt5 import QtGui, QtCore
 
 
+# Мінімальна відстань між лініями сітки на екрані (px) - щільніші лінії проріджуються
+MIN_GRID_SPACING = 4
+
+# Згенеровані лінії покривають діапазон, округлений до блоків з такої кількості
+# кроків - невеликий пан не вимагає перебудови
+_GRID_BLOCK = 32
+
+# Розмір плитки фону в логічних пікселях екрану
+TILE_SIZE = 256
+
+
 class GridRenderer:
-    """Клас для малювання сітки та центральних осей"""
+    """Клас для малювання сітки та центральних осей
+    
+    Лінії сітки генеруються двома масивами (тонкі та жирні) і малюються
+    одним drawLines на масив. Масиви кешуються за (діапазон, крок сітки,
+    крок жирних ліній, вирівнювання); при віддаленні тонкі лінії
+    ховаються, а жирні проріджуються, щоб між лініями було не менше
+    MIN_GRID_SPACING пікселів.
+    
+    Фон (сітка та межі полотна) для екрану складається з плиток TILE_SIZE,
+    прив'язаних до world координат і закешованих в LRU - при пануванні
+    малюються лише нові плитки, решта копіюється.
+    """
     
     def __init__(self, grid_step=5, grid_bold_step=20):
         self.grid_step = grid_step
         self.grid_bold_step = grid_bold_step  # Кожна 20-та лінія жирна (кожні 100px при grid_step=5)
+        
+        self.pen_thin = QtGui.QPen(QtGui.QColor(40, 40, 40))
+        self.pen_thin.setWidth(1)
+        self.pen_bold = QtGui.QPen(QtGui.QColor(60, 60, 60))
+        self.pen_bold.setWidth(1)
+        
+        self._lines_key = None
+        self._lines = ([], [])
+        
+        self.tile_cache_size = 256  # Плиток у кеші (~256 КБ кожна)
+        self._tiles = OrderedDict()  # (i, j, налаштування) -> QPixmap
     
     def draw_grid(self, painter, rect, zoom_pan_manager, canvas_limits=None):
         """Намалювати сітку
@@ -20,117 +56,146 @@ class GridRenderer:
             zoom_pan_manager: менеджер зуму та панування
             canvas_limits: dict з налаштуваннями меж полотна (опціонально)
         """
-        screen_width = rect.width()
-        screen_height = rect.height()
+        world_rect = zoom_pan_manager.get_visible_world_rect(rect.width(), rect.height())
+        self._draw_grid_lines(painter, world_rect, zoom_pan_manager.zoom_factor, canvas_limits)
+    
+    def _draw_grid_lines(self, painter, world_rect, zoom, canvas_limits):
+        thin, bold = self.get_grid_lines(world_rect, zoom, canvas_limits)
+        if thin:
+            painter.setPen(self.pen_thin)
+            painter.drawLines(thin)
+        if bold:
+            painter.setPen(self.pen_bold)
+            painter.drawLines(bold)
+    
+    def get_grid_lines(self, world_rect, zoom, canvas_limits=None):
+        """Лінії сітки для видимої області
         
-        world_x_min, world_y_min = zoom_pan_manager.screen_to_world(0, 0)
-        world_x_max, world_y_max = zoom_pan_manager.screen_to_world(screen_width, screen_height)
+        Args:
+            world_rect: (min_x, min_y, max_x, max_y) у world координатах
+            zoom: масштаб (для проріджування)
+            canvas_limits: з увімкненими межами сітка вирівнюється по центру полотна
+        
+        Returns:
+            tuple: (тонкі, жирні) - списки QLineF
+        """
+        # Якщо є обмеження полотна - сітка вирівняна по центру полотна
+        if canvas_limits and canvas_limits.get('enabled'):
+            origin_x = canvas_limits['width'] / 2.0
+            origin_y = canvas_limits['height'] / 2.0
+        else:
+            origin_x = origin_y = 0.0
+        
+        # Крок, з яким малюються лінії: тонкі ховаються, жирні проріджуються вдвічі
+        step = self.grid_step
+        bold_every = max(1, self.grid_bold_step)
+        thin_visible = step * zoom >= MIN_GRID_SPACING
+        if not thin_visible:
+            step *= bold_every
+            bold_every = 1
+            while step * zoom < MIN_GRID_SPACING:
+                step *= 2
+        
+        block = step * _GRID_BLOCK
+        min_x, min_y, max_x, max_y = world_rect
+        kx0 = math.floor((min_x - origin_x) / block) * _GRID_BLOCK
+        kx1 = math.ceil((max_x - origin_x) / block) * _GRID_BLOCK
+        ky0 = math.floor((min_y - origin_y) / block) * _GRID_BLOCK
+        ky1 = math.ceil((max_y - origin_y) / block) * _GRID_BLOCK
+        
+        key = (step, bold_every, origin_x, origin_y, kx0, kx1, ky0, ky1)
+        if key == self._lines_key:
+            return self._lines
+        
+        x_start = origin_x + kx0 * step
+        x_end = origin_x + kx1 * step
+        y_start = origin_y + ky0 * step
+        y_end = origin_y + ky1 * step
+        
+        thin = []
+        bold = []
+        for k in range(kx0, kx1 + 1):
+            x = origin_x + k * step
+            (bold if k % bold_every == 0 else thin).append(QtCore.QLineF(x, y_start, x, y_end))
+        for k in range(ky0, ky1 + 1):
+            y = origin_y + k * step
+            (bold if k % bold_every == 0 else thin).append(QtCore.QLineF(x_start, y, x_end, y))
+        
+        self._lines_key = key
+        self._lines = (thin, bold)
+        return self._lines
+    
+    def draw_background(self, painter, rect, zoom_pan_manager, canvas_limits=None, device_pixel_ratio=1.0):
+        """Намалювати сітку та межі полотна з кешованих плиток
         
-        pen_thin = QtGui.QPen(QtGui.QColor(40, 40, 40))
-        pen_thin.setWidth(1)
+        Args:
+            painter: QPainter у координатах екрану (без world трансформації)
+            rect: прямокутник екрану
+            zoom_pan_manager: менеджер зуму та панування
+            canvas_limits: dict з налаштуваннями меж полотна (опціонально)
+            device_pixel_ratio: щільність пікселів екрану
+        """
+        zoom = zoom_pan_manager.zoom_factor
+        # Ціла частина пану зсуває плитки, дробова - входить у ключ (при
+        # пануванні мишею вона не змінюється, тож плитки перевикористовуються)
+        offset_x = math.floor(zoom_pan_manager.pan_x)
+        offset_y = math.floor(zoom_pan_manager.pan_y)
+        frac_x = round(zoom_pan_manager.pan_x - offset_x, 3)
+        frac_y = round(zoom_pan_manager.pan_y - offset_y, 3)
+        settings = (
+            zoom, frac_x, frac_y, device_pixel_ratio,
+            self.grid_step, self.grid_bold_step,
+            tuple(sorted(canvas_limits.items())) if canvas_limits else None
+        )
         
-        pen_bold = QtGui.QPen(QtGui.QColor(60, 60, 60))
-        pen_bold.setWidth(1)
+        i0 = (-offset_x) // TILE_SIZE
+        i1 = (rect.width() - 1 - offset_x) // TILE_SIZE
+        j0 = (-offset_y) // TILE_SIZE
+        j1 = (rect.height() - 1 - offset_y) // TILE_SIZE
+        # Кеш завжди вміщує кілька екранів, навіть на дуже великому моніторі
+        capacity = max(self.tile_cache_size, 3 * (i1 - i0 + 1) * (j1 - j0 + 1))
+        for j in range(j0, j1 + 1):
+            for i in range(i0, i1 + 1):
+                tile = self._get_tile(i, j, settings, canvas_limits, capacity)
+                painter.drawPixmap(offset_x + i * TILE_SIZE, offset_y + j * TILE_SIZE, tile)
+    
+    def _get_tile(self, i, j, settings, canvas_limits, capacity):
+        """Плитка фону з LRU кешу (рендер, якщо її немає)"""
+        key = (i, j, settings)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
         
-        # Якщо є обмеження полотна - малюємо сітку вирівняну по центру полотна
+        zoom, frac_x, frac_y, dpr = settings[:4]
+        tile = QtGui.QPixmap(int(TILE_SIZE * dpr), int(TILE_SIZE * dpr))
+        tile.setDevicePixelRatio(dpr)
+        tile.fill(QtGui.QColor(0, 0, 0))
+        
+        # Локальні координати плитки: screen - (ціла частина пану + позиція плитки)
+        painter = QtGui.QPainter(tile)
+        transform = QtGui.QTransform()
+        transform.translate(frac_x - i * TILE_SIZE, frac_y - j * TILE_SIZE)
+        transform.scale(zoom, zoom)
+        painter.setTransform(transform)
+        
+        world_rect = (
+            (i * TILE_SIZE - frac_x) / zoom, (j * TILE_SIZE - frac_y) / zoom,
+            ((i + 1) * TILE_SIZE - frac_x) / zoom, ((j + 1) * TILE_SIZE - frac_y) / zoom
+        )
+        self._draw_grid_lines(painter, world_rect, zoom, canvas_limits)
         if canvas_limits and canvas_limits.get('enabled'):
-            canvas_width = canvas_limits['width']
-            canvas_height = canvas_limits['height']
-            
-            # Центр полотна
-            center_x = canvas_width / 2.0
-            center_y = canvas_height / 2.0
-            
-            # Малюємо вертикальні лінії від центру в обидві сторони
-            # Спочатку центральна лінія
-            x = center_x
-            while x >= world_x_min:
-                distance_from_center = abs(x - center_x)
-                if int(distance_from_center) % (self.grid_step * self.grid_bold_step) == 0:
-                    painter.setPen(pen_bold)
-                else:
-                    painter.setPen(pen_thin)
-                painter.drawLine(
-                    QtCore.QPointF(x, world_y_min),
-                    QtCore.QPointF(x, world_y_max)
-                )
-                x -= self.grid_step
-            
-            # Праворуч від центру
-            x = center_x + self.grid_step
-            while x <= world_x_max:
-                distance_from_center = abs(x - center_x)
-                if int(distance_from_center) % (self.grid_step * self.grid_bold_step) == 0:
-                    painter.setPen(pen_bold)
-                else:
-                    painter.setPen(pen_thin)
-                painter.drawLine(
-                    QtCore.QPointF(x, world_y_min),
-                    QtCore.QPointF(x, world_y_max)
-                )
-                x += self.grid_step
-            
-            # Малюємо горизонтальні лінії від центру в обидві сторони
-            # Спочатку центральна лінія
-            y = center_y
-            while y >= world_y_min:
-                distance_from_center = abs(y - center_y)
-                if int(distance_from_center) % (self.grid_step * self.grid_bold_step) == 0:
-                    painter.setPen(pen_bold)
-                else:
-                    painter.setPen(pen_thin)
-                painter.drawLine(
-                    QtCore.QPointF(world_x_min, y),
-                    QtCore.QPointF(world_x_max, y)
-                )
-                y -= self.grid_step
-            
-            # Вниз від центру
-            y = center_y + self.grid_step
-            while y <= world_y_max:
-                distance_from_center = abs(y - center_y)
-                if int(distance_from_center) % (self.grid_step * self.grid_bold_step) == 0:
-                    painter.setPen(pen_bold)
-                else:
-                    painter.setPen(pen_thin)
-                painter.drawLine(
-                    QtCore.QPointF(world_x_min, y),
-                    QtCore.QPointF(world_x_max, y)
-                )
-                y += self.grid_step
-            
-        else:
-            # Стандартна сітка без вирівнювання
-            world_x_min_grid = int(world_x_min // self.grid_step) * self.grid_step - self.grid_step
-            world_y_min_grid = int(world_y_min // self.grid_step) * self.grid_step - self.grid_step
-            world_x_max_grid = int(world_x_max // self.grid_step) * self.grid_step + self.grid_step
-            world_y_max_grid = int(world_y_max // self.grid_step) * self.grid_step + self.grid_step
-            
-            # Вертикальні лінії
-            x = float(world_x_min_grid)
-            while x <= world_x_max_grid:
-                if int(x) % (self.grid_step * self.grid_bold_step) == 0:
-                    painter.setPen(pen_bold)
-                else:
-                    painter.setPen(pen_thin)
-                painter.drawLine(
-                    QtCore.QPointF(x, world_y_min),
-                    QtCore.QPointF(x, world_y_max)
-                )
-                x += self.grid_step
-            
-            # Горизонтальні лінії
-            y = float(world_y_min_grid)
-            while y <= world_y_max_grid:
-                if int(y) % (self.grid_step * self.grid_bold_step) == 0:
-                    painter.setPen(pen_bold)
-                else:
-                    painter.setPen(pen_thin)
-                painter.drawLine(
-                    QtCore.QPointF(world_x_min, y),
-                    QtCore.QPointF(world_x_max, y)
-                )
-                y += self.grid_step
+            self.draw_canvas_limits(painter, canvas_limits['width'], canvas_limits['height'])
+        painter.end()
+        
+        self._tiles[key] = tile
+        while len(self._tiles) > capacity:
+            self._tiles.popitem(last=False)
+        return tile
+    
+    def clear_tile_cache(self):
+        """Звільнити кешовані плитки фону"""
+        self._tiles.clear()
     
     def draw_center_axes(self, painter, rect, zoom_pan_manager, canvas_limits=None):
         """Намалювати центральні осі
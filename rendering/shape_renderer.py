@@ -4,6 +4,28 @@
 import math
 from PyQt5 import QtGui, QtCore
 
+from shape import (circle_coords, ellipse_coords, is_cubic_curve, line_coords,
+                   point_coords)
+from utils.geometry import get_shape_bbox
+
+
+# Запас для відсікання фігур за межами екрану
+CULL_MARGIN_SCREEN = 20  # пікселі екрану (маркери виділення, товщина пера)
+CULL_MARGIN_WORLD = 40  # world одиниці (радіус точок до thickness * 2)
+ARROW_HEAD_PAD = 6  # world одиниці: наскільки наконечник стрілки виходить за її рамку
+
+# Рівень деталізації (LOD): пороги в пікселях екрану
+LOD_POINT_PX = 2  # Фігура менша - малюється однією точкою
+LOD_BOX_PX = 4  # Фігура менша - малюється рамкою bounding box
+LOD_DASH_PX = 2  # Пунктир/точки коротші - лінія малюється суцільною
+LOD_TEXT_PX = 6  # Текст нижчий - малюється смужкою замість літер
+
+# Скільки пакетів однаково стилізованих фігур накопичується одночасно
+BATCH_OPEN_LIMIT = 16
+# Після стількох відкритих пакетів пакетування вимикається до кінця кадру,
+# якщо в середньому пакет не набрав і двох фігур (стилі майже не повторюються)
+BATCH_PROBE = 256
+
 
 class ShapeRenderer:
     """Клас для малювання фігур на Qt canvas"""
@@ -12,298 +34,545 @@ class ShapeRenderer:
         pass
     
     @staticmethod
-    def draw_shapes(painter, shapes, selected_shapes, zoom_factor, show_control_points=True):
-        """Намалювати всі фігури"""
-        for idx, shape in enumerate(shapes):
-            is_selected = idx in selected_shapes
-            ShapeRenderer.draw_shape(painter, shape, is_selected, zoom_factor, show_control_points)
-    
-    @staticmethod
-    def draw_shape(painter, shape, is_selected, zoom_factor, show_control_points=True):
-        """Намалювати одну фігуру"""
-        r, g, b = shape.color_bgr[2], shape.color_bgr[1], shape.color_bgr[0]
-        color = QtGui.QColor(r, g, b)
-        pen = QtGui.QPen(color)
-        pen.setWidth(max(1, int(shape.thickness / zoom_factor)))
+    def draw_shapes(painter, shapes, selected_shapes, zoom_factor, show_control_points=True,
+                    visible_rect=None, shape_manager=None, excluded_shapes=None):
+        """Намалювати всі фігури
         
-        line_style = getattr(shape, 'line_style', 'solid')
-        dash_length = getattr(shape, 'dash_length', 10)
-        dot_length = getattr(shape, 'dot_length', 5)
+        Args:
+            selected_shapes: ID вибраних фігур
+            visible_rect: видима область у world координатах (min_x, min_y, max_x, max_y).
+                Фігури, рамки яких її не перетинають, пропускаються.
+            shape_manager: ShapeManager, чий просторовий індекс використовується
+                для відсікання, а кеш рендеру - для незмінених фігур (опціонально)
+            excluded_shapes: ID фігур, які малюються окремо (наприклад, ті, що перетягуються)
         
-        if is_selected:
-            pen.setWidth(max(2, int((shape.thickness + 2) / zoom_factor)))
-            pen.setStyle(QtCore.Qt.DashLine)
-        else:
-            pen.setStyle(QtCore.Qt.SolidLine)
+        Returns:
+            int: кількість відсічених (не намальованих) фігур
+        """
+        if excluded_shapes is None:
+            excluded_shapes = ()
+        cache = shape_manager.render_cache if shape_manager is not None else None
         
-        filled = getattr(shape, 'filled', False)
+        if visible_rect is None:
+            for shape in shapes:
+                if shape.id in excluded_shapes:
+                    continue
+                is_selected = shape.id in selected_shapes
+                ShapeRenderer.draw_shape(painter, shape, is_selected, zoom_factor, show_control_points,
+                                         cache=cache)
+            return 0
         
-        painter.setPen(pen)
-        if filled and shape.kind in ['circle', 'rectangle', 'ellipse', 'polygon']:
-            brush = QtGui.QBrush(color)
-            painter.setBrush(brush)
-        else:
-            painter.setBrush(QtCore.Qt.NoBrush)
+        # Запас на товщину ліній, маркери виділення та розмір точок
+        margin = CULL_MARGIN_SCREEN / zoom_factor + CULL_MARGIN_WORLD
+        x1, y1, x2, y2 = visible_rect
+        x1 -= margin
+        y1 -= margin
+        x2 += margin
+        y2 += margin
         
-        if shape.kind == 'line':
-            ShapeRenderer._draw_line(painter, shape, is_selected, line_style, dash_length, dot_length, pen, color, zoom_factor)
-        elif shape.kind == 'arrow':
-            ShapeRenderer._draw_arrow(painter, shape, is_selected, line_style, dash_length, dot_length, pen, color, zoom_factor)
-        elif shape.kind == 'curve':
-            ShapeRenderer._draw_curve(painter, shape, is_selected, show_control_points, zoom_factor, pen, color)
-        elif shape.kind == 'circle':
-            ShapeRenderer._draw_circle(painter, shape)
-        elif shape.kind == 'ellipse':
-            ShapeRenderer._draw_ellipse(painter, shape)
-        elif shape.kind == 'rectangle':
-            ShapeRenderer._draw_rectangle(painter, shape)
-        elif shape.kind == 'polygon':
-            ShapeRenderer._draw_polygon(painter, shape)
-        elif shape.kind == 'point':
-            ShapeRenderer._draw_point(painter, shape, color)
-        elif shape.kind == 'text':
-            ShapeRenderer._draw_text(painter, shape)
+        if shape_manager is not None:
+            visible_ids = shape_manager.get_spatial_index().query_rect(x1, y1, x2, y2)
+            visible = [shape_manager.get_shape(shape_id) for shape_id in shape_manager.sort_ids(visible_ids)]
+        else:
+            visible = []
+            for shape in shapes:
+                bbox = get_shape_bbox(shape)
+                if bbox is None:
+                    continue
+                if bbox[0] <= x2 and bbox[2] >= x1 and bbox[1] <= y2 and bbox[3] >= y1:
+                    visible.append(shape)
         
-        painter.setBrush(QtCore.Qt.NoBrush)
-    
-    @staticmethod
-    def _draw_line(painter, shape, is_selected, line_style, dash_length, dot_length, pen, color, zoom_factor):
-        """Малювання лінії"""
-        c = shape.coords
-        if not is_selected:
-            if line_style == 'dashed':
-                ShapeRenderer._draw_dashed_line_qt(painter, c['x1'], c['y1'], c['x2'], c['y2'], pen, dash_length)
-            elif line_style == 'dotted':
-                ShapeRenderer._draw_dotted_line_qt(painter, c['x1'], c['y1'], c['x2'], c['y2'], pen, dot_length)
+        # Рамки для LOD - з просторового індексу, без перерахунку
+        index = shape_manager.get_spatial_index() if shape_manager is not None else None
+        # Фігури одного стилю (і спрощені LOD фігури одного кольору) накопичуються
+        # в пакети і малюються одним drawLines/drawRects/drawPath/drawPoints; пакет
+        # малюється раніше, ніж його перекриє фігура іншого кольору, тож порядок
+        # малювання (z-order) зберігається
+        batches = {}
+        lod_styles = {}  # Ключ пакета LOD -> (перо, пензель) на цей кадр
+        hairline = 1 / zoom_factor  # Піксель екрану у world одиницях
+        batching = True
+        opened = merged = 0
+        for shape in visible:
+            if shape.id in excluded_shapes:
+                continue
+            is_selected = shape.id in selected_shapes
+            bbox = index.get_bbox(shape.id) if index is not None else get_shape_bbox(shape)
+            lod = ShapeRenderer._lod_primitive(shape, bbox, zoom_factor)
+            width = ShapeRenderer._pen_width(shape, is_selected, zoom_factor)
+            if lod is None:
+                entry = ShapeRenderer._render_entry(shape, is_selected, zoom_factor, width, cache)
+                batch_key, items = entry[4] or (None, None)
+                if bbox is None or shape.kind == 'text' or not batching:
+                    # Рамка тексту лише оцінена, або пакетування вимкнене - малюємо
+                    # фігуру одразу, поверх усіх накопичених пакетів
+                    if batches:
+                        ShapeRenderer._flush_batches(painter, batches, list(batches))
+                    ShapeRenderer._draw_entry(painter, shape, entry, is_selected, zoom_factor, show_control_points)
+                    continue
+                # Рамка з запасом на перо (і кола точкового пунктиру), наконечник стрілки, радіус точки
+                pad = 2 * width + hairline
+                if shape.kind == 'arrow':
+                    pad += ARROW_HEAD_PAD
+                elif shape.kind == 'point':
+                    pad += max(3, shape.thickness * 2)
             else:
-                painter.drawLine(QtCore.QPointF(c['x1'], c['y1']), QtCore.QPointF(c['x2'], c['y2']))
-        else:
-            painter.drawLine(QtCore.QPointF(c['x1'], c['y1']), QtCore.QPointF(c['x2'], c['y2']))
+                entry = None
+                geometry, filled = lod
+                is_point = type(geometry) is QtCore.QPointF
+                batch_key = ('lod_points' if is_point else 'lod_rects', tuple(shape.color_bgr), width, filled)
+                items = (geometry,)
+                if not batching:
+                    if batches:
+                        ShapeRenderer._flush_batches(painter, batches, list(batches))
+                    style = lod_styles.get(batch_key)
+                    if style is None:
+                        style = lod_styles[batch_key] = ShapeRenderer._lod_style(batch_key)
+                    painter.setPen(style[0])
+                    painter.setBrush(style[1])
+                    if is_point:
+                        painter.drawPoint(geometry)
+                    else:
+                        painter.drawRect(geometry)
+                    continue
+                # Спрощена фігура лежить у своїй рамці - запас лише на перо
+                pad = width + hairline
+            x1, y1, x2, y2 = bbox[0] - pad, bbox[1] - pad, bbox[2] + pad, bbox[3] + pad
             
-            # Малюємо маркери на кінцях для вказівки можливості створення кубічної кривої
-            endpoint_size = 8 / zoom_factor
-            painter.setBrush(QtGui.QBrush(QtGui.QColor(100, 200, 255)))  # Блакитний
-            painter.setPen(QtGui.QPen(QtGui.QColor(50, 150, 255), 2))
-            painter.drawEllipse(QtCore.QPointF(c['x1'], c['y1']), endpoint_size, endpoint_size)
-            painter.drawEllipse(QtCore.QPointF(c['x2'], c['y2']), endpoint_size, endpoint_size)
+            # Пакети іншого кольору під фігурою малюються до неї; фарба того ж
+            # кольору дає однаковий результат у будь-якому порядку
+            open_batch = batches.get(batch_key)
+            if len(batches) > (open_batch is not None):
+                color = batch_key[1] if batch_key is not None else None
+                overlapped = [key for key, other in batches.items()
+                              if key[1] != color and other[3] <= x2 and other[5] >= x1
+                              and other[4] <= y2 and other[6] >= y1]
+                if overlapped:
+                    ShapeRenderer._flush_batches(painter, batches, overlapped)
+            
+            if batch_key is None:
+                ShapeRenderer._draw_entry(painter, shape, entry, is_selected, zoom_factor, show_control_points)
+                continue
+            if open_batch is None:
+                if len(batches) >= BATCH_OPEN_LIMIT:
+                    # Найстаріший пакет не перекриває відкриті пакети іншого кольору - його можна намалювати раніше
+                    ShapeRenderer._flush_batches(painter, batches, [next(iter(batches))])
+                if entry is None:
+                    style = lod_styles.get(batch_key)
+                    if style is None:
+                        style = lod_styles[batch_key] = ShapeRenderer._lod_style(batch_key)
+                    batches[batch_key] = [style[0], style[1], list(items), x1, y1, x2, y2, None]
+                else:
+                    batches[batch_key] = [entry[1], entry[2], list(items), x1, y1, x2, y2, entry[3]]
+                opened += 1
+                if opened >= BATCH_PROBE and merged < opened:
+                    batching = False
+                continue
+            merged += 1
+            open_batch[2].extend(items)
+            open_batch[7] = None
+            if x1 < open_batch[3]:
+                open_batch[3] = x1
+            if y1 < open_batch[4]:
+                open_batch[4] = y1
+            if x2 > open_batch[5]:
+                open_batch[5] = x2
+            if y2 > open_batch[6]:
+                open_batch[6] = y2
+        ShapeRenderer._flush_batches(painter, batches, list(batches))
+        
+        return len(shapes) - len(visible)
     
     @staticmethod
-    def _draw_arrow(painter, shape, is_selected, line_style, dash_length, dot_length, pen, color, zoom_factor):
-        """Малювання стрілки"""
-        c = shape.coords
-        # Малюємо лінію
-        if not is_selected:
-            if line_style == 'dashed':
-                ShapeRenderer._draw_dashed_line_qt(painter, c['x1'], c['y1'], c['x2'], c['y2'], pen, dash_length)
-            elif line_style == 'dotted':
-                ShapeRenderer._draw_dotted_line_qt(painter, c['x1'], c['y1'], c['x2'], c['y2'], pen, dot_length)
-            else:
-                painter.drawLine(QtCore.QPointF(c['x1'], c['y1']), QtCore.QPointF(c['x2'], c['y2']))
-        else:
-            painter.drawLine(QtCore.QPointF(c['x1'], c['y1']), QtCore.QPointF(c['x2'], c['y2']))
+    def draw_shape(painter, shape, is_selected, zoom_factor, show_control_points=True, bbox=None,
+                   cache=None):
+        """Намалювати одну фігуру
         
-        # Малюємо стрілку (трикутник)
-        dx = c['x2'] - c['x1']
-        dy = c['y2'] - c['y1']
-        length = math.hypot(dx, dy)
-        if length > 0:
-            dx /= length
-            dy /= length
-            arrow_size = min(20, length / 3)
-            ax, ay = c['x2'], c['y2']
-            b1x = ax - arrow_size * dx + arrow_size * 0.3 * dy
-            b1y = ay - arrow_size * dy - arrow_size * 0.3 * dx
-            b2x = ax - arrow_size * dx - arrow_size * 0.3 * dy
-            b2y = ay - arrow_size * dy + arrow_size * 0.3 * dx
-            arrow_poly = QtGui.QPolygonF([
-                QtCore.QPointF(ax, ay),
-                QtCore.QPointF(b1x, b1y),
-                QtCore.QPointF(b2x, b2y)
-            ])
-            painter.setBrush(QtGui.QBrush(color))
-            painter.drawPolygon(arrow_poly)
+        Дрібні на екрані фігури малюються спрощено (LOD): точкою, рамкою,
+        текст - смужкою; пунктир коротший за піксель - суцільною лінією.
         
-        # Малюємо маркери на кінцях коли виділено
-        if is_selected:
-            endpoint_size = 8 / zoom_factor
-            painter.setBrush(QtGui.QBrush(QtGui.QColor(100, 200, 255)))  # Блакитний
-            painter.setPen(QtGui.QPen(QtGui.QColor(50, 150, 255), 2))
-            painter.drawEllipse(QtCore.QPointF(c['x1'], c['y1']), endpoint_size, endpoint_size)
-            painter.drawEllipse(QtCore.QPointF(c['x2'], c['y2']), endpoint_size, endpoint_size)
+        Args:
+            bbox: рамка фігури (якщо вже відома - з просторового індексу)
+            cache: кеш рендеру (ShapeManager.render_cache) - перо, пензель і
+                геометрія фігури будуються лише при зміні фігури або ширини пера
+        """
+        width = ShapeRenderer._pen_width(shape, is_selected, zoom_factor)
+        
+        lod = ShapeRenderer._lod_primitive(shape, bbox, zoom_factor)
+        if lod is not None:
+            ShapeRenderer._draw_lod(painter, shape, lod, width)
+            return
+        
+        entry = ShapeRenderer._render_entry(shape, is_selected, zoom_factor, width, cache)
+        ShapeRenderer._draw_entry(painter, shape, entry, is_selected, zoom_factor, show_control_points)
     
     @staticmethod
-    def _draw_curve(painter, shape, is_selected, show_control_points, zoom_factor, pen, color):
-        """Малювання кривої Безьє (квадратичної або кубічної)"""
-        c = shape.coords
+    def _render_entry(shape, is_selected, zoom_factor, width, cache):
+        """Запис рендеру фігури (без LOD) з кешу або щойно побудований
         
-        # Перевіряємо стилі лінії
+        Returns:
+            tuple: (ключ, QPen, QBrush, виклики малювання, пакет або None)
+        """
+        # Штрихи, коротші за LOD_DASH_PX на екрані, не розрізнити - малюємо суцільну лінію
         line_style = getattr(shape, 'line_style', 'solid')
-        dash_length = getattr(shape, 'dash_length', 10)
-        dot_length = getattr(shape, 'dot_length', 5)
+        if line_style == 'dashed' and getattr(shape, 'dash_length', 10) * zoom_factor < LOD_DASH_PX:
+            line_style = 'solid'
+        elif line_style == 'dotted' and getattr(shape, 'dot_length', 5) * zoom_factor < LOD_DASH_PX:
+            line_style = 'solid'
         
-        path = QtGui.QPainterPath()
-        path.moveTo(c['x1'], c['y1'])
+        key = (width, is_selected, line_style)
+        entry = cache.get(shape.id) if cache is not None else None
+        if entry is None or entry[0] != key:
+            entry = (key,) + ShapeRenderer._build_render_entry(shape, is_selected, width, line_style)
+            if cache is not None:
+                cache[shape.id] = entry
+        return entry
+    
+    @staticmethod
+    def _draw_entry(painter, shape, entry, is_selected, zoom_factor, show_control_points):
+        """Намалювати фігуру за її записом рендеру"""
+        _, pen, brush, ops, _ = entry
+        painter.setPen(pen)
+        painter.setBrush(brush)
+        for op, args in ops:
+            op(painter, *args)
         
-        # Перевіряємо тип кривої
-        if 'cx1' in c and 'cy1' in c and 'cx2' in c and 'cy2' in c:
-            # Кубічна крива Безьє з двома контрольними точками
-            path.cubicTo(c['cx1'], c['cy1'], c['cx2'], c['cy2'], c['x2'], c['y2'])
+        if is_selected:
+            ShapeRenderer._draw_selection_markers(painter, shape, zoom_factor, show_control_points, pen)
+        painter.setBrush(QtCore.Qt.NoBrush)
+    
+    @staticmethod
+    def _draw_lod(painter, shape, lod, width):
+        """Намалювати спрощену (LOD) фігуру: точкою або рамкою"""
+        geometry, filled = lod
+        color = QtGui.QColor(shape.color_bgr[2], shape.color_bgr[1], shape.color_bgr[0])
+        pen = QtGui.QPen(color)
+        pen.setWidth(width)
+        painter.setPen(pen)
+        if isinstance(geometry, QtCore.QPointF):
+            painter.drawPoint(geometry)
+        elif filled:
+            painter.fillRect(geometry, color)
         else:
-            # Квадратична крива Безьє з однією контрольною точкою
-            path.quadTo(c['cx'], c['cy'], c['x2'], c['y2'])
+            painter.drawRect(geometry)
+    
+    @staticmethod
+    def _lod_style(key):
+        """Перо та пензель пакета LOD фігур з ключем (тип, колір BGR, ширина, заливка)"""
+        _, color_bgr, width, filled = key
+        color = QtGui.QColor(color_bgr[2], color_bgr[1], color_bgr[0])
+        if filled:
+            return QtGui.QPen(QtCore.Qt.NoPen), QtGui.QBrush(color)
+        pen = QtGui.QPen(color)
+        pen.setWidth(width)
+        return pen, QtGui.QBrush()
+    
+    @staticmethod
+    def _flush_batches(painter, batches, keys):
+        """Намалювати пакети одним викликом кожен і прибрати їх
         
-        # Застосовуємо стилі для кривої через QPen (правильні пунктири)
-        if line_style == 'dashed':
-            # Створюємо pen з пунктирним стилем
-            dashed_pen = QtGui.QPen(pen)
-            # Встановлюємо pattern для пунктиру
-            dash_pattern = [dash_length, dash_length]  # [довжина_пунктира, проміжок]
-            dashed_pen.setDashPattern(dash_pattern)
-            dashed_pen.setCapStyle(QtCore.Qt.FlatCap)
-            painter.setPen(dashed_pen)
-            painter.drawPath(path)
-        elif line_style == 'dotted':
-            # Створюємо pen з точковим стилем
-            dotted_pen = QtGui.QPen(pen)
-            # Встановлюємо pattern для точок
-            dot_pattern = [dot_length, dot_length * 2]  # [довжина_точки, проміжок]
-            dotted_pen.setDashPattern(dot_pattern)
-            dotted_pen.setCapStyle(QtCore.Qt.RoundCap)
-            painter.setPen(dotted_pen)
-            painter.drawPath(path)
-        else:
-            # Суцільна лінія - малюємо звичайним path
-            painter.drawPath(path)
-        
-        # Контрольні точки
-        if is_selected and show_control_points:
-            pen_helper = QtGui.QPen(QtGui.QColor(100, 100, 100))
-            pen_helper.setStyle(QtCore.Qt.DotLine)
-            pen_helper.setWidth(1)
-            painter.setPen(pen_helper)
-            
-            ctrl_point_size = 6 / zoom_factor
-            end_point_size = 4 / zoom_factor
-            
-            if 'cx1' in c and 'cy1' in c and 'cx2' in c and 'cy2' in c:
-                # Кубічна крива - малюємо дві контрольні точки
-                # Лінії до контрольних точок
-                painter.drawLine(QtCore.QPointF(c['x1'], c['y1']), QtCore.QPointF(c['cx1'], c['cy1']))
-                painter.drawLine(QtCore.QPointF(c['x2'], c['y2']), QtCore.QPointF(c['cx2'], c['cy2']))
-                
-                # Перша контрольна точка (жовта)
-                painter.setBrush(QtGui.QBrush(QtGui.QColor(255, 200, 0)))
-                painter.setPen(QtGui.QPen(QtGui.QColor(255, 255, 0)))
-                painter.drawEllipse(QtCore.QPointF(c['cx1'], c['cy1']), ctrl_point_size, ctrl_point_size)
-                
-                # Друга контрольна точка (помаранчева)
-                painter.setBrush(QtGui.QBrush(QtGui.QColor(255, 150, 0)))
-                painter.setPen(QtGui.QPen(QtGui.QColor(255, 100, 0)))
-                painter.drawEllipse(QtCore.QPointF(c['cx2'], c['cy2']), ctrl_point_size, ctrl_point_size)
-            else:
-                # Квадратична крива - одна контрольна точка
-                painter.drawLine(QtCore.QPointF(c['x1'], c['y1']), QtCore.QPointF(c['cx'], c['cy']))
-                painter.drawLine(QtCore.QPointF(c['x2'], c['y2']), QtCore.QPointF(c['cx'], c['cy']))
-                
-                # Контрольна точка (жовта)
-                painter.setBrush(QtGui.QBrush(QtGui.QColor(255, 200, 0)))
-                painter.setPen(QtGui.QPen(QtGui.QColor(255, 255, 0)))
-                painter.drawEllipse(QtCore.QPointF(c['cx'], c['cy']), ctrl_point_size, ctrl_point_size)
-            
-            # Кінцеві точки
-            painter.setBrush(QtGui.QBrush(color))
+        Args:
+            batches: ключ стилю -> [перо, пензель, примітиви, x1, y1, x2, y2 рамки,
+                виклики малювання єдиної фігури пакета або None]
+        """
+        for key in keys:
+            pen, brush, items, _, _, _, _, ops = batches.pop(key)
             painter.setPen(pen)
-            painter.drawEllipse(QtCore.QPointF(c['x1'], c['y1']), end_point_size, end_point_size)
-            painter.drawEllipse(QtCore.QPointF(c['x2'], c['y2']), end_point_size, end_point_size)
+            painter.setBrush(brush)
+            if ops is not None:
+                # Одна фігура - її власні виклики (drawEllipse швидший за загальний drawPath)
+                for op, args in ops:
+                    op(painter, *args)
+            elif key[0] == 'lines':
+                painter.drawLines(items)
+            elif key[0] in ('rects', 'lod_rects'):
+                painter.drawRects(items)
+            elif key[0] == 'lod_points':
+                painter.drawPoints(QtGui.QPolygonF(items))
+            else:
+                # Заливки одного кольору об'єднуються - правило Winding не вирізає перетини
+                path = QtGui.QPainterPath()
+                path.setFillRule(QtCore.Qt.WindingFill)
+                for item in items:
+                    path.addPath(item)
+                painter.drawPath(path)
+        painter.setBrush(QtCore.Qt.NoBrush)
     
     @staticmethod
-    def _draw_circle(painter, shape):
-        """Малювання кола"""
-        c = shape.coords
-        painter.drawEllipse(QtCore.QPointF(c['cx'], c['cy']), c['r'], c['r'])
+    def _pen_width(shape, is_selected, zoom_factor):
+        """Ширина пера у world одиницях (на екрані - thickness пікселів)"""
+        if is_selected:
+            return max(2, int((shape.thickness + 2) / zoom_factor))
+        return max(1, int(shape.thickness / zoom_factor))
     
     @staticmethod
-    def _draw_ellipse(painter, shape):
-        """Малювання еліпса"""
-        c = shape.coords
-        cx, cy = c['cx'], c['cy']
-        rx, ry = c['rx'], c['ry']
-        painter.drawEllipse(QtCore.QRectF(cx - rx, cy - ry, 2 * rx, 2 * ry))
+    def _lod_primitive(shape, bbox, zoom_factor):
+        """Спрощена геометрія дрібної на екрані фігури (LOD)
+        
+        Returns:
+            tuple: (QPointF або QRectF, заливка) або None - фігура малюється повністю
+        """
+        if bbox is None:
+            bbox = get_shape_bbox(shape)
+            if bbox is None:
+                return None
+        x1, y1, x2, y2 = bbox
+        kind = shape.kind
+        
+        if kind == 'text':
+            # Висота шрифту на екрані; нечитабельний текст - смужка на місці рядка
+            if 16 * getattr(shape, 'font_scale', 1.0) * zoom_factor >= LOD_TEXT_PX:
+                return None
+            height = y2 - y1
+            return QtCore.QRectF(x1, y1 + height * 0.3, x2 - x1, height * 0.5), True
+        
+        if kind == 'point':
+            # Точка малюється колом з радіусом max(3, thickness * 2)
+            extent = 2 * max(3, shape.thickness * 2) * zoom_factor
+        else:
+            extent = max(x2 - x1, y2 - y1) * zoom_factor
+        if extent >= LOD_BOX_PX:
+            return None
+        if extent < LOD_POINT_PX:
+            return QtCore.QPointF((x1 + x2) / 2, (y1 + y2) / 2), False
+        if kind in ('line', 'point'):
+            return None  # Лінія і мала точка і так малюються одним викликом
+        filled = getattr(shape, 'filled', False) and kind in ('circle', 'rectangle', 'ellipse', 'polygon')
+        return QtCore.QRectF(x1, y1, x2 - x1, y2 - y1), filled
     
     @staticmethod
-    def _draw_rectangle(painter, shape):
-        """Малювання прямокутника"""
+    def _build_render_entry(shape, is_selected, width, line_style):
+        """Підготувати перо, пензель та виклики малювання фігури
+        
+        Returns:
+            tuple: (QPen, QBrush, [(метод QPainter, аргументи), ...], пакет) - пакет
+                (ключ, примітиви) для спільного малювання з фігурами того ж стилю
+                або None (вибрані фігури, стрілки, точки, текст, пунктир точками)
+        """
+        color = QtGui.QColor(shape.color_bgr[2], shape.color_bgr[1], shape.color_bgr[0])
+        pen = QtGui.QPen(color)
+        pen.setWidth(width)
+        pen.setStyle(QtCore.Qt.DashLine if is_selected else QtCore.Qt.SolidLine)
+        
+        kind = shape.kind
+        filled = getattr(shape, 'filled', False) and kind in ['circle', 'rectangle', 'ellipse', 'polygon']
+        brush = QtGui.QBrush(color) if filled else QtGui.QBrush()
+        
         c = shape.coords
-        x1, y1 = min(c['x1'], c['x2']), min(c['y1'], c['y2'])
-        x2, y2 = max(c['x1'], c['x2']), max(c['y1'], c['y2'])
-        painter.drawRect(QtCore.QRectF(x1, y1, x2 - x1, y2 - y1))
+        P = QtGui.QPainter
+        ops = []
+        batch_type = None
+        batch_items = None
+        if kind in ('line', 'arrow'):
+            x1, y1, x2, y2 = line_coords(c)
+            lines = None
+            if is_selected or line_style == 'solid':
+                lines = [QtCore.QLineF(x1, y1, x2, y2)]
+            elif line_style == 'dashed':
+                lines = ShapeRenderer._dashed_lines(x1, y1, x2, y2, getattr(shape, 'dash_length', 10))
+            elif line_style == 'dotted':
+                ops.extend(ShapeRenderer._dotted_line_ops(x1, y1, x2, y2, width, getattr(shape, 'dot_length', 5)))
+            if lines:
+                ops.append((P.drawLines, (lines,)))
+            if kind == 'arrow':
+                ops.extend(ShapeRenderer._arrow_head_ops(x1, y1, x2, y2, color))
+            elif lines:
+                batch_type, batch_items = 'lines', lines
+        elif kind == 'curve':
+            path = ShapeRenderer._curve_path(shape)
+            ops.extend(ShapeRenderer._curve_ops(shape, path, pen, line_style))
+            if line_style == 'solid':
+                batch_type, batch_items = 'path', [path]
+        elif kind in ('circle', 'ellipse'):
+            if kind == 'circle':
+                cx, cy, r = circle_coords(c)
+                rect = QtCore.QRectF(cx - r, cy - r, 2 * r, 2 * r)
+            else:
+                cx, cy, rx, ry = ellipse_coords(c)
+                rect = QtCore.QRectF(cx - rx, cy - ry, 2 * rx, 2 * ry)
+            ops.append((P.drawEllipse, (rect,)))
+            path = QtGui.QPainterPath()
+            path.addEllipse(rect)
+            batch_type, batch_items = 'path', [path]
+        elif kind == 'rectangle':
+            ax, ay, bx, by = line_coords(c)
+            x1, y1 = min(ax, bx), min(ay, by)
+            x2, y2 = max(ax, bx), max(ay, by)
+            rect = QtCore.QRectF(x1, y1, x2 - x1, y2 - y1)
+            ops.append((P.drawRect, (rect,)))
+            batch_type, batch_items = 'rects', [rect]
+        elif kind == 'polygon':
+            if 'points' in c and len(c['points']) >= 3:
+                poly = QtGui.QPolygonF([QtCore.QPointF(x, y) for x, y in c['points']])
+                ops.append((P.drawPolygon, (poly,)))
+                if not filled:
+                    # Залитий полігон малюється з правилом OddEven - у пакет не об'єднується
+                    path = QtGui.QPainterPath()
+                    path.addPolygon(poly)
+                    path.closeSubpath()
+                    batch_type, batch_items = 'path', [path]
+        elif kind == 'point':
+            point_size = max(3, shape.thickness * 2)
+            ops.append((P.setBrush, (QtGui.QBrush(color),)))
+            ops.append((P.drawEllipse, (QtCore.QPointF(*point_coords(c)), point_size, point_size)))
+        elif kind == 'text':
+            font = QtGui.QFont("Arial", int(16 * getattr(shape, 'font_scale', 1.0)))
+            ops.append((P.setFont, (font,)))
+            ops.append((P.drawText, (QtCore.QPointF(*point_coords(c)), getattr(shape, 'text', ''))))
+        
+        batch = None
+        if batch_type is not None and not is_selected:
+            batch = ((batch_type, tuple(shape.color_bgr), width, filled), batch_items)
+        return pen, brush, ops, batch
     
     @staticmethod
-    def _draw_polygon(painter, shape):
-        """Малювання полігону"""
-        c = shape.coords
-        if 'points' in c and len(c['points']) >= 3:
-            poly = QtGui.QPolygonF([QtCore.QPointF(x, y) for x, y in c['points']])
-            painter.drawPolygon(poly)
+    def _arrow_head_ops(x1, y1, x2, y2, color):
+        """Трикутник стрілки"""
+        dx = x2 - x1
+        dy = y2 - y1
+        length = math.hypot(dx, dy)
+        if length <= 0:
+            return []
+        dx /= length
+        dy /= length
+        arrow_size = min(20, length / 3)
+        b1x = x2 - arrow_size * dx + arrow_size * 0.3 * dy
+        b1y = y2 - arrow_size * dy - arrow_size * 0.3 * dx
+        b2x = x2 - arrow_size * dx - arrow_size * 0.3 * dy
+        b2y = y2 - arrow_size * dy + arrow_size * 0.3 * dx
+        arrow_poly = QtGui.QPolygonF([
+            QtCore.QPointF(x2, y2),
+            QtCore.QPointF(b1x, b1y),
+            QtCore.QPointF(b2x, b2y)
+        ])
+        return [(QtGui.QPainter.setBrush, (QtGui.QBrush(color),)),
+                (QtGui.QPainter.drawPolygon, (arrow_poly,))]
     
     @staticmethod
-    def _draw_point(painter, shape, color):
-        """Малювання точки"""
+    def _curve_path(shape):
+        """QPainterPath кривої Безьє (квадратичної або кубічної)"""
         c = shape.coords
-        point_size = max(3, shape.thickness * 2)
-        painter.setBrush(QtGui.QBrush(color))
-        painter.drawEllipse(QtCore.QPointF(c['x'], c['y']), point_size, point_size)
+        x1, y1, x2, y2 = line_coords(c)
+        path = QtGui.QPainterPath()
+        path.moveTo(x1, y1)
+        
+        # Перевіряємо тип кривої
+        if is_cubic_curve(c):
+            # Кубічна крива Безьє з двома контрольними точками
+            path.cubicTo(c['cx1'], c['cy1'], c['cx2'], c['cy2'], x2, y2)
+        else:
+            # Квадратична крива Безьє з однією контрольною точкою
+            path.quadTo(c['cx'], c['cy'], x2, y2)
+        return path
     
     @staticmethod
-    def _draw_text(painter, shape):
-        """Малювання тексту"""
+    def _curve_ops(shape, path, pen, line_style):
+        """Малювання кривої; пунктир - через QPen (правильні пунктири)"""
+        if line_style == 'dashed':
+            dash_length = getattr(shape, 'dash_length', 10)
+            styled_pen = QtGui.QPen(pen)
+            styled_pen.setDashPattern([dash_length, dash_length])  # [довжина_пунктира, проміжок]
+            styled_pen.setCapStyle(QtCore.Qt.FlatCap)
+        elif line_style == 'dotted':
+            dot_length = getattr(shape, 'dot_length', 5)
+            styled_pen = QtGui.QPen(pen)
+            styled_pen.setDashPattern([dot_length, dot_length * 2])  # [довжина_точки, проміжок]
+            styled_pen.setCapStyle(QtCore.Qt.RoundCap)
+        else:
+            return [(QtGui.QPainter.drawPath, (path,))]
+        return [(QtGui.QPainter.setPen, (styled_pen,)), (QtGui.QPainter.drawPath, (path,))]
+    
+    @staticmethod
+    def _draw_selection_markers(painter, shape, zoom_factor, show_control_points, pen):
+        """Маркери вибраної фігури: кінці лінії/стрілки, контрольні точки кривої"""
         c = shape.coords
-        font_scale = getattr(shape, 'font_scale', 1.0)
-        text = getattr(shape, 'text', '')
-        font = QtGui.QFont("Arial", int(16 * font_scale))
-        painter.setFont(font)
-        painter.drawText(QtCore.QPointF(c['x'], c['y']), text)
+        if shape.kind in ('line', 'arrow'):
+            # Маркери на кінцях для вказівки можливості створення кубічної кривої
+            endpoint_size = 8 / zoom_factor
+            painter.setBrush(QtGui.QBrush(QtGui.QColor(100, 200, 255)))  # Блакитний
+            painter.setPen(QtGui.QPen(QtGui.QColor(50, 150, 255), 2))
+            painter.drawEllipse(QtCore.QPointF(c['x1'], c['y1']), endpoint_size, endpoint_size)
+            painter.drawEllipse(QtCore.QPointF(c['x2'], c['y2']), endpoint_size, endpoint_size)
+            return
+        if shape.kind != 'curve' or not show_control_points:
+            return
+        
+        pen_helper = QtGui.QPen(QtGui.QColor(100, 100, 100))
+        pen_helper.setStyle(QtCore.Qt.DotLine)
+        pen_helper.setWidth(1)
+        painter.setPen(pen_helper)
+        
+        ctrl_point_size = 6 / zoom_factor
+        end_point_size = 4 / zoom_factor
+        
+        if is_cubic_curve(c):
+            # Кубічна крива - малюємо дві контрольні точки
+            # Лінії до контрольних точок
+            painter.drawLine(QtCore.QPointF(c['x1'], c['y1']), QtCore.QPointF(c['cx1'], c['cy1']))
+            painter.drawLine(QtCore.QPointF(c['x2'], c['y2']), QtCore.QPointF(c['cx2'], c['cy2']))
+            
+            # Перша контрольна точка (жовта)
+            painter.setBrush(QtGui.QBrush(QtGui.QColor(255, 200, 0)))
+            painter.setPen(QtGui.QPen(QtGui.QColor(255, 255, 0)))
+            painter.drawEllipse(QtCore.QPointF(c['cx1'], c['cy1']), ctrl_point_size, ctrl_point_size)
+            
+            # Друга контрольна точка (помаранчева)
+            painter.setBrush(QtGui.QBrush(QtGui.QColor(255, 150, 0)))
+            painter.setPen(QtGui.QPen(QtGui.QColor(255, 100, 0)))
+            painter.drawEllipse(QtCore.QPointF(c['cx2'], c['cy2']), ctrl_point_size, ctrl_point_size)
+        else:
+            # Квадратична крива - одна контрольна точка
+            painter.drawLine(QtCore.QPointF(c['x1'], c['y1']), QtCore.QPointF(c['cx'], c['cy']))
+            painter.drawLine(QtCore.QPointF(c['x2'], c['y2']), QtCore.QPointF(c['cx'], c['cy']))
+            
+            # Контрольна точка (жовта)
+            painter.setBrush(QtGui.QBrush(QtGui.QColor(255, 200, 0)))
+            painter.setPen(QtGui.QPen(QtGui.QColor(255, 255, 0)))
+            painter.drawEllipse(QtCore.QPointF(c['cx'], c['cy']), ctrl_point_size, ctrl_point_size)
+        
+        # Кінцеві точки
+        painter.setBrush(QtGui.QBrush(pen.color()))
+        painter.setPen(pen)
+        painter.drawEllipse(QtCore.QPointF(c['x1'], c['y1']), end_point_size, end_point_size)
+        painter.drawEllipse(QtCore.QPointF(c['x2'], c['y2']), end_point_size, end_point_size)
     
     @staticmethod
-    def _draw_dashed_line_qt(painter, x1, y1, x2, y2, pen, dash_length):
-        """Малювання пунктирної лінії"""
+    def _dashed_lines(x1, y1, x2, y2, dash_length):
+        """Штрихи пунктирної лінії (QLineF)"""
         dist = math.hypot(x2 - x1, y2 - y1)
         if dist < 1:
-            return
+            return []
         
         dashes = int(dist / dash_length)
         if dashes < 1:
-            painter.drawLine(QtCore.QPointF(x1, y1), QtCore.QPointF(x2, y2))
-            return
+            return [QtCore.QLineF(x1, y1, x2, y2)]
         
-        for i in range(dashes):
-            if i % 2 == 0:
-                start_t = i / dashes
-                end_t = (i + 0.5) / dashes
-                start_x = x1 + (x2 - x1) * start_t
-                start_y = y1 + (y2 - y1) * start_t
-                end_x = x1 + (x2 - x1) * end_t
-                end_y = y1 + (y2 - y1) * end_t
-                painter.drawLine(QtCore.QPointF(start_x, start_y), QtCore.QPointF(end_x, end_y))
+        lines = []
+        for i in range(0, dashes, 2):
+            start_t = i / dashes
+            end_t = (i + 0.5) / dashes
+            lines.append(QtCore.QLineF(x1 + (x2 - x1) * start_t, y1 + (y2 - y1) * start_t,
+                                       x1 + (x2 - x1) * end_t, y1 + (y2 - y1) * end_t))
+        return lines
     
     @staticmethod
-    def _draw_dotted_line_qt(painter, x1, y1, x2, y2, pen, dot_length):
-        """Малювання точкової лінії"""
+    def _dotted_line_ops(x1, y1, x2, y2, width, dot_length):
+        """Точкова лінія - кола вздовж лінії"""
         dist = math.hypot(x2 - x1, y2 - y1)
         if dist < 1:
-            return
+            return []
         
         dots = int(dist / dot_length)
         if dots < 1:
-            painter.drawEllipse(QtCore.QPointF(x1, y1), pen.width(), pen.width())
-            return
+            return [(QtGui.QPainter.drawEllipse, (QtCore.QPointF(x1, y1), width, width))]
         
-        for i in range(dots):
-            if i % 2 == 0:
-                t = i / dots
-                px = x1 + (x2 - x1) * t
-                py = y1 + (y2 - y1) * t
-                painter.drawEllipse(QtCore.QPointF(px, py), max(1, pen.width()), max(1, pen.width()))
+        radius = max(1, width)
+        ops = []
+        for i in range(0, dots, 2):
+            t = i / dots
+            ops.append((QtGui.QPainter.drawEllipse,
+                        (QtCore.QPointF(x1 + (x2 - x1) * t, y1 + (y2 - y1) * t), radius, radius)))
+        return ops
     
     @staticmethod
     def draw_selection_rect(painter, temp_point, mouse_pos):
@@ -1,12 +1,208 @@
 """
 Клас для зберігання даних про фігури
 """
+from collections.abc import MutableMapping
+from operator import attrgetter
+
+
+class ShapeCoords(MutableMapping):
+    """Запис координат фігури з фіксованими полями (__slots__)
+    
+    Поводиться як словник для коду, що читає shape.coords[...], поля також
+    доступні як атрибути (c.x1). Відсутній ключ: get() повертає default,
+    `in` - False, пряма індексація - KeyError.
+    """
+    
+    __slots__ = ()
+    fields = frozenset()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.fields = frozenset(cls.__slots__)
+    
+    def __getitem__(self, key):
+        # Лише поля запису: c['fields'] чи c['__class__'] - KeyError, як у dict
+        try:
+            if key in self.fields:
+                return getattr(self, key)
+        except AttributeError:
+            pass  # Поле не задане
+        raise KeyError(key)
+    
+    def __init__(self, values=()):
+        for key, value in dict(values).items():
+            self[key] = value
+    
+    def __setitem__(self, key, value):
+        if key not in self.fields:
+            raise KeyError(f"'{key}' is not a coordinate of {type(self).__name__}")
+        object.__setattr__(self, key, value)
+    
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        object.__delattr__(self, key)
+    
+    def __contains__(self, key):
+        return key in self.fields and hasattr(self, key)
+    
+    def __iter__(self):
+        return (key for key in self.__slots__ if hasattr(self, key))
+    
+    def __len__(self):
+        return sum(1 for _ in self)
+    
+    def get(self, key, default=None):
+        if key in self.fields:
+            return getattr(self, key, default)
+        return default
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class LineCoords(ShapeCoords):
+    """line, arrow, rectangle"""
+    __slots__ = ('x1', 'y1', 'x2', 'y2')
+
+
+class CurveCoords(ShapeCoords):
+    """Квадратична крива Безьє"""
+    __slots__ = ('x1', 'y1', 'x2', 'y2', 'cx', 'cy')
+
+
+class CubicCurveCoords(ShapeCoords):
+    """Кубічна крива Безьє (kind='curve' з cx1/cy1/cx2/cy2)"""
+    __slots__ = ('x1', 'y1', 'x2', 'y2', 'cx1', 'cy1', 'cx2', 'cy2')
+
+
+class CircleCoords(ShapeCoords):
+    __slots__ = ('cx', 'cy', 'r')
+
+
+class EllipseCoords(ShapeCoords):
+    __slots__ = ('cx', 'cy', 'rx', 'ry', 'angle')
+
+
+class PolygonCoords(ShapeCoords):
+    __slots__ = ('points',)
+
+
+class PointCoords(ShapeCoords):
+    """text, point"""
+    __slots__ = ('x', 'y')
+
+
+COORD_RECORDS = {
+    'line': LineCoords,
+    'arrow': LineCoords,
+    'rectangle': LineCoords,
+    'curve': CurveCoords,
+    'circle': CircleCoords,
+    'ellipse': EllipseCoords,
+    'polygon': PolygonCoords,
+    'text': PointCoords,
+    'point': PointCoords,
+}
+
+
+def make_coords(kind, values):
+    """Створити запис координат для типу фігури
+    
+    Якщо ключі не відповідають жодному запису (невідомий тип або зайві ключі),
+    повертає звичайний словник.
+    """
+    record = COORD_RECORDS.get(kind)
+    if record is CurveCoords and 'cx1' in values:
+        record = CubicCurveCoords
+    if record is None or not values.keys() <= record.fields:
+        return dict(values)
+    coords = record.__new__(record)
+    for key, value in values.items():
+        object.__setattr__(coords, key, value)
+    return coords
+
+
+def coords_factory(kind, keys):
+    """Конструктор записів координат для фігур з однаковим набором ключів
+    
+    Вибір запису та перевірка ключів виконуються один раз на набір, а не для
+    кожної фігури (пакетне завантаження проекту).
+    
+    Returns:
+        callable: values (значення у порядку keys) -> ShapeCoords або dict
+    """
+    keys = tuple(keys)
+    record = COORD_RECORDS.get(kind)
+    if record is CurveCoords and 'cx1' in keys:
+        record = CubicCurveCoords
+    if record is None or not record.fields.issuperset(keys):
+        return lambda values: dict(zip(keys, values))
+    
+    new = record.__new__
+    setters = [getattr(record, key).__set__ for key in keys]
+    
+    def build(values):
+        coords = new(record)
+        for setter, value in zip(setters, values):
+            setter(coords, value)
+        return coords
+    return build
+
+
+# Читачі координат для гарячих шляхів (малювання, bbox, hit-testing).
+# c['x1'] у записі ~2.5x повільніший за dict, атрибут c.x1 - швидший, тому
+# для записів поля читаються атрибутами. Перевірка type() замість isinstance:
+# isinstance для MutableMapping іде через ABCMeta і сам коштує як індексація.
+# dict та CoordsView колонкового сховища читаються індексацією.
+_ENDPOINT_RECORDS = (LineCoords, CurveCoords, CubicCurveCoords)
+
+
+def line_coords(c):
+    """(x1, y1, x2, y2) лінії, стрілки, прямокутника або кінців кривої"""
+    if type(c) in _ENDPOINT_RECORDS:
+        return c.x1, c.y1, c.x2, c.y2
+    return c['x1'], c['y1'], c['x2'], c['y2']
+
+
+def circle_coords(c):
+    """(cx, cy, r) кола"""
+    if type(c) is CircleCoords:
+        return c.cx, c.cy, c.r
+    return c['cx'], c['cy'], c['r']
+
+
+def ellipse_coords(c):
+    """(cx, cy, rx, ry) еліпса"""
+    if type(c) is EllipseCoords:
+        return c.cx, c.cy, c.rx, c.ry
+    return c['cx'], c['cy'], c['rx'], c['ry']
+
+
+def point_coords(c):
+    """(x, y) точки або тексту"""
+    if type(c) is PointCoords:
+        return c.x, c.y
+    return c['x'], c['y']
+
+
+def is_cubic_curve(c):
+    """Чи координати кривої кубічні (cx1/cy1/cx2/cy2)"""
+    record = type(c)
+    if record is CubicCurveCoords:
+        return True
+    if record is CurveCoords:
+        return False
+    return 'cx1' in c and 'cy1' in c and 'cx2' in c and 'cy2' in c
 
 
 class Shape:
+    __slots__ = ('id', 'kind', 'color_bgr', 'thickness', 'style', 'line_style', 'text',
+                 'font_scale', 'filled', 'dash_length', 'dot_length', 'dynamic', '_coords')
+    
     def __init__(self, kind, color_bgr=(0, 255, 0), thickness=2, style='default', 
                  line_style='solid', text='', font_scale=1.0, filled=False, 
-                 dash_length=10, dot_length=5, **coords):
+                 dash_length=10, dot_length=5, dynamic=False, **coords):
         """
         Клас для представлення фігури
         
@@ -21,6 +217,7 @@ class Shape:
             filled: чи заповнена фігура (для кіл, прямокутників, полігонів)
             dash_length: довжина пунктира для dashed ліній (в пікселях)
             dot_length: відстань між точками для dotted ліній (в пікселях)
+            dynamic: фігура змінюється під час роботи (не кешується в експортованому overlay)
             **coords: координати фігури:
                 - line: x1,y1,x2,y2
                 - circle: cx,cy,r
@@ -33,6 +230,7 @@ class Shape:
                 - curve: x1,y1,x2,y2,cx,cy (квадратична крива Безьє)
                 - cubic_curve: x1,y1,x2,y2,cx1,cy1,cx2,cy2 (кубічна крива Безьє з 2 контрольними точками)
         """
+        self.id = None  # Стабільний ID, призначається ShapeManager
         self.kind = kind
         self.color_bgr = color_bgr
         self.thickness = thickness
@@ -43,5 +241,12 @@ class Shape:
         self.filled = filled
         self.dash_length = dash_length
         self.dot_length = dot_length
-        self.coords = coords
-
+        self.dynamic = dynamic
+        self._coords = make_coords(kind, coords)
+    
+    def _set_coords(self, values):
+        self._coords = make_coords(self.kind, values)
+    
+    # Читання через attrgetter (C-рівень) - без виклику Python-функції на кожен доступ
+    coords = property(attrgetter('_coords'), _set_coords,
+                      doc="Координати фігури (ShapeCoords, для сумісності поводиться як dict)")
@@ -0,0 +1,5 @@
+"""Модулі застосунку лежать у корені репозиторію - додаємо його в sys.path"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,121 @@
+"""
+Відновлення автозбереження (знімок + журнал) після збою
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5 import QtWidgets
+
+from canvas_widget import CanvasWidget
+from export.project_io import ProjectIO
+from shape import Shape
+
+
+_app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class AutosaveRecoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.autosave_file = os.path.join(self.tmp_dir, 'autosave.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _canvas(self):
+        """Canvas з автозбереженням у тимчасовому каталозі"""
+        canvas = CanvasWidget()
+        manager = canvas.autosave_manager
+        manager.autosave_timer.stop()
+        manager.autosave_file = self.autosave_file
+        manager.meta_file = self.autosave_file + '.meta'
+        manager.journal.path = self.autosave_file + '.journal'
+        return canvas
+
+    @staticmethod
+    def _add(canvas, shape):
+        canvas.shape_manager.add_shape(shape)
+        canvas.history.record_add([shape.id])
+
+    @staticmethod
+    def _texts(canvas):
+        return sorted(shape.text for shape in canvas.shape_manager.shapes if shape.kind == 'text')
+
+    def test_crash_after_opening_project_keeps_old_snapshot_consistent(self):
+        old_project = os.path.join(self.tmp_dir, 'old.json')
+        ProjectIO.save_project([Shape('circle', cx=50, cy=50, r=10),
+                                Shape('line', x1=0, y1=0, x2=10, y2=10)], old_project)
+        new_project = os.path.join(self.tmp_dir, 'new.json')
+        ProjectIO.save_project([Shape('rectangle', x1=0, y1=0, x2=5, y2=5)], new_project)
+
+        canvas = self._canvas()
+        manager = canvas.autosave_manager
+        canvas.load_project(old_project)
+        self._add(canvas, Shape('line', x1=1, y1=2, x2=3, y2=4))
+        manager.wait()
+        old_ids = sorted(canvas.shape_manager.get_shape_ids())
+
+        # Збій до того, як потік запису встигне записати знімок нового проекту
+        manager._write_pending = lambda: None
+        canvas.load_project(new_project)
+        self._add(canvas, Shape('text', text='NEW1', x=1, y=1))
+        self._add(canvas, Shape('text', text='NEW2', x=2, y=2))
+        manager.wait()
+
+        restored = self._canvas()
+        self.assertTrue(restored.autosave_manager.load_autosave())
+        # Відновлюється старий проект цілком, без змін нового
+        self.assertEqual(sorted(restored.shape_manager.get_shape_ids()), old_ids)
+        self.assertEqual(self._texts(restored), [])
+        kinds = sorted(shape.kind for shape in restored.shape_manager.shapes)
+        self.assertEqual(kinds, ['circle', 'line', 'line'])
+
+    def test_journaled_edits_replayed_after_crash(self):
+        canvas = self._canvas()
+        manager = canvas.autosave_manager
+        self._add(canvas, Shape('line', x1=1, y1=2, x2=3, y2=4))
+        manager.wait()
+        self._add(canvas, Shape('text', text='A', x=1, y=1))
+        self._add(canvas, Shape('text', text='B', x=2, y=2))
+        expected = sorted(canvas.shape_manager.get_shape_ids())
+
+        restored = self._canvas()
+        self.assertTrue(restored.autosave_manager.load_autosave())
+        self.assertEqual(sorted(restored.shape_manager.get_shape_ids()), expected)
+        self.assertEqual(self._texts(restored), ['A', 'B'])
+
+    def test_snapshot_after_edits_uses_fresh_records(self):
+        canvas = self._canvas()
+        manager = canvas.autosave_manager
+        shape_manager = canvas.shape_manager
+        line = Shape('line', x1=1, y1=2, x2=3, y2=4)
+        self._add(canvas, Shape('circle', cx=50, cy=50, r=10))
+        self._add(canvas, line)
+        manager.autosave()
+        manager.wait()
+
+        # Записи фігур уже в кеші знімків - зміни мають їх скинути
+        line.thickness = 7
+        shape_manager.mark_shapes_changed([line.id])
+        canvas.history.record_property('thickness', {line.id: 2}, 7)
+        shape_manager.translate_shapes([line.id], 10, 0)
+        canvas.history.record_translate([line.id], 10, 0)
+        manager.autosave()
+        manager.wait()
+
+        cached = ProjectIO.snapshot_project(shape_manager.shapes,
+                                            record_cache=shape_manager.record_cache)
+        self.assertEqual(cached['shapes'], ProjectIO._shape_records(shape_manager.shapes))
+        shapes, _, _ = ProjectIO.load_project(self.autosave_file)
+        saved = [shape for shape in shapes if shape.kind == 'line'][0]
+        self.assertEqual(saved.thickness, 7)
+        self.assertEqual(dict(saved.coords), {'x1': 11, 'y1': 2, 'x2': 13, 'y2': 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
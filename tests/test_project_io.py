@@ -0,0 +1,47 @@
+"""
+Збереження проекту: атомарний запис JSON та .hudp
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from export.project_io import ProjectIO
+from shape import Shape
+
+
+class AtomicSaveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _check_failed_save_keeps_previous(self, filename):
+        path = os.path.join(self.tmp_dir, filename)
+        ProjectIO.save_project([Shape('line', x1=0, y1=0, x2=10, y2=10)], path)
+        with open(path, 'rb') as f:
+            before = f.read()
+
+        # Збій під час запису нової версії
+        with mock.patch('export.project_io.os.fsync', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                ProjectIO.save_project([Shape('circle', cx=5, cy=5, r=3)], path)
+
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual(os.listdir(self.tmp_dir), [filename])
+        shapes, _, _ = ProjectIO.load_project(path)
+        self.assertEqual([shape.kind for shape in shapes], ['line'])
+
+    def test_failed_json_save_keeps_previous_file(self):
+        self._check_failed_save_keeps_previous('project.json')
+
+    def test_failed_binary_save_keeps_previous_file(self):
+        self._check_failed_save_keeps_previous('project.hudp')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@
 import math
 from PyQt5 import QtWidgets, QtCore
 from shape import Shape
+from core.history import History
 from utils.geometry import is_point_near_line_middle, is_point_near_line_endpoint, snap_to_grid, constrain_line
 
 
@@ -14,6 +15,7 @@ class MouseHandler:
         self.canvas = canvas_widget
         self.temp_point = None  # Для малювання фігур
         self.polygon_points = []  # Для малювання полігонів
+        self.curve_before = None  # Стан фігури до редагування кривої (для історії)
     
     def handle_press(self, event, current_mode, zoom_pan, selection_mgr, shape_mgr):
         """Обробити натискання миші"""
@@ -84,12 +86,13 @@ class MouseHandler:
     
     def _handle_select_press(self, x, y, selection_mgr, shape_mgr, zoom_pan):
         """Обробити клік в режимі select"""
-        clicked_shape_idx = selection_mgr.find_shape_at_point(
-            shape_mgr.shapes, x, y, zoom_pan.zoom_factor
+        clicked_shape_id = selection_mgr.find_shape_at_point(
+            shape_mgr, x, y, zoom_pan.zoom_factor
         )
         
-        if clicked_shape_idx is not None:
-            shape = shape_mgr.shapes[clicked_shape_idx]
+        if clicked_shape_id is not None:
+            shape = shape_mgr.get_shape(clicked_shape_id)
+            self.curve_before = History.shape_state(shape)
             
             # Перевірка на кінці лінії/стрілки (для перетворення в кубічну криву)
             if shape.kind in ['line', 'arrow']:
@@ -102,7 +105,7 @@ class MouseHandler:
                 )
                 if endpoint:
                     # Створюємо кубічну криву з редагуванням кінця
-                    selection_mgr.start_cubic_curve_editing(clicked_shape_idx, x, y, endpoint, shape_mgr.shapes)
+                    selection_mgr.start_cubic_curve_editing(clicked_shape_id, x, y, endpoint, shape_mgr)
                     self.temp_point = None
                     return {'redraw': True}
                 
@@ -112,16 +115,16 @@ class MouseHandler:
                     15 / zoom_pan.zoom_factor
                 )
                 if is_middle:
-                    selection_mgr.start_curve_editing(clicked_shape_idx, x, y)
+                    selection_mgr.start_curve_editing(clicked_shape_id, x, y)
                     self.temp_point = None
                     return {'redraw': True}
             
             # Перевірка на контрольну точку кривої
             if shape.kind == 'curve':
                 if selection_mgr.is_near_control_point(
-                    shape_mgr.shapes, clicked_shape_idx, x, y, zoom_pan.zoom_factor
+                    shape_mgr, clicked_shape_id, x, y, zoom_pan.zoom_factor
                 ):
-                    selection_mgr.start_control_point_dragging(clicked_shape_idx)
+                    selection_mgr.start_control_point_dragging(clicked_shape_id)
                     self.temp_point = None
                     return {'redraw': True}
             
@@ -130,15 +133,15 @@ class MouseHandler:
             ctrl_pressed = modifiers & QtCore.Qt.ControlModifier
             
             if ctrl_pressed:
-                selection_mgr.toggle_shape(clicked_shape_idx)
+                selection_mgr.toggle_shape(clicked_shape_id)
             else:
-                if not selection_mgr.is_selected(clicked_shape_idx):
+                if not selection_mgr.is_selected(clicked_shape_id):
                     selection_mgr.clear_selection()
-                    selection_mgr.select_shape(clicked_shape_idx)
+                    selection_mgr.select_shape(clicked_shape_id)
             
             # Готуємося до переміщення
-            if selection_mgr.is_selected(clicked_shape_idx):
-                selection_mgr.start_dragging(shape_mgr.shapes, x, y)
+            if selection_mgr.is_selected(clicked_shape_id):
+                selection_mgr.start_dragging(shape_mgr, x, y)
             
             self.temp_point = None
             return {'redraw': True}
@@ -174,12 +177,14 @@ class MouseHandler:
         
         # Редагування кривої
         if selection_mgr.editing_curve or selection_mgr.dragging_control_point:
-            selection_mgr.update_curve_editing(shape_mgr.shapes, world_x, world_y)
+            if selection_mgr.update_curve_editing(shape_mgr, world_x, world_y):
+                shape_mgr.mark_shapes_changed([selection_mgr.curve_shape_id], interactive=True)
             return {'redraw': True, 'world_x': world_x, 'world_y': world_y}
         
         # Перетягування фігур
         if selection_mgr.is_dragging():
-            selection_mgr.update_dragging(shape_mgr.shapes, world_x, world_y)
+            if selection_mgr.update_dragging(shape_mgr, world_x, world_y):
+                shape_mgr.mark_shapes_changed(selection_mgr.selected_shapes, interactive=True)
             return {'redraw': True, 'world_x': world_x, 'world_y': world_y}
         
         # Snap to grid
@@ -208,11 +213,18 @@ class MouseHandler:
             
             # Завершуємо редагування кривої
             if selection_mgr.editing_curve or selection_mgr.dragging_control_point:
+                shape_mgr.mark_shapes_changed([selection_mgr.curve_shape_id])
+                if self.curve_before is not None:
+                    self.canvas.history.record_shape_state(selection_mgr.curve_shape_id, self.curve_before)
+                    self.curve_before = None
                 selection_mgr.stop_curve_editing()
                 return {'redraw': True}
             
             # Завершуємо перетягування
             if selection_mgr.is_dragging():
+                shape_mgr.mark_shapes_changed(selection_mgr.selected_shapes)
+                dx, dy = selection_mgr.drag_offset
+                self.canvas.history.record_translate(selection_mgr.original_coords, dx, dy)
                 selection_mgr.stop_dragging()
                 return {'redraw': True}
             
@@ -232,7 +244,7 @@ class MouseHandler:
                     self._create_shape(current_mode, x0, y0, x1, y1, shape_mgr)
                     # Автозбереження після додавання фігури
                     if hasattr(self.canvas, 'autosave_manager'):
-                        self.canvas.autosave_manager.autosave()
+                        self.canvas.autosave_manager.request_autosave()
                 
                 self.temp_point = None
                 return {'redraw': True, 'clear_shape_info': True}
@@ -247,7 +259,7 @@ class MouseHandler:
                 if abs(x2 - x1) > 3 or abs(y2 - y1) > 3:
                     # Рамка виділення
                     shapes_in_rect = selection_mgr.find_shapes_in_rect(
-                        shape_mgr.shapes,
+                        shape_mgr,
                         min(x1, x2), min(y1, y2),
                         max(x1, x2), max(y1, y2)
                     )
@@ -256,12 +268,12 @@ class MouseHandler:
                     ctrl_pressed = modifiers & QtCore.Qt.ControlModifier
                     
                     if ctrl_pressed:
-                        for idx in shapes_in_rect:
-                            selection_mgr.select_shape(idx)
+                        for shape_id in shapes_in_rect:
+                            selection_mgr.select_shape(shape_id)
                     else:
                         selection_mgr.clear_selection()
-                        for idx in shapes_in_rect:
-                            selection_mgr.select_shape(idx)
+                        for shape_id in shapes_in_rect:
+                            selection_mgr.select_shape(shape_id)
                 else:
                     # Просто клік - скидаємо виділення
                     modifiers = QtWidgets.QApplication.keyboardModifiers()
@@ -285,13 +297,20 @@ class MouseHandler:
         
         return {'redraw': True, 'zoom': new_zoom}
     
+    def _add_shape(self, shape_mgr, shape):
+        """Додати намальовану фігуру та записати її в історію"""
+        shape_id = shape_mgr.add_shape(shape)
+        self.canvas.history.record_add((shape_id,))
+        return shape_id
+
     def _handle_text_click(self, x, y, shape_mgr):
         """Додати текст"""
         from PyQt5.QtWidgets import QInputDialog
         text, ok = QInputDialog.getText(self.canvas, "Add Text", "Enter text:")
         
         if ok and text:
-            shape_mgr.add_shape(
+            self._add_shape(
+                shape_mgr,
                 Shape(
                     'text',
                     color_bgr=self.canvas.current_color_bgr,
@@ -306,11 +325,12 @@ class MouseHandler:
             )
             # Автозбереження після додавання фігури
             if hasattr(self.canvas, 'autosave_manager'):
-                self.canvas.autosave_manager.autosave()
+                self.canvas.autosave_manager.request_autosave()
     
     def _handle_point_click(self, x, y, shape_mgr):
         """Додати точку"""
-        shape_mgr.add_shape(
+        self._add_shape(
+            shape_mgr,
             Shape(
                 'point',
                 color_bgr=self.canvas.current_color_bgr,
@@ -323,7 +343,7 @@ class MouseHandler:
         )
         # Автозбереження після додавання фігури
         if hasattr(self.canvas, 'autosave_manager'):
-            self.canvas.autosave_manager.autosave()
+            self.canvas.autosave_manager.request_autosave()
     
     def _handle_polygon_click(self, x, y):
         """Додати точку до полігону"""
@@ -333,7 +353,8 @@ class MouseHandler:
         """Завершити малювання полігону"""
         if len(self.polygon_points) >= 3:
             shape_mgr = self.canvas.shape_manager
-            shape_mgr.add_shape(
+            self._add_shape(
+                shape_mgr,
                 Shape(
                     'polygon',
                     color_bgr=self.canvas.current_color_bgr,
@@ -349,12 +370,13 @@ class MouseHandler:
             self.polygon_points = []
             # Автозбереження після додавання фігури
             if hasattr(self.canvas, 'autosave_manager'):
-                self.canvas.autosave_manager.autosave()
+                self.canvas.autosave_manager.request_autosave()
     
     def _create_shape(self, mode, x0, y0, x1, y1, shape_mgr):
         """Створити фігуру після завершення малювання"""
         if mode == 'line':
-            shape_mgr.add_shape(
+            self._add_shape(
+                shape_mgr,
                 Shape(
                     'line',
                     color_bgr=self.canvas.current_color_bgr,
@@ -372,7 +394,8 @@ class MouseHandler:
             dy = y1 - y0
             r = int(round(math.hypot(dx, dy)))
             if r > 2:
-                shape_mgr.add_shape(
+                self._add_shape(
+                    shape_mgr,
                     Shape(
                         'circle',
                         color_bgr=self.canvas.current_color_bgr,
@@ -386,7 +409,8 @@ class MouseHandler:
                     )
                 )
         elif mode == 'rectangle':
-            shape_mgr.add_shape(
+            self._add_shape(
+                shape_mgr,
                 Shape(
                     'rectangle',
                     color_bgr=self.canvas.current_color_bgr,
@@ -401,7 +425,8 @@ class MouseHandler:
                 )
             )
         elif mode == 'arrow':
-            shape_mgr.add_shape(
+            self._add_shape(
+                shape_mgr,
                 Shape(
                     'arrow',
                     color_bgr=self.canvas.current_color_bgr,
@@ -418,7 +443,8 @@ class MouseHandler:
             rx = int(abs(x1 - x0))
             ry = int(abs(y1 - y0))
             if rx > 2 and ry > 2:
-                shape_mgr.add_shape(
+                self._add_shape(
+                    shape_mgr,
                     Shape(
                         'ellipse',
                         color_bgr=self.canvas.current_color_bgr,
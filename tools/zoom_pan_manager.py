@@ -31,6 +31,16 @@ class ZoomPanManager:
         screen_y = world_y * self.zoom_factor + self.pan_y
         return screen_x, screen_y
     
+    def get_visible_world_rect(self, screen_width, screen_height):
+        """Отримати видиму область у world координатах
+        
+        Returns:
+            (min_x, min_y, max_x, max_y)
+        """
+        x1, y1 = self.screen_to_world(0, 0)
+        x2, y2 = self.screen_to_world(screen_width, screen_height)
+        return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+    
     def start_pan(self, screen_x, screen_y):
         """Почати панування"""
         self.pan_start = (screen_x, screen_y)
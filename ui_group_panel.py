@@ -71,7 +71,7 @@ class GroupPanel(QtWidgets.QDockWidget):
         
         group_manager = self.canvas.group_manager
         for group in group_manager.groups:
-            item = QtWidgets.QListWidgetItem(f"📁 {group.name} ({len(group.shape_indices)} shapes)")
+            item = QtWidgets.QListWidgetItem(f"📁 {group.name} ({len(group.shape_ids)} shapes)")
             item.setData(QtCore.Qt.UserRole, group.name)
             self.group_list.addItem(item)
         
@@ -91,8 +91,9 @@ class GroupPanel(QtWidgets.QDockWidget):
         
         if ok and name:
             # Створюємо групу з вибраними фігурами
-            selected_indices = self.canvas.selection_manager.selected_shapes
-            group = self.canvas.group_manager.create_group(name, selected_indices)
+            selected_ids = self.canvas.selection_manager.selected_shapes
+            group = self.canvas.group_manager.create_group(name, selected_ids)
+            self.canvas.history.record_group_change(None, group.name)
             
             self.refresh_groups()
             self.group_changed.emit()
@@ -101,7 +102,7 @@ class GroupPanel(QtWidgets.QDockWidget):
             QtWidgets.QMessageBox.information(
                 self,
                 "Success",
-                f"Group '{group.name}' created with {len(selected_indices)} shapes"
+                f"Group '{group.name}' created with {len(selected_ids)} shapes"
             )
     
     def on_group_selection_changed(self):
@@ -122,12 +123,14 @@ class GroupPanel(QtWidgets.QDockWidget):
             QtWidgets.QMessageBox.warning(self, "Warning", "Please select a group first")
             return
         
-        selected_indices = self.canvas.selection_manager.selected_shapes
-        if not selected_indices:
+        selected_ids = self.canvas.selection_manager.selected_shapes
+        if not selected_ids:
             QtWidgets.QMessageBox.warning(self, "Warning", "Please select shapes first")
             return
         
-        self.canvas.group_manager.add_shapes_to_group(group_name, selected_indices)
+        before = self.canvas.history.snapshot_group(group_name)
+        self.canvas.group_manager.add_shapes_to_group(group_name, selected_ids)
+        self.canvas.history.record_group_change(before, group_name)
         
         self.refresh_groups()
         self.group_changed.emit()
@@ -140,12 +143,14 @@ class GroupPanel(QtWidgets.QDockWidget):
             QtWidgets.QMessageBox.warning(self, "Warning", "Please select a group first")
             return
         
-        selected_indices = self.canvas.selection_manager.selected_shapes
-        if not selected_indices:
+        selected_ids = self.canvas.selection_manager.selected_shapes
+        if not selected_ids:
             QtWidgets.QMessageBox.warning(self, "Warning", "Please select shapes first")
             return
         
-        self.canvas.group_manager.remove_shapes_from_group(group_name, selected_indices)
+        before = self.canvas.history.snapshot_group(group_name)
+        self.canvas.group_manager.remove_shapes_from_group(group_name, selected_ids)
+        self.canvas.history.record_group_change(before, group_name)
         
         self.refresh_groups()
         self.group_changed.emit()
@@ -167,7 +172,9 @@ class GroupPanel(QtWidgets.QDockWidget):
         )
         
         if ok and new_name and new_name != group_name:
+            before = self.canvas.history.snapshot_group(group_name)
             if self.canvas.group_manager.rename_group(group_name, new_name):
+                self.canvas.history.record_group_change(before, new_name)
                 self.refresh_groups()
                 self.group_changed.emit()
                 self.canvas.update()
@@ -193,7 +200,9 @@ class GroupPanel(QtWidgets.QDockWidget):
         )
         
         if reply == QtWidgets.QMessageBox.Yes:
+            before = self.canvas.history.snapshot_group(group_name)
             self.canvas.group_manager.delete_group(group_name)
+            self.canvas.history.record_group_change(before, None)
             self.refresh_groups()
             self.group_changed.emit()
             self.canvas.update()
@@ -209,11 +218,11 @@ class GroupPanel(QtWidgets.QDockWidget):
         group = self.canvas.group_manager.get_group_by_name(group_name)
         if group:
             info = f"<b>{group.name}</b><br>"
-            info += f"Shapes: {len(group.shape_indices)}<br>"
+            info += f"Shapes: {len(group.shape_ids)}<br>"
             
-            if group.shape_indices:
-                info += f"Shape indices: {sorted(list(group.shape_indices))[:10]}"
-                if len(group.shape_indices) > 10:
+            if group.shape_ids:
+                info += f"Shape IDs: {sorted(group.shape_ids)[:10]}"
+                if len(group.shape_ids) > 10:
                     info += "..."
             
             self.info_label.setText(info)
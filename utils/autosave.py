@@ -1,11 +1,40 @@
 """
 Автозбереження сесії
+
+Знімок сцени робиться в GUI-потоці, а серіалізація та запис - у фоновому
+потоці, атомарно (тимчасовий файл + fsync + rename). Знімок складається з
+незмінних записів фігур (ShapeManager.record_cache): заново будуються лише
+записи фігур, змінених після попереднього знімка, решта береться з кешу.
+Часті запити після редагувань об'єднуються затримкою (debounce), а
+незмінена сцена (та сама версія) повторно не записується.
+
+Між знімками кожна зміна з історії дописується в журнал (EditJournal) -
+після збою відновлюється знімок плюс журнал. Знімок по таймеру
+компактизує журнал.
+
+Поруч зі знімком пишеться маленький файл метаданих (кількість фігур і
+груп, розмір полотна, час, розмір і CRC32 знімка) - інформація про
+автозбереження читається без розбору всього знімка.
 """
 import os
 import json
+import threading
+import time
+import zlib
 from datetime import datetime
 from PyQt5 import QtCore
 
+from utils.edit_journal import EditJournal
+
+
+def _file_checksum(filename, chunk_size=1 << 20):
+    """CRC32 файлу (читання блоками)"""
+    checksum = 0
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            checksum = zlib.crc32(chunk, checksum)
+    return checksum
+
 
 class AutoSaveManager(QtCore.QObject):
     """Менеджер для автоматичного збереження сесії"""
@@ -16,11 +45,34 @@ class AutoSaveManager(QtCore.QObject):
         self.autosave_enabled = True
         self.autosave_interval = 60000  # 60 секунд
         self.autosave_file = self._get_autosave_path()
+        self.debounce_delay = 2000  # мс тиші після редагування перед записом
+        self.journal_limit = 8 * 1024 * 1024  # Розмір журналу, після якого - новий знімок
+        
+        # Версія сцени останнього (або поточного) запису
+        self._saved_version = None
+        
+        # Журнал змін між знімками; _snapshot_seq - номер останнього запису,
+        # врахованого у знімку цієї сесії (None - знімка ще немає)
+        self.journal = EditJournal(self.autosave_file + '.journal')
+        self.meta_file = self.autosave_file + '.meta'
+        self._snapshot_seq = None
+        self._journal_bytes = 0
+        self._journaled_version = None  # Версія сцени після останнього запису журналу
+        self.canvas.history.on_change = self.journal_command
+        # Фоновий запис: останній незаписаний знімок та потік-записувач
+        self._lock = threading.Lock()
+        self._pending = None
+        self._worker = None
         
         # Таймер для автозбереження
         self.autosave_timer = QtCore.QTimer(self)
         self.autosave_timer.timeout.connect(self.autosave)
         
+        # Відкладене збереження після серії редагувань
+        self.debounce_timer = QtCore.QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.timeout.connect(self._autosave_unjournaled)
+        
         if self.autosave_enabled:
             self.autosave_timer.start(self.autosave_interval)
     
@@ -30,57 +82,205 @@ class AutoSaveManager(QtCore.QObject):
         temp_dir = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.TempLocation)
         return os.path.join(temp_dir, 'opencv_hud_editor_autosave.json')
     
-    def autosave(self):
-        """Автоматично зберегти поточну сесію"""
+    def _scene_version(self):
+        """Ключ стану сцени: версії фігур і груп та межі полотна"""
+        limits = self.canvas.get_canvas_limits()
+        return (self.canvas.shape_manager.version,
+                self.canvas.group_manager.version,
+                tuple(sorted(limits.items())))
+    
+    def request_autosave(self):
+        """Запланувати збереження після редагування
+        
+        Кожен новий запит переносить запис на debounce_delay, тож серія
+        швидких змін дає один запис.
+        """
+        if self.autosave_enabled:
+            self.debounce_timer.start(self.debounce_delay)
+    
+    def _autosave_unjournaled(self):
+        """Знімок після серії редагувань - лише якщо журнал їх не покриває"""
+        if self._snapshot_seq is not None and self._scene_version() == self._journaled_version:
+            return
+        self.autosave()
+    
+    def journal_command(self, command):
+        """Дописати зміну з історії в журнал (History.on_change)"""
         if not self.autosave_enabled:
             return
+        if self._snapshot_seq is None:
+            # Журнал спирається на знімок - перший знімок сесії вже містить зміну
+            self.autosave(force=True)
+            return
         
         try:
-            # Використовуємо ProjectIO для збереження
+            record = EditJournal.capture(self.canvas.history, command)
+            self._journal_bytes += self.journal.append(record)
+        except Exception as e:
+            print(f"[AutoSave] Journal error: {e}")
+            self._journaled_version = None
+            return
+        self._journaled_version = self._scene_version()
+        
+        if self._journal_bytes > self.journal_limit:
+            self.autosave()
+    
+    def reset_journal(self):
+        """Новий проект або завантаження: ID фігур змінились, потрібен новий знімок
+        
+        Журнал переходить у нову сесію: поки знімок нового проекту не записаний,
+        на диску лишається старий, і записи нового проекту не мають до нього
+        застосовуватись.
+        """
+        self._snapshot_seq = None
+        self._journaled_version = None
+        self.journal.new_session()
+    
+    def autosave(self, force=False):
+        """Автоматично зберегти поточну сесію
+        
+        В GUI-потоці лише знімається копія сцени; запис виконує фоновий потік.
+        Вартість знімка в GUI-потоці: прохід по списку фігур за кешем записів
+        (~5 мс на 100k фігур) плюс побудова записів змінених фігур. Перший
+        знімок після завантаження чи заміни сцени будує всі записи (~200 мс
+        на 100k фігур).
+        
+        Args:
+            force: зберегти навіть якщо сцена не змінилась з останнього запису
+        """
+        if not self.autosave_enabled:
+            return
+        self.debounce_timer.stop()
+        
+        version = self._scene_version()
+        if not force and version == self._saved_version:
+            return
+        
+        try:
+            # Використовуємо ProjectIO для знімка сцени
             from export.project_io import ProjectIO
             
             # Зберігаємо з міткою часу та налаштуваннями полотна
-            canvas_limits = self.canvas.get_canvas_limits()
-            ProjectIO.save_project(
+            snapshot = ProjectIO.snapshot_project(
                 self.canvas.shape_manager.shapes,
-                self.autosave_file,
                 self.canvas.group_manager,
-                canvas_limits
+                self.canvas.get_canvas_limits(),
+                record_cache=self.canvas.shape_manager.record_cache
             )
-            
-            print(f"[AutoSave] Session saved at {datetime.now().strftime('%H:%M:%S')}")
         except Exception as e:
             print(f"[AutoSave] Error: {e}")
+            return
+        
+        self._saved_version = version
+        # Знімок враховує всі записи журналу до поточного
+        self._snapshot_seq = self.journal.seq
+        self._journal_bytes = 0
+        with self._lock:
+            # Якщо попередній знімок ще не записаний - він застарів
+            self._pending = (snapshot, self.journal.session, self.journal.seq)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._write_pending, daemon=True)
+                self._worker.start()
+    
+    def _write_pending(self):
+        """Фоновий потік: записувати знімки, доки є незаписаний"""
+        from export.project_io import ProjectIO
+        
+        while True:
+            with self._lock:
+                pending = self._pending
+                self._pending = None
+                if pending is None:
+                    return
+            snapshot, session, seq = pending
+            try:
+                # Компактний JSON серіалізується C-енкодером, менше тримаючи GIL
+                project_data = ProjectIO.project_to_dict(snapshot, with_ids=True)
+                project_data['journal'] = {'session': session, 'seq': seq}
+                ProjectIO.write_project_data(project_data, self.autosave_file, indent=None)
+                self._write_meta(project_data)
+                self.journal.compact(session, seq)
+                print(f"[AutoSave] Session saved at {datetime.now().strftime('%H:%M:%S')}")
+            except Exception as e:
+                # Наступний виклик autosave спробує ще раз
+                self._saved_version = None
+                print(f"[AutoSave] Error: {e}")
+    
+    def _write_meta(self, project_data):
+        """Записати метадані щойно записаного знімка (потік автозбереження)"""
+        from export.project_io import ProjectIO
+        
+        limits = project_data.get('canvas_limits') or {}
+        meta = {
+            'shapes': len(project_data['shapes']),
+            'groups': len(project_data.get('groups', {}).get('groups', [])),
+            'canvas': [limits.get('width'), limits.get('height')] if limits.get('enabled') else None,
+            'saved_at': time.time(),
+            'size': os.path.getsize(self.autosave_file),
+            'checksum': _file_checksum(self.autosave_file)
+        }
+        ProjectIO.write_project_data(meta, self.meta_file, indent=None)
+    
+    def _read_meta(self):
+        """Метадані знімка або None, якщо їх немає чи вони не від цього знімка"""
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('size') != os.path.getsize(self.autosave_file):
+            return None
+        return meta
+    
+    def wait(self, timeout=None):
+        """Дочекатися завершення фонового запису"""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+    
+    def flush(self):
+        """Зберегти незаписані зміни та дочекатися запису (напр. при закритті)"""
+        if self.debounce_timer.isActive():
+            self.debounce_timer.stop()
+            self._autosave_unjournaled()
+        self.wait()
     
     def has_autosave(self):
         """Чи є файл автозбереження"""
         return os.path.exists(self.autosave_file)
     
-    def load_autosave(self):
-        """Завантажити автозбереження"""
+    def load_autosave(self, progress=None):
+        """Завантажити автозбереження
+        
+        Args:
+            progress: callable(прочитано байт, розмір файлу) або None
+        """
         if not self.has_autosave():
             return False
         
         try:
-            from export.project_io import ProjectIO
-            
-            shapes, groups_data, canvas_limits = ProjectIO.load_project(self.autosave_file)
-            self.canvas.shape_manager.shapes = shapes
-            self.canvas.selection_manager.clear_selection()
+            meta = self._read_meta()
+            if meta is not None and meta.get('checksum') != _file_checksum(self.autosave_file):
+                print("[AutoSave] Warning: autosave checksum mismatch")
             
-            if groups_data:
-                self.canvas.group_manager.from_dict(groups_data)
-            else:
-                self.canvas.group_manager.clear_all()
+            # Те саме потокове завантаження, що й для проекту
+            header = self.canvas.load_project(self.autosave_file, progress)
             
-            # Завантажуємо налаштування меж полотна
-            if canvas_limits:
-                self.canvas.canvas_limit_enabled = canvas_limits.get('enabled', False)
-                self.canvas.canvas_limit_width = canvas_limits.get('width', 1920)
-                self.canvas.canvas_limit_height = canvas_limits.get('height', 1080)
+            # Програємо зміни, записані в журнал після знімка
+            records = []
+            mark = header.get('journal')
+            if mark:
+                records = self.journal.read(mark['session'], mark['seq'])
+                EditJournal.replay(self.canvas.history, records)
+                # Продовжуємо ту саму сесію: знімок і журнал на диску лишаються узгодженими
+                self.journal.resume(mark['session'], records[-1]['seq'] if records else mark['seq'])
+                self._snapshot_seq = mark['seq']
+                self.canvas.update()
             
-            self.canvas.update()
-            print(f"[AutoSave] Session restored")
+            # Без змін з журналу сцена збігається з файлом - перезаписувати нема чого
+            self._saved_version = None if records else self._scene_version()
+            self._journaled_version = self._scene_version()
+            print(f"[AutoSave] Session restored ({len(records)} journaled edits)")
             return True
         except Exception as e:
             print(f"[AutoSave] Error loading: {e}")
@@ -88,6 +288,16 @@ class AutoSaveManager(QtCore.QObject):
     
     def clear_autosave(self):
         """Видалити файл автозбереження"""
+        # Незаписаний знімок більше не потрібен, поточний запис - дочекатися
+        self.debounce_timer.stop()
+        with self._lock:
+            self._pending = None
+        self.wait()
+        self._saved_version = None
+        self.reset_journal()
+        self.journal.clear()
+        if os.path.exists(self.meta_file):
+            os.remove(self.meta_file)
         if self.has_autosave():
             try:
                 os.remove(self.autosave_file)
@@ -96,25 +306,41 @@ class AutoSaveManager(QtCore.QObject):
                 print(f"[AutoSave] Error clearing: {e}")
     
     def get_autosave_info(self):
-        """Отримати інформацію про автозбереження"""
+        """Отримати інформацію про автозбереження
+        
+        Дані беруться з файлу метаданих; повний розбір знімка - лише для
+        автозбережень без метаданих (старіші версії).
+        """
         if not self.has_autosave():
             return None
         
         try:
-            stat = os.stat(self.autosave_file)
-            modified_time = datetime.fromtimestamp(stat.st_mtime)
+            meta = self._read_meta()
+            if meta is not None:
+                modified = meta['saved_at']
+                num_shapes = meta['shapes']
+                num_groups = meta['groups']
+                canvas = meta.get('canvas')
+            else:
+                modified = os.stat(self.autosave_file).st_mtime
+                # Читаємо кількість фігур
+                with open(self.autosave_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    num_shapes = len(data.get('shapes', []))
+                    num_groups = len(data.get('groups', {}).get('groups', []))
+                    limits = data.get('canvas_limits') or {}
+                    canvas = [limits.get('width'), limits.get('height')] if limits.get('enabled') else None
             
-            # Читаємо кількість фігур
-            with open(self.autosave_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                num_shapes = len(data.get('shapes', []))
-                num_groups = len(data.get('groups', {}).get('groups', []))
+            # Зміни після знімка - у журналі
+            if os.path.exists(self.journal.path):
+                modified = max(modified, os.stat(self.journal.path).st_mtime)
             
             return {
                 'file': self.autosave_file,
-                'modified': modified_time,
+                'modified': datetime.fromtimestamp(modified),
                 'shapes': num_shapes,
-                'groups': num_groups
+                'groups': num_groups,
+                'canvas': tuple(canvas) if canvas else None
             }
         except Exception as e:
             print(f"[AutoSave] Error getting info: {e}")
@@ -127,6 +353,7 @@ class AutoSaveManager(QtCore.QObject):
             self.autosave_timer.start(self.autosave_interval)
         else:
             self.autosave_timer.stop()
+            self.debounce_timer.stop()
     
     def set_interval(self, seconds):
         """Встановити інтервал автозбереження"""
@@ -0,0 +1,140 @@
+"""
+Криві Безьє на NumPy: обчислення, адаптивне розбиття та відстань до точки
+
+Спільне ядро для попереднього перегляду, hit-testing та експорту коду.
+Функції bezier_basis, bezier_points та point_polyline_distance залежать
+лише від numpy/math і вставляються у згенерований код як є.
+"""
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from shape import CubicCurveCoords, CurveCoords
+
+
+@lru_cache(maxsize=64)
+def bezier_basis(degree, steps):
+    """Матриця базисних поліномів Бернштейна для steps + 1 рівномірних t
+
+    Args:
+        degree: 2 (квадратична) або 3 (кубічна)
+        steps: кількість сегментів
+
+    Returns:
+        numpy.ndarray (steps + 1, degree + 1), тільки для читання
+    """
+    t = np.linspace(0.0, 1.0, steps + 1)
+    s = 1.0 - t
+    if degree == 2:
+        basis = np.stack((s * s, 2.0 * s * t, t * t), axis=1)
+    else:
+        basis = np.stack((s * s * s, 3.0 * s * s * t, 3.0 * s * t * t, t * t * t), axis=1)
+    basis.setflags(write=False)
+    return basis
+
+
+def bezier_points(control_points, steps):
+    """Точки кривої Безьє для steps + 1 рівномірних значень t
+
+    Args:
+        control_points: 3 (квадратична) або 4 (кубічна) точки (x, y)
+        steps: кількість сегментів
+
+    Returns:
+        numpy.ndarray (steps + 1, 2) float64
+    """
+    ctrl = np.asarray(control_points, dtype=np.float64)
+    return bezier_basis(len(ctrl) - 1, int(steps)) @ ctrl
+
+
+def point_polyline_distance(px, py, points):
+    """Мінімальна відстань від точки до ламаної
+
+    Args:
+        px, py: координати точки
+        points: масив (n, 2) вершин ламаної
+
+    Returns:
+        float: відстань
+    """
+    pts = np.asarray(points, dtype=np.float64)
+    if len(pts) == 1:
+        return math.hypot(px - pts[0, 0], py - pts[0, 1])
+
+    start = pts[:-1]
+    seg = pts[1:] - start
+    rel = np.array((px, py)) - start
+
+    seg_len2 = np.einsum('ij,ij->i', seg, seg)
+    t = np.einsum('ij,ij->i', rel, seg) / np.where(seg_len2 > 0, seg_len2, 1.0)
+    np.clip(t, 0.0, 1.0, out=t)
+
+    diff = rel - seg * t[:, None]
+    return math.sqrt(np.einsum('ij,ij->i', diff, diff).min())
+
+
+def flatten_steps(control_points, tolerance=0.5, max_steps=1000):
+    """Кількість сегментів, за якої ламана відхиляється від кривої не більше tolerance
+
+    Оцінка Wang: n = sqrt(d(d-1) / 8 * max|P[i] - 2P[i+1] + P[i+2]| / tolerance)
+    """
+    ctrl = np.asarray(control_points, dtype=np.float64)
+    degree = len(ctrl) - 1
+    second = ctrl[:-2] - 2.0 * ctrl[1:-1] + ctrl[2:]
+    max_second = math.sqrt(np.einsum('ij,ij->i', second, second).max())
+    steps = math.ceil(math.sqrt(degree * (degree - 1) * max_second / (8.0 * tolerance)))
+    return min(max(steps, 1), max_steps)
+
+
+def flatten_bezier(control_points, tolerance=0.5):
+    """Адаптивне розбиття кривої на ламану з точністю tolerance пікселів"""
+    return bezier_points(control_points, flatten_steps(control_points, tolerance))
+
+
+def get_curve_control_points(coords):
+    """Контрольні точки кривої з координат фігури
+
+    Returns:
+        tuple: точки ((x1, y1), (cx, cy), (x2, y2)) або
+            ((x1, y1), (cx1, cy1), (cx2, cy2), (x2, y2)) для кубічної
+    """
+    record = type(coords)
+    if record is CubicCurveCoords:
+        c = coords
+        return ((c.x1, c.y1), (c.cx1, c.cy1), (c.cx2, c.cy2), (c.x2, c.y2))
+    if record is CurveCoords:
+        c = coords
+        return ((c.x1, c.y1), (c.cx, c.cy), (c.x2, c.y2))
+    if 'cx1' in coords:
+        return ((coords['x1'], coords['y1']), (coords['cx1'], coords['cy1']),
+                (coords['cx2'], coords['cy2']), (coords['x2'], coords['y2']))
+    return ((coords['x1'], coords['y1']), (coords['cx'], coords['cy']),
+            (coords['x2'], coords['y2']))
+
+
+def estimate_curve_steps(coords, cubic=False):
+    """Оцінити кількість сегментів для малювання кривої
+
+    Густіше розбиття потрібне для рівних пунктирів: крок ~3 px довжини
+    контрольної ламаної, від 60 до 400 сегментів.
+    """
+    def dist(pt_a, pt_b):
+        return math.hypot(pt_a[0] - pt_b[0], pt_a[1] - pt_b[1])
+
+    if cubic:
+        p0 = (coords['x1'], coords['y1'])
+        p1 = (coords['cx1'], coords['cy1'])
+        p2 = (coords['cx2'], coords['cy2'])
+        p3 = (coords['x2'], coords['y2'])
+        approx_len = dist(p0, p1) + dist(p1, p2) + dist(p2, p3)
+    else:
+        p0 = (coords['x1'], coords['y1'])
+        p1 = (coords['cx'], coords['cy'])
+        p2 = (coords['x2'], coords['y2'])
+        approx_len = dist(p0, p1) + dist(p1, p2)
+
+    # Додаємо базову довжину між кінцями для надійності
+    approx_len += dist((coords['x1'], coords['y1']), (coords['x2'], coords['y2']))
+
+    return int(max(60, min(400, approx_len / 3)))
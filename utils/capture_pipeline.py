@@ -0,0 +1,201 @@
+"""
+Багатопотоковий конвеєр захоплення відео: захоплення -> обробка -> показ
+
+Не залежить від Qt: GUI лише періодично забирає останній готовий кадр.
+"""
+import threading
+import time
+
+import cv2
+
+
+class LatestFrameSlot:
+    """Слот на один кадр: новий кадр витісняє старий, який ще не забрали
+
+    Так повільний споживач завжди отримує найсвіжіший кадр, а черга
+    не накопичує затримку.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0  # Номер останнього покладеного кадру
+        self._taken_seq = 0  # Номер останнього забраного кадру
+        self.dropped = 0  # Кадри, витіснені до того, як їх забрали
+
+    def put(self, item):
+        """Покласти кадр (попередній незабраний кадр відкидається)"""
+        with self._cond:
+            if self._seq > self._taken_seq:
+                self.dropped += 1
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Забрати новий кадр
+
+        Args:
+            timeout: скільки чекати нового кадру (None - не чекати)
+
+        Returns:
+            Кадр або None, якщо нового кадру немає
+        """
+        with self._cond:
+            if self._seq == self._taken_seq and timeout:
+                self._cond.wait(timeout)
+            if self._seq == self._taken_seq:
+                return None
+            self._taken_seq = self._seq
+            return self._item
+
+    def wake(self):
+        """Розбудити потоки, що чекають у get()"""
+        with self._cond:
+            self._cond.notify_all()
+
+
+class CapturePipeline:
+    """Конвеєр: потік захоплення та потік обробки кадрів
+
+    Потік захоплення читає кадри з камери або відеофайлу в слот сирих кадрів.
+    Потік обробки бере найсвіжіший сирий кадр, обробляє його (масштаб, HUD)
+    і кладе результат у слот готових кадрів, звідки його забирає GUI.
+    """
+
+    def __init__(self, source, process_frame=None, stats=None):
+        """
+        Args:
+            source: індекс камери (int) або шлях до відеофайлу (str)
+            process_frame: функція frame -> frame, яка виконується в потоці обробки
+            stats: PerfStats для заміру етапу 'capture' (опційно)
+        """
+        self.source = source
+        self.process_frame = process_frame
+        self.stats = stats
+        self.is_file = isinstance(source, str)
+
+        self.cap = None
+        self.width = 0
+        self.height = 0
+        self.fps = 0.0
+
+        self.raw_slot = LatestFrameSlot()
+        self.output_slot = LatestFrameSlot()
+
+        self.frames_captured = 0
+        self.frames_processed = 0
+        self.finished = False  # Джерело закінчилось (кінець файлу або помилка читання)
+        self.error = None  # Виняток з потоку обробки
+
+        self._stop_event = threading.Event()
+        self._capture_thread = None
+        self._process_thread = None
+
+    @property
+    def frames_dropped(self):
+        """Кадри, відкинуті на будь-якому етапі конвеєра"""
+        return self.raw_slot.dropped + self.output_slot.dropped
+
+    def start(self):
+        """Відкрити джерело та запустити потоки
+
+        Returns:
+            bool: True якщо джерело вдалося відкрити
+        """
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            self.cap.release()
+            self.cap = None
+            return False
+
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+
+        self._stop_event.clear()
+        self._capture_thread = threading.Thread(
+            target=self._capture_loop, name="capture", daemon=True
+        )
+        self._process_thread = threading.Thread(
+            target=self._process_loop, name="process", daemon=True
+        )
+        self._capture_thread.start()
+        self._process_thread.start()
+        return True
+
+    def stop(self):
+        """Зупинити потоки
+
+        Джерело звільняє сам потік захоплення, коли виходить з циклу: якщо
+        join завершився за таймаутом (read() ще блокує), cap не звільняється
+        з-під нього.
+        """
+        self._stop_event.set()
+        self.raw_slot.wake()
+
+        for thread in (self._capture_thread, self._process_thread):
+            if thread is not None:
+                thread.join(timeout=2.0)
+        self._capture_thread = None
+        self._process_thread = None
+
+    def get_latest_frame(self):
+        """Забрати останній оброблений кадр (не блокує)
+
+        Returns:
+            numpy.ndarray або None, якщо нового кадру немає
+        """
+        return self.output_slot.get()
+
+    def _capture_loop(self):
+        """Потік захоплення (володіє cap і звільняє його при виході)"""
+        cap = self.cap
+        # Відеофайл читається в темпі його FPS, як жива камера
+        frame_interval = 1.0 / self.fps if self.is_file and self.fps > 0 else 0.0
+        next_time = time.perf_counter()
+
+        try:
+            while not self._stop_event.is_set():
+                start = time.perf_counter()
+                ret, frame = cap.read()
+                if self.stats is not None and ret:
+                    self.stats.record('capture', (time.perf_counter() - start) * 1000.0)
+                if not ret:
+                    self.finished = True
+                    break
+
+                self.frames_captured += 1
+                self.raw_slot.put(frame)
+
+                if frame_interval:
+                    next_time += frame_interval
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        self._stop_event.wait(delay)
+                    else:
+                        # Відстали - не намагаємось наздогнати пачкою кадрів
+                        next_time = time.perf_counter()
+        finally:
+            cap.release()
+            self.raw_slot.wake()
+
+    def _process_loop(self):
+        """Потік обробки"""
+        while not self._stop_event.is_set():
+            frame = self.raw_slot.get(timeout=0.1)
+            if frame is None:
+                if self.finished:
+                    break
+                continue
+
+            try:
+                if self.process_frame is not None:
+                    frame = self.process_frame(frame)
+            except Exception as e:
+                self.error = e
+                self.finished = True
+                break
+
+            self.frames_processed += 1
+            self.output_slot.put(frame)
@@ -0,0 +1,171 @@
+"""
+Журнал змін для відновлення сесії між автозбереженнями
+
+Після кожної зміни з історії (додавання, переміщення, видалення, зміна
+стилю, групи) в кінець файлу дописується рядок JSON зі станом лише
+змінених фігур і груп, тож вартість запису - O(зміни), а не O(проекту).
+Повний знімок автозбереження містить (сесію, номер) останнього
+врахованого запису; при відновленні програються лише новіші записи,
+а після запису знімка старі рядки відкидаються (компактизація).
+"""
+import json
+import os
+import threading
+import uuid
+
+from export.project_io import ProjectIO
+
+
+# Властивості фігури, що оновлюються при програванні (окрім kind та coords)
+_STYLE_ATTRS = ('color_bgr', 'thickness', 'style', 'line_style', 'filled',
+                'dash_length', 'dot_length', 'dynamic', 'text', 'font_scale')
+
+
+class EditJournal:
+    """Файл журналу: рядок JSON на зміну, з номером у межах сесії
+
+    Дописування (GUI-потік) та компактизація (потік автозбереження)
+    захищені одним блокуванням.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.new_session()
+
+    def new_session(self):
+        """Почати нову сесію: записи старої сесії більше не програються"""
+        self.session = uuid.uuid4().hex
+        self.seq = 0
+
+    def resume(self, session, seq):
+        """Продовжити сесію відновленого автозбереження"""
+        self.session = session
+        self.seq = seq
+
+    def append(self, record):
+        """Дописати запис зміни
+
+        Returns:
+            int: розмір записаного рядка в байтах
+        """
+        self.seq += 1
+        record['session'] = self.session
+        record['seq'] = self.seq
+        line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                f.write(line)
+        return len(line)
+
+    def read(self, session, after_seq):
+        """Записи сесії з номером більше after_seq
+
+        Обірваний останній рядок (збій під час запису) ігнорується.
+        """
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with self._lock, open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record.get('session') == session and record.get('seq', 0) > after_seq:
+                    records.append(record)
+        return records
+
+    def compact(self, session, seq):
+        """Відкинути записи, вже враховані у знімку (session, seq)"""
+        with self._lock:
+            if not os.path.exists(self.path):
+                return
+            keep = []
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record.get('session') == session and record.get('seq', 0) > seq:
+                        keep.append(line)
+            if not keep:
+                os.remove(self.path)
+                return
+            tmp_name = self.path + '.tmp'
+            with open(tmp_name, 'wb') as f:
+                f.writelines(keep)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, self.path)
+
+    def clear(self):
+        """Видалити файл журналу"""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    @staticmethod
+    def capture(history, command):
+        """Запис журналу: поточний стан усього, що змінила команда
+
+        Returns:
+            dict: shapes - [позиція, запис JSON фігури], deleted - ID
+                видалених фігур, groups - [назва, стан групи або None]
+        """
+        shape_ids, group_names = command.changes()
+        manager = history.shape_manager
+        shapes = []
+        deleted = []
+        for shape_id in shape_ids:
+            pos = manager.index_of(shape_id)
+            if pos is None:
+                deleted.append(shape_id)
+            else:
+                shapes.append([pos, ProjectIO.shape_to_dict(manager.shapes[pos])])
+
+        groups = []
+        for name in group_names:
+            state = history.snapshot_group(name)
+            if state is not None:
+                index, name, members, color = state
+                state = {'index': index, 'shape_ids': sorted(members), 'color': list(color)}
+            groups.append([name, state])
+        return {'shapes': shapes, 'deleted': deleted, 'groups': groups}
+
+    @staticmethod
+    def replay(history, records):
+        """Застосувати записи журналу до сцени (без запису в історію)"""
+        manager = history.shape_manager
+        groups = history.group_manager
+        for record in records:
+            if record.get('deleted'):
+                history.remove_shapes_silently(record['deleted'])
+
+            inserted = []
+            changed = []
+            for pos, shape_data in record.get('shapes', ()):
+                shape = ProjectIO.shape_from_dict(shape_data)
+                current = manager.get_shape(shape.id)
+                if current is None:
+                    inserted.append((pos, shape))
+                    continue
+                current.kind = shape.kind
+                current.coords = dict(shape.coords)
+                for attr in _STYLE_ATTRS:
+                    setattr(current, attr, getattr(shape, attr))
+                changed.append(shape.id)
+            if changed:
+                manager.mark_shapes_changed(changed)
+            if inserted:
+                inserted.sort(key=lambda item: item[0])
+                manager.insert_shapes([pos for pos, _ in inserted], [shape for _, shape in inserted])
+
+            for name, state in record.get('groups', ()):
+                groups.delete_group(name)
+                if state is not None:
+                    group = groups.create_group(name, state['shape_ids'])
+                    group.color = tuple(state['color'])
+                    groups.groups.remove(group)
+                    groups.groups.insert(min(state['index'], len(groups.groups)), group)
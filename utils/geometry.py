@@ -3,6 +3,10 @@
 """
 import math
 
+from shape import (circle_coords, ellipse_coords, is_cubic_curve, line_coords,
+                   point_coords)
+from utils.bezier import flatten_bezier, point_polyline_distance
+
 
 def snap_to_grid(x, y, grid_step):
     """Прив'язка координат до сітки"""
@@ -28,16 +32,7 @@ def point_near_line(px, py, x1, y1, x2, y2, tolerance):
 
 def point_near_curve(px, py, x1, y1, x2, y2, cx, cy, tolerance):
     """Перевірити чи точка близько до кривої Безьє"""
-    min_dist = float('inf')
-    steps = 20
-    for i in range(steps + 1):
-        t = i / steps
-        # Квадратична крива Безьє: B(t) = (1-t)²P0 + 2(1-t)tP1 + t²P2
-        bx = (1 - t) ** 2 * x1 + 2 * (1 - t) * t * cx + t ** 2 * x2
-        by = (1 - t) ** 2 * y1 + 2 * (1 - t) * t * cy + t ** 2 * y2
-        dist = math.hypot(px - bx, py - by)
-        min_dist = min(min_dist, dist)
-    return min_dist < tolerance
+    return _point_near_bezier(px, py, ((x1, y1), (cx, cy), (x2, y2)), tolerance)
 
 
 def is_point_near_line_middle(px, py, x1, y1, x2, y2, tolerance):
@@ -89,23 +84,21 @@ def is_point_near_line_endpoint(px, py, x1, y1, x2, y2, tolerance):
 
 def point_near_cubic_curve(px, py, x1, y1, x2, y2, cx1, cy1, cx2, cy2, tolerance):
     """Перевірити чи точка близько до кубічної кривої Безьє"""
-    min_dist = float('inf')
-    steps = 30
-    for i in range(steps + 1):
-        t = i / steps
-        # Кубічна крива Безьє: B(t) = (1-t)³P0 + 3(1-t)²tP1 + 3(1-t)t²P2 + t³P3
-        t_inv = 1 - t
-        bx = (t_inv ** 3 * x1 + 
-              3 * t_inv ** 2 * t * cx1 + 
-              3 * t_inv * t ** 2 * cx2 + 
-              t ** 3 * x2)
-        by = (t_inv ** 3 * y1 + 
-              3 * t_inv ** 2 * t * cy1 + 
-              3 * t_inv * t ** 2 * cy2 + 
-              t ** 3 * y2)
-        dist = math.hypot(px - bx, py - by)
-        min_dist = min(min_dist, dist)
-    return min_dist < tolerance
+    return _point_near_bezier(px, py, ((x1, y1), (cx1, cy1), (cx2, cy2), (x2, y2)), tolerance)
+
+
+def _point_near_bezier(px, py, control_points, tolerance):
+    """Відстань до кривої через адаптивне розбиття на ламану"""
+    # Крива лежить в опуклій оболонці контрольних точок - швидко відсікаємо далекі точки
+    xs = [p[0] for p in control_points]
+    ys = [p[1] for p in control_points]
+    if (px < min(xs) - tolerance or px > max(xs) + tolerance or
+            py < min(ys) - tolerance or py > max(ys) + tolerance):
+        return False
+
+    # Похибка розбиття не більша за 5% допуску
+    points = flatten_bezier(control_points, max(0.05, tolerance * 0.05))
+    return point_polyline_distance(px, py, points) < tolerance
 
 
 def constrain_line(x, y, x0, y0):
@@ -119,73 +112,88 @@ def constrain_line(x, y, x0, y0):
         return x0, y
 
 
-def get_selection_bbox(shapes, selected_shapes):
-    """Отримати bounding box (мінімальний прямокутник) виділених фігур"""
-    if not selected_shapes:
+def get_shape_bbox(shape):
+    """Отримати bounding box однієї фігури
+
+    Для кривих Безьє повертає рамку контрольного полігону - вона завжди
+    містить саму криву, тому підходить для індексу та відсікання.
+
+    Returns:
+        (min_x, min_y, max_x, max_y) або None, якщо координат немає
+    """
+    c = shape.coords
+    kind = shape.kind
+    
+    if kind in ['line', 'arrow', 'rectangle']:
+        x1, y1, x2, y2 = line_coords(c)
+        return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+    elif kind == 'curve':
+        x1, y1, x2, y2 = line_coords(c)
+        # Контрольні точки (квадратична або кубічна крива)
+        if is_cubic_curve(c):
+            xs = [x1, x2, c['cx1'], c['cx2']]
+            ys = [y1, y2, c['cy1'], c['cy2']]
+        else:
+            xs = [x1, x2]
+            ys = [y1, y2]
+            if 'cx' in c and 'cy' in c:
+                xs.append(c['cx'])
+                ys.append(c['cy'])
+    elif kind == 'circle':
+        cx, cy, r = circle_coords(c)
+        return (cx - r, cy - r, cx + r, cy + r)
+    elif kind == 'ellipse':
+        cx, cy, rx, ry = ellipse_coords(c)
+        if c.get('angle', 0):
+            # Повернутий еліпс - беремо описане коло
+            rx = ry = max(rx, ry)
+        return (cx - rx, cy - ry, cx + rx, cy + ry)
+    elif kind == 'polygon':
+        points = c.get('points') or []
+        if not points:
+            return None
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+    elif kind == 'text':
+        text = getattr(shape, 'text', '')
+        font_scale = getattr(shape, 'font_scale', 1.0)
+        text_width = len(text) * 10 * font_scale
+        text_height = 20 * font_scale
+        x, y = point_coords(c)
+        return (x, y - text_height, x + text_width, y)
+    elif kind == 'point':
+        x, y = point_coords(c)
+        return (x, y, x, y)
+    else:
+        return None
+    
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def get_selection_bbox(shapes):
+    """Отримати bounding box (мінімальний прямокутник) виділених фігур
+    
+    Args:
+        shapes: фігури виділення (None пропускаються)
+    """
+    if not shapes:
         return None
     
     min_x = min_y = float('inf')
     max_x = max_y = float('-inf')
     
-    for idx in selected_shapes:
-        shape = shapes[idx]
-        if shape.kind in ['line', 'arrow', 'curve']:
-            c = shape.coords
-            min_x = min(min_x, c['x1'], c['x2'])
-            max_x = max(max_x, c['x1'], c['x2'])
-            min_y = min(min_y, c['y1'], c['y2'])
-            max_y = max(max_y, c['y1'], c['y2'])
-            # Для кривих також враховуємо контрольну точку
-            if shape.kind == 'curve':
-                min_x = min(min_x, c['cx'])
-                max_x = max(max_x, c['cx'])
-                min_y = min(min_y, c['cy'])
-                max_y = max(max_y, c['cy'])
-        elif shape.kind == 'circle':
-            c = shape.coords
-            min_x = min(min_x, c['cx'] - c['r'])
-            max_x = max(max_x, c['cx'] + c['r'])
-            min_y = min(min_y, c['cy'] - c['r'])
-            max_y = max(max_y, c['cy'] + c['r'])
-        elif shape.kind == 'ellipse':
-            c = shape.coords
-            min_x = min(min_x, c['cx'] - c['rx'])
-            max_x = max(max_x, c['cx'] + c['rx'])
-            min_y = min(min_y, c['cy'] - c['ry'])
-            max_y = max(max_y, c['cy'] + c['ry'])
-        elif shape.kind == 'rectangle':
-            c = shape.coords
-            min_x = min(min_x, c['x1'], c['x2'])
-            max_x = max(max_x, c['x1'], c['x2'])
-            min_y = min(min_y, c['y1'], c['y2'])
-            max_y = max(max_y, c['y1'], c['y2'])
-        elif shape.kind == 'polygon':
-            c = shape.coords
-            if 'points' in c:
-                for px, py in c['points']:
-                    min_x = min(min_x, px)
-                    max_x = max(max_x, px)
-                    min_y = min(min_y, py)
-                    max_y = max(max_y, py)
-        elif shape.kind == 'text':
-            c = shape.coords
-            text = getattr(shape, 'text', '')
-            font_scale = getattr(shape, 'font_scale', 1.0)
-            text_width = len(text) * 10 * font_scale
-            text_height = 20 * font_scale
-            min_x = min(min_x, c['x'])
-            max_x = max(max_x, c['x'] + text_width)
-            min_y = min(min_y, c['y'] - text_height)
-            max_y = max(max_y, c['y'])
-        elif shape.kind == 'point':
-            c = shape.coords
-            min_x = min(min_x, c['x'])
-            max_x = max(max_x, c['x'])
-            min_y = min(min_y, c['y'])
-            max_y = max(max_y, c['y'])
+    for shape in shapes:
+        if shape is None:
+            continue
+        bbox = get_shape_bbox(shape)
+        if bbox is None:
+            continue
+        min_x = min(min_x, bbox[0])
+        min_y = min(min_y, bbox[1])
+        max_x = max(max_x, bbox[2])
+        max_y = max(max_y, bbox[3])
     
     if min_x == float('inf'):
         return None
     
     return (min_x, min_y, max_x, max_y)
-
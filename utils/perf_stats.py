@@ -0,0 +1,127 @@
+"""
+Вимірювання продуктивності: час етапів обробки кадру та реальний FPS
+"""
+import csv
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class PerfStats:
+    """Ковзна статистика часу етапів (avg, p95, p99) та виміряний FPS
+
+    Потокобезпечна: етапи можуть записуватись з різних потоків конвеєра.
+    """
+
+    def __init__(self, window=300, fps_window=2.0):
+        """
+        Args:
+            window: кількість останніх замірів на етап
+            fps_window: за скільки останніх секунд рахувати FPS
+        """
+        self.window = window
+        self.fps_window = fps_window
+        self._lock = threading.Lock()
+        self._samples = {}  # етап -> deque(мс)
+        self._totals = {}  # етап -> кількість замірів за весь час
+        self._frame_times = deque()  # Моменти показу кадрів
+
+    def reset(self):
+        """Очистити всі заміри"""
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._frame_times.clear()
+
+    def record(self, stage, ms):
+        """Записати тривалість етапу в мілісекундах"""
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._totals[stage] = 0
+            samples.append(ms)
+            self._totals[stage] += 1
+
+    def measure(self, stage):
+        """Контекстний менеджер для заміру етапу
+
+        Приклад:
+            with stats.measure('resize'):
+                frame = cv2.resize(frame, size)
+        """
+        return _StageTimer(self, stage)
+
+    def tick_frame(self, now=None):
+        """Позначити показаний кадр (для виміряного FPS)"""
+        if now is None:
+            now = time.perf_counter()
+        with self._lock:
+            self._frame_times.append(now)
+            limit = now - self.fps_window
+            while self._frame_times and self._frame_times[0] < limit:
+                self._frame_times.popleft()
+
+    def get_fps(self):
+        """Виміряний FPS показу за останні fps_window секунд"""
+        with self._lock:
+            times = list(self._frame_times)
+        if len(times) < 2 or times[-1] <= times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def summary(self):
+        """Зведення по етапах у порядку їх першого запису
+
+        Returns:
+            list: [(етап, кількість, avg, p95, p99, max), ...] - час у мс
+        """
+        with self._lock:
+            data = [(stage, self._totals[stage], np.fromiter(samples, float, len(samples)))
+                    for stage, samples in self._samples.items()]
+
+        result = []
+        for stage, total, values in data:
+            if not len(values):
+                continue
+            p95, p99 = np.percentile(values, (95, 99))
+            result.append((stage, total, float(values.mean()), float(p95), float(p99), float(values.max())))
+        return result
+
+    def format_summary(self):
+        """Короткий текст для відображення у вікні: avg/p95/p99 по етапах"""
+        parts = []
+        for stage, _, avg, p95, p99, _ in self.summary():
+            parts.append(f"{stage} {avg:.1f}/{p95:.1f}/{p99:.1f}")
+        return " | ".join(parts)
+
+    def export_csv(self, filename):
+        """Зберегти зведення у CSV файл"""
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stage', 'samples', 'avg_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+            for stage, total, avg, p95, p99, max_ms in self.summary():
+                writer.writerow([stage, total, f"{avg:.3f}", f"{p95:.3f}", f"{p99:.3f}", f"{max_ms:.3f}"])
+            writer.writerow([])
+            writer.writerow(['presented_fps', f"{self.get_fps():.2f}"])
+
+
+class _StageTimer:
+    """Замір одного етапу для PerfStats.measure"""
+
+    __slots__ = ('stats', 'stage', 'start')
+
+    def __init__(self, stats, stage):
+        self.stats = stats
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats.record(self.stage, (time.perf_counter() - self.start) * 1000.0)
+        return False